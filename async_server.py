@@ -0,0 +1,336 @@
+"""
+ClaimEase Async Server
+asyncio HTTP/1.1 front end that runs the WSGI app on a bounded thread-pool executor
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote_to_bytes
+
+# Async mode settings (override through environment variables)
+ASYNC_CONFIG = {
+    # Requests allowed to wait for an executor thread before new ones get 503
+    'max_pending': int(os.environ.get('ASYNC_MAX_PENDING', 1000)),
+    'max_connections': int(os.environ.get('ASYNC_MAX_CONNECTIONS', 10000)),
+    'header_timeout': float(os.environ.get('ASYNC_HEADER_TIMEOUT', 30)),
+    # Request bodies above this size are spooled to a temporary file instead of memory
+    'spool_bytes': int(os.environ.get('ASYNC_SPOOL_BYTES', 1024 * 1024))
+}
+
+MAX_HEADER_BYTES = 64 * 1024
+
+# Response bytes gathered in the app thread before streaming from the event loop
+BUFFER_BYTES = 64 * 1024
+
+REASONS = {400: 'Bad Request', 413: 'Payload Too Large', 500: 'Internal Server Error',
+           503: 'Service Unavailable'}
+
+
+class BadRequest(Exception):
+    def __init__(self, status, message=''):
+        super().__init__(message)
+        self.status = status
+
+
+class AsyncWSGIServer:
+    """Serves a WSGI app from an asyncio event loop
+
+    The event loop owns every socket: it reads request heads and bodies and
+    writes responses (waiting on drain() for slow clients), so idle and slow
+    connections cost no thread. Only the app call itself, where the blocking
+    MySQL connector and file I/O run, goes to a ThreadPoolExecutor of
+    `threads` workers. When max_pending requests are already waiting for a
+    worker, further requests are answered 503 with Retry-After instead of
+    queueing without bound.
+    """
+
+    def __init__(self, app, threads, max_pending=1000, max_connections=10000,
+                 header_timeout=30, keepalive_timeout=15, spool_bytes=1024 * 1024,
+                 max_body=None, access_log=False):
+        self.app = app
+        self.threads = threads
+        self.max_pending = max_pending
+        self.max_connections = max_connections
+        self.header_timeout = header_timeout
+        self.keepalive_timeout = keepalive_timeout
+        self.spool_bytes = spool_bytes
+        self.max_body = max_body
+        self.access_log = access_log
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self._slots = None
+        self._waiting = 0
+        self._connections = set()
+        self._server = None
+        self.stats = {'requests': 0, 'rejected': 0, 'max_waiting': 0}
+
+    async def start(self, sock):
+        self._slots = asyncio.Semaphore(self.threads)
+        self._server = await asyncio.start_server(self._handle_connection, sock=sock,
+                                                  limit=MAX_HEADER_BYTES)
+
+    async def shutdown(self, timeout):
+        """Stop accepting, give open connections `timeout` seconds, then close them"""
+        self._server.close()
+        await self._server.wait_closed()
+        deadline = time.monotonic() + timeout
+        while self._connections and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        for task in list(self._connections):
+            task.cancel()
+        self.executor.shutdown(wait=True)
+
+    async def _handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        if len(self._connections) >= self.max_connections:
+            await self._send_error(writer, 503, keep_alive=False)
+            writer.close()
+            return
+        self._connections.add(task)
+        try:
+            timeout = self.header_timeout
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), timeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._send_error(writer, 400, keep_alive=False)
+                    break
+                try:
+                    keep_alive = await self._handle_request(head, reader, writer)
+                except BadRequest as e:
+                    await self._send_error(writer, e.status, keep_alive=False)
+                    break
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError):
+                    break  # client stalled or disconnected part-way through a body
+                if not keep_alive:
+                    break
+                timeout = self.keepalive_timeout
+        except ConnectionError:
+            pass
+        except Exception:
+            traceback.print_exc()
+        finally:
+            self._connections.discard(task)
+            writer.close()
+
+    def _parse_head(self, head):
+        lines = head.decode('latin-1').split('\r\n')
+        try:
+            method, target, version = lines[0].split(' ', 2)
+        except ValueError:
+            raise BadRequest(400)
+        headers = []
+        for line in lines[1:]:
+            if not line:
+                continue
+            name, sep, value = line.partition(':')
+            if not sep:
+                raise BadRequest(400)
+            headers.append((name.strip(), value.strip()))
+        return method, target, version, headers
+
+    async def _read_body(self, reader, writer, headers, version):
+        values = {name.lower(): value for name, value in headers}
+        if values.get('expect', '').lower() == '100-continue':
+            writer.write(f'{version} 100 Continue\r\n\r\n'.encode('latin-1'))
+        body = tempfile.SpooledTemporaryFile(max_size=self.spool_bytes)
+        size = 0
+
+        if 'chunked' in values.get('transfer-encoding', '').lower():
+            while True:
+                line = await asyncio.wait_for(reader.readline(), self.header_timeout)
+                try:
+                    chunk_size = int(line.split(b';', 1)[0].strip(), 16)
+                except ValueError:
+                    raise BadRequest(400)
+                if chunk_size == 0:
+                    # Skip trailers
+                    while (await asyncio.wait_for(reader.readline(), self.header_timeout)).strip():
+                        pass
+                    break
+                size += chunk_size
+                if self.max_body is not None and size > self.max_body:
+                    raise BadRequest(413)
+                body.write(await asyncio.wait_for(reader.readexactly(chunk_size),
+                                                  self.header_timeout))
+                await asyncio.wait_for(reader.readexactly(2), self.header_timeout)
+        elif 'content-length' in values:
+            try:
+                remaining = int(values['content-length'])
+            except ValueError:
+                raise BadRequest(400)
+            if self.max_body is not None and remaining > self.max_body:
+                raise BadRequest(413)
+            while remaining:
+                chunk = await asyncio.wait_for(reader.read(min(remaining, 64 * 1024)),
+                                               self.header_timeout)
+                if not chunk:
+                    raise ConnectionResetError()
+                body.write(chunk)
+                remaining -= len(chunk)
+            size = int(values['content-length'])
+        body.seek(0)
+        return body, size
+
+    def _environ(self, method, target, version, headers, body, size, writer):
+        path, _, query = target.partition('?')
+        peer = writer.get_extra_info('peername') or ('', 0)
+        sockname = writer.get_extra_info('sockname') or ('', 0)
+        environ = {
+            'REQUEST_METHOD': method,
+            'SCRIPT_NAME': '',
+            'PATH_INFO': unquote_to_bytes(path).decode('latin-1'),
+            'QUERY_STRING': query,
+            'SERVER_NAME': str(sockname[0]),
+            'SERVER_PORT': str(sockname[1]),
+            'SERVER_PROTOCOL': version,
+            'REMOTE_ADDR': str(peer[0]),
+            'REMOTE_PORT': str(peer[1]),
+            'CONTENT_LENGTH': str(size),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': 'http',
+            'wsgi.input': body,
+            'wsgi.input_terminated': True,
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': True,
+            'wsgi.run_once': False
+        }
+        for name, value in headers:
+            key = name.upper().replace('-', '_')
+            if key == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+            elif key not in ('CONTENT_LENGTH', 'TRANSFER_ENCODING'):
+                key = 'HTTP_' + key
+                environ[key] = f'{environ[key]},{value}' if key in environ else value
+        return environ
+
+    def _call_app(self, environ):
+        """Run the app in an executor thread and collect up to BUFFER_BYTES of its body
+
+        Ordinary (buffered) responses complete here in one executor hop; only
+        larger or streamed bodies continue chunk by chunk from the event loop.
+        """
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = status
+            response['headers'] = headers
+            return lambda data: None
+
+        iterable = self.app(environ, start_response)
+        iterator = iter(iterable)
+        chunks, buffered = [], 0
+        for chunk in iterator:
+            chunks.append(chunk)
+            buffered += len(chunk)
+            if buffered >= BUFFER_BYTES:
+                return response, iterable, iterator, chunks
+        if hasattr(iterable, 'close'):
+            iterable.close()
+        return response, None, None, chunks
+
+    async def _handle_request(self, head, reader, writer):
+        method, target, version, headers = self._parse_head(head)
+        body, size = await self._read_body(reader, writer, headers, version)
+        connection_header = next((value.lower() for name, value in headers
+                                  if name.lower() == 'connection'), '')
+        keep_alive = (version == 'HTTP/1.1' and connection_header != 'close') or \
+            (version == 'HTTP/1.0' and connection_header == 'keep-alive')
+
+        # Backpressure: refuse rather than queue without bound
+        if self._waiting >= self.max_pending:
+            self.stats['rejected'] += 1
+            body.close()
+            await self._send_error(writer, 503, keep_alive)
+            return keep_alive
+
+        loop = asyncio.get_running_loop()
+        environ = self._environ(method, target, version, headers, body, size, writer)
+        started = time.perf_counter()
+        self._waiting += 1
+        self.stats['max_waiting'] = max(self.stats['max_waiting'], self._waiting)
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            response, iterable, iterator, chunks = await loop.run_in_executor(
+                self.executor, self._call_app, environ)
+        except Exception:
+            print(f"Error while calling the app for {method} {target}:", file=sys.stderr)
+            traceback.print_exc()
+            body.close()
+            await self._send_error(writer, 500, keep_alive=False)
+            return False
+        finally:
+            self._slots.release()
+        self.stats['requests'] += 1
+
+        try:
+            response_headers = response['headers']
+            names = {name.lower() for name, _ in response_headers}
+            if iterator is None and 'content-length' not in names:
+                # Fully buffered: send it with a length rather than chunked
+                response_headers = response_headers + [
+                    ('Content-Length', str(sum(len(chunk) for chunk in chunks)))]
+                names.add('content-length')
+            chunked = 'content-length' not in names and version == 'HTTP/1.1'
+            if 'content-length' not in names and not chunked:
+                keep_alive = False
+            status_line = f"{version} {response['status']}\r\n"
+            lines = [status_line] + [f'{name}: {value}\r\n' for name, value in response_headers]
+            if chunked:
+                lines.append('Transfer-Encoding: chunked\r\n')
+            lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+            writer.write(''.join(lines).encode('latin-1'))
+
+            while chunks:
+                if method != 'HEAD':
+                    for chunk in chunks:
+                        if chunk:
+                            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk) if chunked else chunk)
+                    # Wait for slow clients here, on the event loop, not in a thread
+                    await writer.drain()
+                if iterator is None:
+                    break
+                try:
+                    chunk = await loop.run_in_executor(self.executor, next, iterator, None)
+                except Exception:
+                    # The status line is already sent; cutting the connection short
+                    # is the only way to tell the client the body is incomplete
+                    print(f"Error while streaming {method} {target}:", file=sys.stderr)
+                    traceback.print_exc()
+                    return False
+                chunks = [chunk] if chunk is not None else []
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+            await writer.drain()
+        finally:
+            if hasattr(iterable, 'close'):
+                await loop.run_in_executor(self.executor, iterable.close)
+            body.close()
+
+        if self.access_log:
+            print(f"{environ['REMOTE_ADDR']} {method} {target} {response['status'].split(' ', 1)[0]} "
+                  f"{(time.perf_counter() - started) * 1000:.1f}ms", file=sys.stderr)
+        return keep_alive
+
+    async def _send_error(self, writer, status, keep_alive):
+        body = f'{{"error": "{REASONS.get(status, "Error")}"}}'.encode()
+        headers = [f'HTTP/1.1 {status} {REASONS.get(status, "Error")}',
+                   'Content-Type: application/json', f'Content-Length: {len(body)}',
+                   f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if status == 503:
+            headers.append('Retry-After: 1')
+        writer.write(('\r\n'.join(headers) + '\r\n\r\n').encode('latin-1') + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
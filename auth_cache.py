@@ -0,0 +1,53 @@
+"""
+ClaimEase Authentication Caches
+Verified-token cache and short-lived per-user context for authenticated routes
+"""
+
+import os
+import time
+from cache import TTLCache
+from data_access import fetch_one
+
+# Cache configuration (override through environment variables)
+TOKEN_CACHE_TTL_SECONDS = float(os.environ.get('TOKEN_CACHE_TTL_SECONDS', 300))
+TOKEN_CACHE_MAX_ENTRIES = int(os.environ.get('TOKEN_CACHE_MAX_ENTRIES', 10000))
+USER_CONTEXT_TTL_SECONDS = float(os.environ.get('USER_CONTEXT_TTL_SECONDS', 60))
+USER_CONTEXT_MAX_ENTRIES = int(os.environ.get('USER_CONTEXT_MAX_ENTRIES', 10000))
+
+# Verified JWT string -> decoded claims; entries never outlive the token's exp
+token_cache = TTLCache(TOKEN_CACHE_TTL_SECONDS, TOKEN_CACHE_MAX_ENTRIES)
+
+# user_id -> policy context used by claim submission
+user_context_cache = TTLCache(USER_CONTEXT_TTL_SECONDS, USER_CONTEXT_MAX_ENTRIES)
+
+
+def decode_token(token, decode):
+    """Return the claims of a token, verifying it with decode() on a cache miss
+
+    Only successfully verified tokens are cached, so invalid tokens always
+    pay the full verification cost and cannot fill the cache.
+    """
+    found, claims = token_cache.get(token)
+    if found:
+        return claims
+    claims = decode(token)
+    expires_in = claims['exp'] - time.time() if 'exp' in claims else None
+    token_cache.set(token, claims, ttl_seconds=expires_in)
+    return claims
+
+
+def get_user_context(user_id):
+    """Policy context of a user (policy_id, policy dates, coverage), cached briefly
+
+    Entries are not tagged with the Users or Policies tables, so registering
+    a new user does not empty the cache for everyone; updates to one user's
+    row or policy call invalidate_user(), and the short TTL bounds changes
+    made outside the app.
+    """
+    return user_context_cache.get_or_load(user_id, lambda: fetch_one('user_context', (user_id,)))
+
+
+def invalidate_user(user_id):
+    """Forget the cached context of a user whose row or policy was just updated"""
+    user_context_cache.discard(user_id)
+
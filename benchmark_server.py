@@ -0,0 +1,144 @@
+"""
+ClaimEase Server Benchmark
+Measures serve.py throughput and latency as the number of worker processes grows
+
+Usage: python benchmark_server.py [--workers 1,2,4] [--threads 8] [--path /api/hospitals]
+                                  [--mode threaded,async]
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+
+def wait_for_port(host, port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((host, port), timeout=1):
+                return True
+        except OSError:
+            time.sleep(0.2)
+    return False
+
+
+def _client_process(host, port, path, connections, duration, results):
+    """Drive `connections` keep-alive connections for `duration` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def run():
+        connection = http.client.HTTPConnection(host, port, timeout=30)
+        local, failed = [], 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 500:
+                    failed += 1
+                else:
+                    local.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                failed += 1
+                connection.close()
+                connection = http.client.HTTPConnection(host, port, timeout=30)
+        connection.close()
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=run) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors[0]))
+
+
+def run_load(host, port, path, clients, connections, duration):
+    """Load the server from several client processes so the client is not the bottleneck"""
+    results = multiprocessing.Queue()
+    processes = [multiprocessing.Process(target=_client_process,
+                                         args=(host, port, path, connections, duration, results))
+                 for _ in range(clients)]
+    for process in processes:
+        process.start()
+    latencies, errors = [], 0
+    for _ in processes:
+        process_latencies, process_errors = results.get()
+        latencies.extend(process_latencies)
+        errors += process_errors
+    for process in processes:
+        process.join()
+    return latencies, errors
+
+
+def percentile(values, fraction):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def benchmark(worker_counts, threads, path, port, clients, connections, duration, app,
+              modes=('threaded',)):
+    host = '127.0.0.1'
+    print(f"GET {path}  ({clients} client processes x {connections} connections, {duration}s each)")
+    print(f"{'mode':>8} {'workers':>8} {'threads':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} "
+          f"{'errors':>7}")
+    baseline = None
+    for mode, workers in [(mode, workers) for mode in modes for workers in worker_counts]:
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'serve.py'),
+             '--app', app, '--host', host, '--port', str(port),
+             '--workers', str(workers), '--threads', str(threads), '--mode', mode],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            if not wait_for_port(host, port):
+                print(f"{mode:>8} {workers:>8} server did not start")
+                continue
+            run_load(host, port, path, clients, connections, 1)  # warm up
+            latencies, errors = run_load(host, port, path, clients, connections, duration)
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+
+        throughput = len(latencies) / duration
+        baseline = baseline or throughput
+        print(f"{mode:>8} {workers:>8} {threads:>8} {throughput:>10.1f} "
+              f"{percentile(latencies, 0.5) * 1000:>9.2f} {percentile(latencies, 0.99) * 1000:>9.2f} "
+              f"{errors:>7}   x{throughput / baseline if baseline else 0:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark serve.py across worker counts')
+    parser.add_argument('--workers', default='1,2,4', help='comma-separated worker counts')
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--path', default='/api/hospitals')
+    parser.add_argument('--port', type=int, default=5099)
+    parser.add_argument('--clients', type=int, default=max(2, (os.cpu_count() or 2) // 2))
+    parser.add_argument('--connections', type=int, default=16, help='connections per client process')
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--app', default='flask_api')
+    parser.add_argument('--mode', default='threaded', help='comma-separated: threaded,async')
+    args = parser.parse_args()
+
+    worker_counts = [int(count) for count in args.workers.split(',') if count.strip()]
+    modes = [mode.strip() for mode in args.mode.split(',') if mode.strip()]
+    benchmark(worker_counts, args.threads, args.path, args.port, args.clients,
+              args.connections, args.duration, args.app, modes)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+ClaimEase Reference Data Cache
+Process-local read-through cache with TTL expiry, LRU eviction and per-table invalidation
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Cache configuration (override through environment variables)
+CACHE_CONFIG = {
+    'ttl_seconds': float(os.environ.get('CACHE_TTL_SECONDS', 300)),
+    'max_entries': int(os.environ.get('CACHE_MAX_ENTRIES', 1024))
+}
+
+
+def cache_key(route, args, param_names, extra=()):
+    """Build a cache key from a route name and its normalized query parameters
+
+    Only the listed parameters take part in the key. Values are stripped and
+    lower-cased (the filters they feed are case-insensitive) and empty values
+    are dropped, so "?city=Delhi" and "?city=delhi&state=" share an entry.
+    Already-parsed, case-sensitive values (page size, cursor) go in extra.
+    """
+    params = []
+    for name in sorted(param_names):
+        value = (args.get(name) or '').strip().lower()
+        if value:
+            params.append((name, value))
+    return (route, tuple(params), tuple(extra))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after ttl_seconds
+
+    Every entry is tagged with the tables it was read from so writes to a
+    table can drop exactly the entries that depend on it.
+    """
+
+    def __init__(self, ttl_seconds=300, max_entries=1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, expires_at, tables)
+        self._generation = 0
+        self._stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'expirations': 0, 'invalidations': 0}
+
+    def get(self, key):
+        """Return (found, value) for a key"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at, _ = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self._stats['hits'] += 1
+                    return True, value
+                del self._entries[key]
+                self._stats['expirations'] += 1
+            self._stats['misses'] += 1
+            return False, None
+
+    def set(self, key, value, tables=(), generation=None, ttl_seconds=None):
+        """Store a value; skipped if an invalidation happened since generation
+
+        ttl_seconds can only shorten the cache-wide TTL for this entry.
+        """
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            self._entries[key] = (value, time.monotonic() + ttl, frozenset(tables))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+
+    def get_or_load(self, key, loader, tables=()):
+        """Read-through lookup: return the cached value or load and cache it"""
+        found, value = self.get(key)
+        if found:
+            return value
+        with self._lock:
+            generation = self._generation
+        value = loader()
+        self.set(key, value, tables, generation)
+        return value
+
+    def discard(self, key):
+        """Drop a single entry"""
+        with self._lock:
+            self._generation += 1
+            if self._entries.pop(key, None) is not None:
+                self._stats['invalidations'] += 1
+
+    def invalidate(self, *tables):
+        """Drop entries read from any of the given tables (every entry if none given)"""
+        wanted = {table.lower() for table in tables}
+        with self._lock:
+            self._generation += 1
+            if not wanted:
+                dropped = list(self._entries)
+            else:
+                dropped = [key for key, (_, _, entry_tables) in self._entries.items()
+                           if wanted & {table.lower() for table in entry_tables}]
+            for key in dropped:
+                del self._entries[key]
+            self._stats['invalidations'] += len(dropped)
+
+    def stats(self):
+        """Snapshot of cache counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        stats['ttl_seconds'] = self.ttl_seconds
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = stats['hits'] / lookups if lookups else 0.0
+        return stats
+
+
+# Shared cache for reference data (hospitals, insurers, policies, state statistics)
+reference_cache = TTLCache(**CACHE_CONFIG)
@@ -0,0 +1,216 @@
+"""
+ClaimEase Bulk Claim Ingestion
+Row-by-row validation and single-transaction multi-row insert of claim batches
+"""
+
+import datetime
+import os
+import threading
+import time
+from decimal import Decimal, InvalidOperation
+from data_access import db_session
+from claim_numbers import claim_number_allocator
+
+# Batch limits (override through environment variables)
+MAX_BATCH_ITEMS = int(os.environ.get('CLAIM_BATCH_MAX_ITEMS', 5000))
+INSERT_CHUNK_SIZE = int(os.environ.get('CLAIM_BATCH_INSERT_CHUNK', 500))
+
+# User ids of hospital/TPA service accounts allowed to submit claims for other users
+BATCH_SUBMITTER_IDS = {int(user_id) for user_id in
+                       os.environ.get('BATCH_SUBMITTER_IDS', '').split(',') if user_id.strip()}
+
+REQUIRED_FIELDS = ['hospital_id', 'claim_type', 'treatment_type', 'claim_amount', 'diagnosis']
+CLAIM_TYPES = {'Cashless', 'Reimbursement'}
+
+# Text fields and the column widths they must fit (None for TEXT columns)
+TEXT_FIELDS = {'treatment_type': 100, 'diagnosis': None, 'treatment_details': None,
+               'doctor_name': 100, 'room_type': 50}
+
+# DECIMAL(15,2) holds at most 13 integer digits
+MAX_CLAIM_AMOUNT = Decimal(10) ** 13
+
+
+def _chunks(values, size):
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
+
+
+class BatchStats:
+    """Running totals across ingested batches"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'batches': 0, 'items': 0, 'inserted': 0, 'rejected': 0,
+                       'total_ms': 0.0, 'max_ms': 0.0}
+
+    def record(self, items, inserted, elapsed):
+        elapsed_ms = elapsed * 1000
+        with self._lock:
+            self._stats['batches'] += 1
+            self._stats['items'] += items
+            self._stats['inserted'] += inserted
+            self._stats['rejected'] += items - inserted
+            self._stats['total_ms'] += elapsed_ms
+            self._stats['max_ms'] = max(self._stats['max_ms'], elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['avg_ms'] = stats['total_ms'] / stats['batches'] if stats['batches'] else 0.0
+        seconds = stats['total_ms'] / 1000
+        stats['rows_per_second'] = stats['inserted'] / seconds if seconds else 0.0
+        return stats
+
+
+batch_stats = BatchStats()
+
+
+def _validate(item, current_user_id):
+    """Return (user_id, errors) for one batch item"""
+    if not isinstance(item, dict):
+        return None, ['item must be an object']
+
+    errors = [f'{field} is required' for field in REQUIRED_FIELDS if item.get(field) in (None, '')]
+
+    user_id = item.get('user_id', current_user_id)
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        errors.append('user_id must be an integer')
+        user_id = None
+    if user_id is not None and user_id != current_user_id and current_user_id not in BATCH_SUBMITTER_IDS:
+        errors.append('Not allowed to submit claims for another user')
+
+    if item.get('hospital_id') not in (None, ''):
+        try:
+            int(item['hospital_id'])
+        except (TypeError, ValueError):
+            errors.append('hospital_id must be an integer')
+
+    if item.get('claim_type') and item['claim_type'] not in CLAIM_TYPES:
+        errors.append(f"claim_type must be one of {', '.join(sorted(CLAIM_TYPES))}")
+
+    if item.get('claim_amount') not in (None, ''):
+        try:
+            amount = Decimal(str(item['claim_amount']))
+            if not amount.is_finite():
+                errors.append('claim_amount must be a finite number')
+            elif amount <= 0:
+                errors.append('claim_amount must be positive')
+            elif amount >= MAX_CLAIM_AMOUNT:
+                errors.append('claim_amount is too large')
+        except InvalidOperation:
+            errors.append('claim_amount must be a number')
+
+    for field, max_length in TEXT_FIELDS.items():
+        value = item.get(field)
+        if value in (None, ''):
+            continue
+        if not isinstance(value, str):
+            errors.append(f'{field} must be a string')
+        elif max_length is not None and len(value) > max_length:
+            errors.append(f'{field} must be at most {max_length} characters')
+
+    dates = {}
+    for field in ('admission_date', 'discharge_date'):
+        value = item.get(field)
+        if value in (None, ''):
+            continue
+        try:
+            dates[field] = datetime.date.fromisoformat(value)
+        except (TypeError, ValueError):
+            errors.append(f'{field} must be a date (YYYY-MM-DD)')
+    if len(dates) == 2 and dates['discharge_date'] < dates['admission_date']:
+        errors.append('discharge_date must not be before admission_date')
+
+    if not isinstance(item.get('is_emergency', False), bool):
+        errors.append('is_emergency must be true or false')
+
+    return user_id, errors
+
+
+def ingest_claims(items, current_user_id, atomic=False):
+    """Validate and insert a batch of claims in one transaction
+
+    Returns (results, summary). results has one entry per item with its
+    status: created (with claim_number), rejected (with errors) or skipped.
+    Invalid items are rejected and the rest inserted, unless atomic is set,
+    in which case valid items are skipped if any item is invalid.
+    """
+    started = time.perf_counter()
+    results = [{'index': index} for index in range(len(items))]
+    valid = []
+
+    for index, item in enumerate(items):
+        user_id, errors = _validate(item, current_user_id)
+        if errors:
+            results[index].update(status='rejected', errors=errors)
+        else:
+            valid.append((index, user_id, item))
+
+    with db_session() as db:
+        # Resolve every referenced policy and hospital with one query per 1000 ids
+        user_ids = {user_id for _, user_id, _ in valid}
+        hospital_ids = {int(item['hospital_id']) for _, _, item in valid}
+        policies = {row['user_id']: row['policy_id'] for row in db.fetch_in(
+            'batch_user_policies',
+            'SELECT user_id, policy_id FROM Users WHERE user_id IN ({})', user_ids)}
+        hospitals = {row['hospital_id'] for row in db.fetch_in(
+            'batch_hospitals',
+            'SELECT hospital_id FROM Hospitals WHERE hospital_id IN ({})', hospital_ids)}
+
+    rows = []
+    for index, user_id, item in valid:
+        errors = []
+        if not policies.get(user_id):
+            errors.append('User does not have an active policy')
+        if int(item['hospital_id']) not in hospitals:
+            errors.append('Hospital not found')
+        if errors:
+            results[index].update(status='rejected', errors=errors)
+        else:
+            rows.append((index, user_id, item))
+    validated = time.perf_counter()
+
+    rejected = len(items) - len(rows)
+    inserted = 0
+    if rows and not (atomic and rejected):
+        # Reserved while no connection is checked out: a block reservation takes
+        # a pooled connection of its own and must commit independently of the batch
+        claim_numbers = claim_number_allocator.next_claim_numbers(len(rows))
+        params = []
+        for (index, user_id, item), claim_number in zip(rows, claim_numbers):
+            results[index].update(status='created', claim_number=claim_number)
+            params.append((
+                claim_number, user_id, int(item['hospital_id']), policies[user_id],
+                item['claim_type'], item['treatment_type'], item.get('admission_date') or None,
+                item.get('discharge_date') or None, item['claim_amount'], item['diagnosis'],
+                item.get('treatment_details', ''), item.get('doctor_name', ''),
+                item.get('room_type', ''), item.get('is_emergency', False)
+            ))
+        with db_session() as db:
+            try:
+                for chunk in _chunks(params, INSERT_CHUNK_SIZE):
+                    db.execute_many('insert_claim', chunk)
+                db.commit()
+            except Exception:
+                db.rollback()
+                raise
+        inserted = len(params)
+    else:
+        for index, _, _ in rows:
+            results[index]['status'] = 'skipped'
+    inserted_at = time.perf_counter()
+
+    elapsed = inserted_at - started
+    batch_stats.record(len(items), inserted, elapsed)
+    summary = {
+        'received': len(items),
+        'inserted': inserted,
+        'rejected': rejected,
+        'validation_ms': round((validated - started) * 1000, 3),
+        'insert_ms': round((inserted_at - validated) * 1000, 3),
+        'total_ms': round(elapsed * 1000, 3),
+        'rows_per_second': round(inserted / elapsed, 1) if elapsed and inserted else 0.0
+    }
+    return results, summary
@@ -0,0 +1,67 @@
+"""
+ClaimEase Claim Includes
+Batched loading of related rows (?include=documents,hospital,policy) for claim responses
+"""
+
+# relation -> (stats label, key column on the claim, IN lookup SQL, many rows per key)
+RELATIONS = {
+    'documents': ('include_documents', 'claim_id', """
+        SELECT claim_id, document_id, document_name, document_type, upload_date, is_verified
+        FROM Documents
+        WHERE claim_id IN ({})
+        ORDER BY document_id
+    """, True),
+    'hospital': ('include_hospital', 'hospital_id', """
+        SELECT hospital_id, hospital_name, hospital_type, address, city, state, pincode,
+               contact_number, email, website, accreditation
+        FROM Hospitals
+        WHERE hospital_id IN ({})
+    """, False),
+    'policy': ('include_policy', 'policy_id', """
+        SELECT p.policy_id, p.policy_name, p.policy_number, p.policy_type, p.coverage_amount,
+               p.deductible, ic.company_id, ic.company_name, ic.helpline
+        FROM Policies p
+        JOIN Insurance_Companies ic ON p.company_id = ic.company_id
+        WHERE p.policy_id IN ({})
+    """, False)
+}
+
+
+class InvalidIncludeError(ValueError):
+    """Raised when ?include= names an unknown relation"""
+
+
+def parse_includes(args, default=()):
+    """Relations requested through ?include=a,b (default when the parameter is absent)"""
+    value = args.get('include')
+    if value is None:
+        return list(default)
+    includes = [name.strip().lower() for name in value.split(',') if name.strip()]
+    unknown = [name for name in includes if name not in RELATIONS]
+    if unknown:
+        raise InvalidIncludeError(f"Unknown include: {', '.join(unknown)}. "
+                                  f"Allowed: {', '.join(sorted(RELATIONS))}")
+    return includes
+
+
+def load_includes(db, claims, includes):
+    """Attach each requested relation to claims with one IN query per relation
+
+    Single relations are set as an object (or None), documents as a list.
+    """
+    for relation in includes:
+        name, key, sql_template, many = RELATIONS[relation]
+        keys = {claim[key] for claim in claims if claim.get(key) is not None}
+        rows = db.fetch_in(name, sql_template, keys) if keys else []
+
+        if many:
+            grouped = {}
+            for row in rows:
+                grouped.setdefault(row.pop(key), []).append(row)
+            for claim in claims:
+                claim[relation] = grouped.get(claim[key], [])
+        else:
+            by_key = {row[key]: row for row in rows}
+            for claim in claims:
+                claim[relation] = by_key.get(claim.get(key))
+    return claims
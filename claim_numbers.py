@@ -0,0 +1,98 @@
+"""
+ClaimEase Claim Number Allocator
+Unique, roughly time-ordered claim numbers handed out from blocks reserved in MySQL
+"""
+
+import datetime
+import os
+import threading
+from data_access import db_session
+
+# Claim numbers reserved per database round-trip
+BLOCK_SIZE = int(os.environ.get('CLAIM_NUMBER_BLOCK_SIZE', 100))
+
+
+class ClaimNumberAllocator:
+    """Hands out claim numbers from blocks reserved in Claim_Number_Sequence
+
+    Each reservation atomically advances the shared sequence row by
+    block_size, so blocks never overlap across threads, processes or hosts.
+    Numbers are the date followed by the zero-padded sequence value, e.g.
+    CLM202410180000012345; uniqueness comes from the sequence alone.
+    """
+
+    def __init__(self, sequence_name='claims', block_size=100, prefix='CLM'):
+        self.sequence_name = sequence_name
+        self.block_size = block_size
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+        self._blocks_reserved = 0
+
+    def _reserve_block(self, size):
+        with db_session() as db:
+            cursor = db.execute('reserve_claim_numbers', (size, self.sequence_name))
+            if cursor.rowcount == 0:
+                # First use of this sequence: create its row, then retry
+                db.execute('create_claim_number_sequence', (self.sequence_name,))
+                db.execute('reserve_claim_numbers', (size, self.sequence_name))
+            end = db.fetch_one('last_insert_id')['value']
+            db.commit()
+        self._next = end - size
+        self._end = end
+        self._blocks_reserved += 1
+
+    def next_value(self):
+        """Next unused sequence value, reserving a new block when needed"""
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block(self.block_size)
+            value = self._next
+            self._next += 1
+            return value
+
+    def next_values(self, count):
+        """count unused sequence values, reserving at most one new block"""
+        with self._lock:
+            values = list(range(self._next, min(self._next + count, self._end)))
+            self._next += len(values)
+            if len(values) < count:
+                self._reserve_block(max(self.block_size, count - len(values)))
+                start = self._next
+                self._next += count - len(values)
+                values.extend(range(start, self._next))
+            return values
+
+    def _format(self, value, date_part):
+        return f"{self.prefix}{date_part}{value:010d}"
+
+    def next_claim_number(self):
+        """Next unique claim number"""
+        value = self.next_value()
+        return self._format(value, datetime.datetime.now().strftime('%Y%m%d'))
+
+    def next_claim_numbers(self, count):
+        """count unique claim numbers"""
+        date_part = datetime.datetime.now().strftime('%Y%m%d')
+        return [self._format(value, date_part) for value in self.next_values(count)]
+
+    def reset(self):
+        """Discard the current block (its unused numbers are skipped, never reused)"""
+        with self._lock:
+            self._next = self._end = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'block_size': self.block_size,
+                'blocks_reserved': self._blocks_reserved,
+                'remaining_in_block': self._end - self._next
+            }
+
+
+claim_number_allocator = ClaimNumberAllocator(block_size=BLOCK_SIZE)
+
+# A forked worker must never hand out numbers from its parent's block
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=claim_number_allocator.reset)
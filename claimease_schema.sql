@@ -153,6 +153,7 @@ CREATE TABLE Documents (
     file_path VARCHAR(500),
     file_size INT, -- in bytes
     mime_type VARCHAR(100),
+    checksum CHAR(64), -- SHA-256 of the content, also its storage address
     upload_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
     uploaded_by INT, -- user_id or admin_id
     is_verified BOOLEAN DEFAULT FALSE,
@@ -210,15 +211,41 @@ CREATE TABLE Pre_Authorization (
     FOREIGN KEY (policy_id) REFERENCES Policies(policy_id)
 );
 
+-- 12. Claim Number Sequence (block allocation of claim numbers)
+CREATE TABLE Claim_Number_Sequence (
+    sequence_name VARCHAR(50) PRIMARY KEY,
+    next_value BIGINT NOT NULL
+);
+
+-- 13. Document Processing (background post-processing jobs)
+CREATE TABLE Document_Processing (
+    document_id INT PRIMARY KEY,
+    status ENUM('Pending', 'Processing', 'Retrying', 'Completed', 'Failed') DEFAULT 'Pending',
+    attempts INT DEFAULT 0,
+    checksum_verified BOOLEAN NULL,
+    detected_mime_type VARCHAR(100),
+    page_count INT NULL,
+    thumbnail_path VARCHAR(500),
+    error VARCHAR(500),
+    queued_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    started_at TIMESTAMP NULL,
+    finished_at TIMESTAMP NULL,
+    duration_ms INT NULL,
+    FOREIGN KEY (document_id) REFERENCES Documents(document_id)
+);
+
 -- Create indexes for better performance
 CREATE INDEX idx_users_email ON Users(email);
 CREATE INDEX idx_users_phone ON Users(phone);
 CREATE INDEX idx_claims_user ON Claims(user_id);
 CREATE INDEX idx_claims_status ON Claims(claim_status);
 CREATE INDEX idx_claims_date ON Claims(claim_date);
+CREATE INDEX idx_claims_user_date ON Claims(user_id, claim_date, claim_id);
 CREATE INDEX idx_hospitals_city ON Hospitals(city);
 CREATE INDEX idx_hospitals_state ON Hospitals(state);
+CREATE INDEX idx_hospitals_active_name ON Hospitals(is_active, hospital_name, hospital_id);
 CREATE INDEX idx_documents_claim ON Documents(claim_id);
+CREATE INDEX idx_documents_checksum ON Documents(checksum);
 
 -- Insert sample data for testing
 INSERT INTO Insurance_Companies (company_name, helpline, email, website) VALUES
@@ -0,0 +1,99 @@
+"""
+ClaimEase Response Compression
+gzip / brotli compression of text responses negotiated through Accept-Encoding
+"""
+
+import gzip
+import os
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # only gzip is offered without the brotli package
+    brotli = None
+
+# Compression settings (override through environment variables)
+COMPRESSION_CONFIG = {
+    'min_size': int(os.environ.get('COMPRESSION_MIN_SIZE', 1024)),
+    'gzip_level': int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6)),
+    'brotli_quality': int(os.environ.get('COMPRESSION_BROTLI_QUALITY', 4))
+}
+
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'text/plain', 'text/csv',
+                      'text/css', 'application/javascript'}
+
+
+def parse_accept_encoding(header):
+    """Map of coding -> q value from an Accept-Encoding header"""
+    codings = {}
+    for part in (header or '').split(','):
+        fields = part.strip().split(';')
+        coding = fields[0].strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in fields[1:]:
+            name, _, value = param.strip().partition('=')
+            if name.strip() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        codings[coding] = quality
+    return codings
+
+
+def choose_encoding(header):
+    """Best supported coding the client accepts: br, then gzip, else None"""
+    codings = parse_accept_encoding(header)
+    wildcard = codings.get('*', 0.0)
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    best, best_quality = None, 0.0
+    for coding in offered:
+        quality = codings.get(coding, wildcard)
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class ResponseCompressor:
+    """after_request hook that compresses buffered text responses
+
+    Responses below min_size, streamed or file responses (which keep
+    sendfile and Range working), partial content and anything already
+    encoded are passed through untouched.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4):
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    def init_app(self, app):
+        app.after_request(self.compress)
+
+    def compress(self, response):
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.direct_passthrough or response.is_streamed
+                or 'Content-Encoding' in response.headers
+                or response.mimetype not in COMPRESSIBLE_TYPES):
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        encoding = choose_encoding(request.headers.get('Accept-Encoding'))
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        if response.headers.get('ETag'):
+            # A compressed body is a different representation of the resource
+            etag, weak = response.get_etag()
+            response.set_etag(f'{etag}-{encoding}', weak)
+        return response
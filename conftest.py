@@ -0,0 +1,56 @@
+"""
+ClaimEase pytest configuration
+Unit tests run without MySQL; the endpoint scripts need a running server and are run by hand
+"""
+
+import copy
+from contextlib import contextmanager
+
+import pytest
+
+collect_ignore = ['test_api.py', 'test_claimease_api.py']
+
+
+class FakeSession:
+    """Stand-in for data_access.DBSession answering named queries from canned rows"""
+
+    def __init__(self, rows):
+        self.rows = rows  # query name -> list of row dicts
+        self.calls = []
+        self.during_load = None  # called on every query, e.g. to simulate a concurrent write
+        self.error = None
+
+    def fetch_all(self, name, params=()):
+        self.calls.append((name, params))
+        if self.during_load:
+            self.during_load()
+        if self.error:
+            raise self.error
+        return [dict(row) for row in self.rows[name]]
+
+    def fetch_one(self, name, params=()):
+        rows = self.fetch_all(name, params)
+        return rows[0] if rows else None
+
+    def count(self, name):
+        """How many times a named query ran"""
+        return sum(1 for called, _ in self.calls if called == name)
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    """Factory replacing module.db_session with one yielding a FakeSession over a copy of rows"""
+    def install(module, rows):
+        session = FakeSession(copy.deepcopy(rows))
+
+        @contextmanager
+        def db_session():
+            yield session
+
+        monkeypatch.setattr(module, 'db_session', db_session)
+        return session
+    return install
+
+
+def ids(results):
+    return [result['hospital_id'] for result in results]
@@ -0,0 +1,170 @@
+"""
+ClaimEase Dashboard Statistics
+Incrementally maintained dashboard counters, periodically reconciled against MySQL
+"""
+
+import datetime
+import os
+import threading
+from mysql.connector import Error
+from data_access import db_session
+
+# Seconds between full reconciliations against the real tables
+RECONCILE_SECONDS = float(os.environ.get('DASHBOARD_RECONCILE_SECONDS', 300))
+
+# Named COUNT query behind each counter
+COUNTERS = {
+    'total_hospitals': 'count_active_hospitals',
+    'total_insurance_companies': 'count_insurance_companies',
+    'total_policies': 'count_active_policies',
+    'total_users': 'count_verified_users'
+}
+
+# Counter recounted after a write to each table. Users is left out: registrations
+# insert unverified users, which total_users does not count, so only the periodic
+# reconcile picks up verifications.
+TABLE_COUNTERS = {
+    'Hospitals': 'total_hospitals',
+    'Insurance_Companies': 'total_insurance_companies',
+    'Policies': 'total_policies'
+}
+
+
+def _utcnow():
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+class DashboardSummary:
+    """In-memory dashboard summary served in constant time
+
+    Claim writes call record_claim_status() so the status buckets stay
+    current. Writes to a counted table (reported through on_table_write)
+    call mark_stale(), and the next snapshot() recounts only the counters
+    of those tables, one COUNT each. The full reconcile() runs on the
+    first snapshot and then only in the background thread, where it also
+    refreshes the top states and corrects any drift.
+    """
+
+    def __init__(self, reconcile_seconds=300):
+        self.reconcile_seconds = reconcile_seconds
+        self._lock = threading.Lock()
+        self._counters = {counter: 0 for counter in COUNTERS}
+        self._claims_by_status = {}
+        self._top_states = []
+        self._loaded = False
+        self._stale = set()  # counters to recount on the next snapshot
+        self._reconciled_at = None
+        self._updated_at = None
+        self._worker = None
+        self._stop = threading.Event()
+
+    def _take_stale(self):
+        # Cleared before counting, so a write committed during the count marks it stale again
+        with self._lock:
+            stale, self._stale = self._stale, set()
+        return stale
+
+    def _restore_stale(self, stale):
+        with self._lock:
+            self._stale |= stale
+
+    def reconcile(self):
+        """Recompute every statistic from the database"""
+        stale = self._take_stale()
+        try:
+            with db_session() as db:
+                counters = {counter: db.fetch_one(query)['total']
+                            for counter, query in COUNTERS.items()}
+                claims_by_status = {row['claim_status']: row['count']
+                                    for row in db.fetch_all('claims_by_status')}
+                top_states = db.fetch_all('top_states_by_hospitals')
+        except Exception:
+            self._restore_stale(stale)
+            raise
+
+        now = _utcnow()
+        with self._lock:
+            self._counters = counters
+            self._claims_by_status = claims_by_status
+            self._top_states = top_states
+            self._loaded = True
+            self._reconciled_at = now
+            self._updated_at = now
+
+    def recount(self):
+        """Recount only the counters marked stale, one COUNT query each"""
+        stale = self._take_stale()
+        if not stale:
+            return
+        try:
+            with db_session() as db:
+                counts = {counter: db.fetch_one(COUNTERS[counter])['total'] for counter in stale}
+        except Exception:
+            self._restore_stale(stale)
+            raise
+        with self._lock:
+            self._counters.update(counts)
+            self._updated_at = _utcnow()
+
+    def mark_stale(self, tables):
+        """Recount the counters kept from the written tables on the next snapshot"""
+        counters = {TABLE_COUNTERS[table] for table in tables if table in TABLE_COUNTERS}
+        if counters:
+            self._restore_stale(counters)
+
+    def record_claim_status(self, old_status, new_status, count=1):
+        """Move claims between status buckets; old_status is None for new claims"""
+        with self._lock:
+            if not self._loaded:
+                return
+            if old_status is not None:
+                self._claims_by_status[old_status] = self._claims_by_status.get(old_status, 0) - count
+                if self._claims_by_status[old_status] <= 0:
+                    del self._claims_by_status[old_status]
+            if new_status is not None:
+                self._claims_by_status[new_status] = self._claims_by_status.get(new_status, 0) + count
+            self._updated_at = _utcnow()
+
+    def _run(self):
+        while not self._stop.wait(self.reconcile_seconds):
+            try:
+                self.reconcile()
+            except Error as e:
+                print(f"Dashboard reconciliation error: {e}")
+
+    def start(self):
+        """Start the background reconciliation thread if it is not running"""
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return
+            self._stop.clear()
+            self._worker = threading.Thread(target=self._run, name='dashboard-reconcile', daemon=True)
+            self._worker.start()
+
+    def stop(self):
+        """Stop the background reconciliation thread"""
+        self._stop.set()
+
+    def snapshot(self):
+        """Current statistics, loading them on first use"""
+        if not self._loaded:
+            self.reconcile()
+            self.start()
+        elif self._stale:
+            self.recount()
+
+        with self._lock:
+            return {
+                'total_hospitals': self._counters['total_hospitals'],
+                'total_insurance_companies': self._counters['total_insurance_companies'],
+                'total_policies': self._counters['total_policies'],
+                'total_users': self._counters['total_users'],
+                'claims_by_status': [{'claim_status': status, 'count': count}
+                                     for status, count in self._claims_by_status.items()],
+                'top_states_by_hospitals': list(self._top_states),
+                'stats_as_of': self._updated_at.isoformat(),
+                'reconciled_at': self._reconciled_at.isoformat()
+            }
+
+
+dashboard_summary = DashboardSummary(RECONCILE_SECONDS)
@@ -0,0 +1,628 @@
+"""
+ClaimEase Data Access Layer
+Shared database configuration, pooled connections and named queries for the ClaimEase APIs
+"""
+
+import contextvars
+import os
+import re
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from mysql.connector import Error
+from db_pool import ConnectionPool, POOL_CONFIG
+from metrics import record_db_time
+from slow_queries import slow_query_log
+
+# Database configuration
+DB_CONFIG = {
+    'host': 'localhost',
+    'user': 'root',
+    'password': 'mahalakshmi',  # Update with your actual MySQL password
+    'database': 'claimease'
+}
+
+# Prepared statements kept open per connection (least recently used are closed first)
+MAX_STATEMENTS_PER_CONNECTION = 64
+
+# Rows pulled per fetchmany() call when streaming a result set
+STREAM_BATCH_SIZE = 500
+
+# Most values bound into one IN (...) lookup
+IN_CHUNK_SIZE = 1000
+
+# Shared connection pool; connections are opened lazily on first checkout
+db_pool = ConnectionPool(DB_CONFIG, **POOL_CONFIG)
+
+# A forked worker must open its own connections
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=db_pool.reset_after_fork)
+
+# Named queries. Each one is prepared once per pooled connection and reused.
+QUERIES = {
+    'database_version': """
+        SELECT DATABASE() AS database_name, VERSION() AS mysql_version
+    """,
+    'user_by_email': """
+        SELECT user_id FROM Users WHERE email = %s
+    """,
+    'insert_user': """
+        INSERT INTO Users (first_name, last_name, email, phone, address, city, state,
+                          pincode, date_of_birth, gender, password_hash)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'user_login': """
+        SELECT user_id, first_name, last_name, email, policy_id
+        FROM Users
+        WHERE email = %s AND password_hash = %s
+    """,
+    # {columns} in these queries is filled in by fieldsets.fieldset_sql
+    'user_profile': """
+        SELECT {columns}
+        FROM Users u
+        LEFT JOIN Policies p ON u.policy_id = p.policy_id
+        LEFT JOIN Insurance_Companies ic ON p.company_id = ic.company_id
+        WHERE u.user_id = %s
+    """,
+    'user_context': """
+        SELECT u.user_id, u.policy_id, u.policy_start_date, u.policy_end_date,
+               p.coverage_amount
+        FROM Users u
+        LEFT JOIN Policies p ON u.policy_id = p.policy_id
+        WHERE u.user_id = %s
+    """,
+    'active_hospitals': """
+        SELECT * FROM Hospitals WHERE is_active = TRUE ORDER BY hospital_name
+    """,
+    'search_hospitals_all': """
+        SELECT hospital_id, hospital_name, hospital_type, city, state, is_active, updated_at
+        FROM Hospitals
+    """,
+    'search_hospitals_changed': """
+        SELECT hospital_id, hospital_name, hospital_type, city, state, is_active, updated_at
+        FROM Hospitals
+        WHERE updated_at >= %s
+    """,
+    'geo_hospitals': """
+        SELECT hospital_id, hospital_name, hospital_type, city, state, contact_number,
+               latitude, longitude
+        FROM Hospitals
+        WHERE is_active = TRUE AND latitude IS NOT NULL AND longitude IS NOT NULL
+    """,
+    'hospitals_version': """
+        SELECT COUNT(*) AS hospitals, MAX(updated_at) AS updated_at FROM Hospitals
+    """,
+    'network_hospitals': """
+        SELECT hospital_id, hospital_name, hospital_type, city, state, contact_number
+        FROM Hospitals
+        WHERE is_active = TRUE
+    """,
+    'network_version': """
+        SELECT (SELECT COUNT(*) FROM Hospitals) AS hospitals,
+               (SELECT MAX(updated_at) FROM Hospitals) AS hospitals_updated_at,
+               (SELECT COUNT(*) FROM Insurance_Companies) AS companies,
+               (SELECT MAX(updated_at) FROM Insurance_Companies) AS companies_updated_at,
+               (SELECT COUNT(*) FROM Hospital_Insurance_Empanelment) AS empanelments,
+               (SELECT BIT_XOR(CRC32(CONCAT_WS(',', hospital_id, company_id, is_active,
+                                               cashless_available, reimbursement_available)))
+                FROM Hospital_Insurance_Empanelment) AS empanelments_checksum
+    """,
+    'active_empanelments': """
+        SELECT hospital_id, company_id, cashless_available, reimbursement_available
+        FROM Hospital_Insurance_Empanelment
+        WHERE is_active = TRUE
+    """,
+    'hospital_details': """
+        SELECT {columns} FROM Hospitals WHERE hospital_id = %s
+    """,
+    'user_claims': """
+        SELECT c.*, h.hospital_name, p.policy_name, ic.company_name
+        FROM Claims c
+        JOIN Hospitals h ON c.hospital_id = h.hospital_id
+        JOIN Policies p ON c.policy_id = p.policy_id
+        JOIN Insurance_Companies ic ON p.company_id = ic.company_id
+        WHERE c.user_id = %s
+        ORDER BY c.claim_date DESC, c.claim_id DESC
+        LIMIT %s
+    """,
+    'user_claims_after': """
+        SELECT c.*, h.hospital_name, p.policy_name, ic.company_name
+        FROM Claims c
+        JOIN Hospitals h ON c.hospital_id = h.hospital_id
+        JOIN Policies p ON c.policy_id = p.policy_id
+        JOIN Insurance_Companies ic ON p.company_id = ic.company_id
+        WHERE c.user_id = %s
+          AND (c.claim_date < %s OR (c.claim_date = %s AND c.claim_id < %s))
+        ORDER BY c.claim_date DESC, c.claim_id DESC
+        LIMIT %s
+    """,
+    'insert_claim': """
+        INSERT INTO Claims (claim_number, user_id, hospital_id, policy_id, claim_type,
+                          treatment_type, admission_date, discharge_date, claim_amount,
+                          diagnosis, treatment_details, doctor_name, room_type, is_emergency)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'create_claim_number_sequence': """
+        INSERT IGNORE INTO Claim_Number_Sequence (sequence_name, next_value) VALUES (%s, 1)
+    """,
+    'reserve_claim_numbers': """
+        UPDATE Claim_Number_Sequence
+        SET next_value = LAST_INSERT_ID(next_value + %s)
+        WHERE sequence_name = %s
+    """,
+    'last_insert_id': """
+        SELECT LAST_INSERT_ID() AS value
+    """,
+    'claim_details': """
+        SELECT {columns}
+        FROM Claims c
+        JOIN Hospitals h ON c.hospital_id = h.hospital_id
+        JOIN Policies p ON c.policy_id = p.policy_id
+        JOIN Insurance_Companies ic ON p.company_id = ic.company_id
+        WHERE c.claim_id = %s AND c.user_id = %s
+    """,
+    'user_claim_exists': """
+        SELECT claim_id FROM Claims WHERE claim_id = %s AND user_id = %s
+    """,
+    'user_document': """
+        SELECT d.document_id, d.document_name, d.file_path, d.file_size, d.mime_type, d.checksum
+        FROM Documents d
+        JOIN Claims c ON d.claim_id = c.claim_id
+        WHERE d.document_id = %s AND c.user_id = %s
+    """,
+    'insert_document': """
+        INSERT INTO Documents (claim_id, document_name, document_type,
+                             file_path, file_size, mime_type, checksum, uploaded_by)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """,
+    'queue_document_job': """
+        INSERT IGNORE INTO Document_Processing (document_id) VALUES (%s)
+    """,
+    'pending_document_jobs': """
+        SELECT d.document_id
+        FROM Documents d
+        LEFT JOIN Document_Processing dp ON d.document_id = dp.document_id
+        WHERE dp.document_id IS NULL
+           OR dp.status = 'Pending'
+           OR (dp.status = 'Retrying' AND dp.finished_at < NOW() - INTERVAL %s SECOND)
+           OR (dp.status = 'Processing' AND dp.started_at < NOW() - INTERVAL %s SECOND)
+        ORDER BY d.document_id
+        LIMIT %s
+    """,
+    'claim_document_job': """
+        UPDATE Document_Processing
+        SET status = 'Processing', attempts = attempts + 1, started_at = NOW()
+        WHERE document_id = %s
+          AND (status IN ('Pending', 'Retrying')
+               OR (status = 'Processing' AND started_at < NOW() - INTERVAL %s SECOND))
+    """,
+    'document_for_processing': """
+        SELECT d.document_id, d.file_path, d.checksum, d.mime_type, dp.attempts
+        FROM Documents d
+        JOIN Document_Processing dp ON d.document_id = dp.document_id
+        WHERE d.document_id = %s
+    """,
+    'complete_document_job': """
+        UPDATE Document_Processing
+        SET status = 'Completed', checksum_verified = %s, detected_mime_type = %s,
+            page_count = %s, thumbnail_path = %s, error = NULL,
+            finished_at = NOW(), duration_ms = %s
+        WHERE document_id = %s
+    """,
+    'fail_document_job': """
+        UPDATE Document_Processing
+        SET status = %s, error = %s, finished_at = NOW(), duration_ms = %s
+        WHERE document_id = %s
+    """,
+    'document_status': """
+        SELECT d.document_id, d.document_name, COALESCE(dp.status, 'Pending') as status,
+               COALESCE(dp.attempts, 0) as attempts, dp.checksum_verified, dp.detected_mime_type,
+               dp.page_count, dp.thumbnail_path IS NOT NULL as has_thumbnail, dp.error,
+               dp.queued_at, dp.started_at, dp.finished_at, dp.duration_ms
+        FROM Documents d
+        JOIN Claims c ON d.claim_id = c.claim_id
+        LEFT JOIN Document_Processing dp ON d.document_id = dp.document_id
+        WHERE d.document_id = %s AND c.user_id = %s
+    """,
+    'insurance_companies': """
+        SELECT * FROM Insurance_Companies ORDER BY company_name
+    """,
+    'count_active_hospitals': """
+        SELECT COUNT(*) as total FROM Hospitals WHERE is_active = TRUE
+    """,
+    'count_insurance_companies': """
+        SELECT COUNT(*) as total FROM Insurance_Companies
+    """,
+    'count_active_policies': """
+        SELECT COUNT(*) as total FROM Policies WHERE is_active = TRUE
+    """,
+    'count_verified_users': """
+        SELECT COUNT(*) as total FROM Users WHERE is_verified = TRUE
+    """,
+    'claims_by_status': """
+        SELECT claim_status, COUNT(*) as count
+        FROM Claims
+        GROUP BY claim_status
+    """,
+    'top_states_by_hospitals': """
+        SELECT state_name, public_hospitals_count, private_hospitals_count,
+               (public_hospitals_count + private_hospitals_count) as total_hospitals
+        FROM Hospital_States
+        ORDER BY total_hospitals DESC
+        LIMIT 10
+    """,
+    'hospital_states': """
+        SELECT state_name, public_hospitals_count, private_hospitals_count,
+               public_hospitals_amount, private_hospitals_amount,
+               (public_hospitals_count + private_hospitals_count) as total_hospitals,
+               (public_hospitals_amount + private_hospitals_amount) as total_amount
+        FROM Hospital_States
+        ORDER BY total_hospitals DESC
+    """
+}
+
+
+# Table targeted by a write statement
+WRITE_TABLE_PATTERN = re.compile(
+    r'^\s*(?:INSERT\s+(?:IGNORE\s+)?INTO|UPDATE|DELETE\s+FROM|REPLACE\s+INTO)\s+`?(\w+)',
+    re.IGNORECASE)
+
+
+class DatabaseUnavailableError(Error):
+    """Raised when no database connection could be obtained"""
+
+
+class QueryStats:
+    """Thread-safe per-query timing and row counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+
+    def record(self, name, elapsed, rows, failed=False):
+        record_db_time(elapsed)
+        with self._lock:
+            entry = self._stats.get(name)
+            if entry is None:
+                entry = self._stats[name] = {
+                    'calls': 0, 'errors': 0, 'rows': 0,
+                    'total_ms': 0.0, 'max_ms': 0.0
+                }
+            elapsed_ms = elapsed * 1000
+            entry['calls'] += 1
+            entry['rows'] += rows
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            if failed:
+                entry['errors'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = {name: dict(entry) for name, entry in self._stats.items()}
+        for entry in stats.values():
+            entry['avg_ms'] = entry['total_ms'] / entry['calls'] if entry['calls'] else 0.0
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+
+
+query_stats = QueryStats()
+
+# Callbacks run with the set of written table names after each commit
+_write_listeners = []
+
+
+def on_table_write(listener):
+    """Register a callback invoked with the written table names after a commit"""
+    _write_listeners.append(listener)
+    return listener
+
+
+def notify_table_write(*tables):
+    """Tell registered listeners that the given tables changed"""
+    if not tables:
+        return
+    for listener in _write_listeners:
+        try:
+            listener(set(tables))
+        except Exception as e:
+            print(f"Table write listener error: {e}")
+
+
+# Prepared cursors per raw connection; entries vanish when the connection is discarded
+_statement_caches = weakref.WeakKeyDictionary()
+_statement_caches_lock = threading.Lock()
+
+
+def get_db_connection():
+    """Get a pooled database connection (close() returns it to the pool)"""
+    try:
+        return db_pool.get_connection()
+    except Error as e:
+        print(f"Database connection error: {e}")
+        return None
+
+
+class DBSession:
+    """Runs named queries on one pooled connection"""
+
+    def __init__(self, connection):
+        self.connection = connection
+        with _statement_caches_lock:
+            statements = _statement_caches.get(connection.raw)
+            if statements is None:
+                statements = _statement_caches[connection.raw] = OrderedDict()
+        self._statements = statements
+        self._written_tables = set()
+
+    def _prepared_cursor(self, sql):
+        """Return (sql, cursor) with the statement already prepared on this connection
+
+        The connector re-prepares whenever it is handed a different string
+        object, so the cached copy of the SQL text is returned alongside the
+        cursor and must be the one passed to execute().
+        """
+        cached = self._statements.get(sql)
+        if cached is not None:
+            self._statements.move_to_end(sql)
+            return cached
+
+        cursor = self.connection.cursor(prepared=True, dictionary=True)
+        cached = self._statements[sql] = (sql, cursor)
+        while len(self._statements) > MAX_STATEMENTS_PER_CONNECTION:
+            _, (_, stale_cursor) = self._statements.popitem(last=False)
+            try:
+                stale_cursor.close()
+            except Error:
+                pass
+        return cached
+
+    def _run(self, name, sql, params, fetch, prepared=True):
+        if prepared:
+            sql, cursor = self._prepared_cursor(sql)
+        else:
+            cursor = self.connection.cursor(dictionary=True)
+        started = time.perf_counter()
+        rows = 0
+        try:
+            cursor.execute(sql, tuple(params))
+            if fetch:
+                result = cursor.fetchall()
+                rows = len(result)
+            else:
+                result = cursor
+                rows = max(cursor.rowcount, 0)
+                written = WRITE_TABLE_PATTERN.match(sql)
+                if written:
+                    self._written_tables.add(written.group(1))
+        except Error as e:
+            elapsed = time.perf_counter() - started
+            query_stats.record(name, elapsed, rows, failed=True)
+            if elapsed >= slow_query_log.threshold:
+                slow_query_log.record(None, name, sql, params, elapsed, rows, error=e)
+            raise
+        finally:
+            if not prepared and fetch:
+                cursor.close()
+        elapsed = time.perf_counter() - started
+        query_stats.record(name, elapsed, rows)
+        if elapsed >= slow_query_log.threshold:
+            slow_query_log.record(self.connection, name, sql, params, elapsed, rows)
+        return result
+
+    def fetch_all(self, name, params=()):
+        """Run a named query and return every row as a dict"""
+        return self._run(name, QUERIES[name], params, fetch=True)
+
+    def fetch_one(self, name, params=()):
+        """Run a named query and return its first row, or None"""
+        rows = self._run(name, QUERIES[name], params, fetch=True)
+        return rows[0] if rows else None
+
+    def execute(self, name, params=()):
+        """Run a named write query and return the cursor (rowcount, lastrowid)"""
+        return self._run(name, QUERIES[name], params, fetch=False)
+
+    def fetch_all_sql(self, name, sql, params=(), prepared=True):
+        """Run dynamically built SQL under a stats label and return every row
+
+        The SQL text should come from a small, fixed set of shapes (values go
+        in params) so that its prepared statement is reused. Pass
+        prepared=False for one-off shapes such as variable-length IN lists.
+        """
+        return self._run(name, sql, params, fetch=True, prepared=prepared)
+
+    def fetch_in(self, name, sql_template, values, chunk_size=IN_CHUNK_SIZE):
+        """Run an IN ({}) lookup over distinct values, one query per chunk_size values"""
+        values = sorted(set(values))
+        rows = []
+        for start in range(0, len(values), chunk_size):
+            chunk = values[start:start + chunk_size]
+            rows.extend(self.fetch_all_sql(name, sql_template.format(in_placeholders(len(chunk))),
+                                           chunk, prepared=False))
+        return rows
+
+    def execute_many(self, name, seq_params):
+        """Run a named INSERT for every parameter tuple and return the row count
+
+        Uses a plain cursor so the connector rewrites the batch into
+        multi-row INSERT statements instead of one round-trip per row.
+        """
+        sql = QUERIES[name]
+        seq_params = [tuple(params) for params in seq_params]
+        cursor = self.connection.cursor()
+        started = time.perf_counter()
+        try:
+            cursor.executemany(sql, seq_params)
+            rows = max(cursor.rowcount, 0)
+        except Error:
+            query_stats.record(name, time.perf_counter() - started, 0, failed=True)
+            raise
+        finally:
+            cursor.close()
+        elapsed = time.perf_counter() - started
+        query_stats.record(name, elapsed, rows)
+        if elapsed >= slow_query_log.threshold:
+            # Parameters of the first row stand in for the batch
+            slow_query_log.record(self.connection, name, sql, seq_params[0] if seq_params else (),
+                                  elapsed, rows)
+        written = WRITE_TABLE_PATTERN.match(sql)
+        if written:
+            self._written_tables.add(written.group(1))
+        return rows
+
+    def commit(self):
+        self.connection.commit()
+        written, self._written_tables = self._written_tables, set()
+        notify_table_write(*written)
+
+    def rollback(self):
+        self.connection.rollback()
+        self._written_tables = set()
+
+
+def in_placeholders(count):
+    """Placeholder list for an IN (...) clause with count values"""
+    return ', '.join(['%s'] * count)
+
+
+class SharedConnection:
+    """One pooled connection lent to several db_session() blocks, one block at a time
+
+    The connection is checked out on first use, so work that never touches
+    the database does not hold one.
+    """
+
+    def __init__(self):
+        self.connection = None
+        # Reentrant so a nested db_session() on the same thread does not deadlock
+        self.lock = threading.RLock()
+
+    def acquire(self):
+        if self.connection is None:
+            self.connection = get_db_connection()
+            if not self.connection:
+                raise DatabaseUnavailableError(msg='Database connection failed')
+        return self.connection
+
+
+_shared_connection = contextvars.ContextVar('shared_connection', default=None)
+
+
+@contextmanager
+def shared_connection():
+    """Make every db_session() in this context reuse one pooled connection
+
+    Threads only see the connection when they run inside a copy of this
+    context (contextvars.copy_context()).
+    """
+    shared = SharedConnection()
+    token = _shared_connection.set(shared)
+    try:
+        yield
+    finally:
+        _shared_connection.reset(token)
+        if shared.connection:
+            shared.connection.close()
+
+
+@contextmanager
+def db_session():
+    """Check out a pooled connection for the duration of a with-block"""
+    shared = _shared_connection.get()
+    if shared is not None:
+        with shared.lock:
+            yield DBSession(shared.acquire())
+        return
+
+    connection = get_db_connection()
+    if not connection:
+        raise DatabaseUnavailableError(msg='Database connection failed')
+    try:
+        yield DBSession(connection)
+    finally:
+        connection.close()
+
+
+def fetch_all(name, params=()):
+    """Run a single named query on its own pooled connection"""
+    with db_session() as db:
+        return db.fetch_all(name, params)
+
+
+def fetch_one(name, params=()):
+    """Run a single named query on its own pooled connection and return one row"""
+    with db_session() as db:
+        return db.fetch_one(name, params)
+
+
+class RowStream:
+    """Result set read in fetchmany() batches from an unbuffered cursor
+
+    Owns its pooled connection until the rows are exhausted or close() is
+    called. A stream abandoned part-way disconnects instead of draining the
+    remaining rows back into the pool.
+    """
+
+    def __init__(self, name, connection, cursor, batch_size, started):
+        self.name = name
+        self.batch_size = batch_size
+        self._connection = connection
+        self._cursor = cursor
+        self._started = started
+        self._rows = 0
+        self._exhausted = False
+
+    def __iter__(self):
+        try:
+            while self._connection is not None:
+                rows = self._cursor.fetchmany(self.batch_size)
+                if not rows:
+                    self._exhausted = True
+                    break
+                self._rows += len(rows)
+                yield rows
+        finally:
+            self.close()
+
+    def close(self):
+        if self._connection is None:
+            return
+        connection, self._connection = self._connection, None
+        query_stats.record(self.name, time.perf_counter() - self._started, self._rows)
+        try:
+            if self._exhausted:
+                self._cursor.close()
+            else:
+                connection.raw.disconnect()
+        except Error:
+            pass
+        connection.close()
+
+
+def stream_sql(name, sql, params=(), batch_size=STREAM_BATCH_SIZE):
+    """Execute SQL on an unbuffered cursor and return a RowStream over its rows
+
+    The query runs before this returns, so connection and SQL errors surface
+    here rather than half-way through a response.
+    """
+    connection = get_db_connection()
+    if not connection:
+        raise DatabaseUnavailableError(msg='Database connection failed')
+    started = time.perf_counter()
+    try:
+        cursor = connection.cursor(dictionary=True)
+        cursor.execute(sql, tuple(params))
+    except Error:
+        query_stats.record(name, time.perf_counter() - started, 0, failed=True)
+        connection.close()
+        raise
+    elapsed = time.perf_counter() - started
+    if elapsed >= slow_query_log.threshold:
+        # The unread result set keeps the connection busy, so no EXPLAIN here
+        slow_query_log.record(None, name, sql, params, elapsed, 0)
+    return RowStream(name, connection, cursor, batch_size, started)
@@ -0,0 +1,225 @@
+"""
+ClaimEase Database Connection Pool
+Thread-safe MySQL connection pool with checkout timeout, idle recycling and liveness checks
+"""
+
+import os
+import threading
+import time
+import mysql.connector
+from mysql.connector import Error
+from metrics import record_pool_wait
+
+# Pool configuration (override through environment variables)
+POOL_CONFIG = {
+    'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+    'checkout_timeout': float(os.environ.get('DB_POOL_TIMEOUT', 5)),
+    'recycle_seconds': float(os.environ.get('DB_POOL_RECYCLE_SECONDS', 300)),
+    'ping_on_checkout': os.environ.get('DB_POOL_PING', 'True').lower() in ('1', 'true', 'yes')
+}
+
+
+class PoolTimeoutError(Error):
+    """Raised when no connection becomes available within the checkout timeout"""
+
+
+class PooledConnection:
+    """Checked-out pool connection
+
+    Behaves like the underlying MySQL connection, except that close()
+    hands the connection back to the pool instead of disconnecting.
+    """
+
+    def __init__(self, pool, connection):
+        self._pool = pool
+        self._connection = connection
+
+    @property
+    def raw(self):
+        """Underlying mysql.connector connection"""
+        return self._connection
+
+    def close(self):
+        """Return the connection to the pool"""
+        if self._connection is not None:
+            connection, self._connection = self._connection, None
+            self._pool.release(connection)
+
+    def is_connected(self):
+        return self._connection is not None and self._connection.is_connected()
+
+    def __getattr__(self, name):
+        if self._connection is None:
+            raise Error(msg='Connection has already been returned to the pool')
+        return getattr(self._connection, name)
+
+
+class ConnectionPool:
+    """Bounded pool of MySQL connections
+
+    Connections are created lazily up to pool_size. A checkout waits up to
+    checkout_timeout seconds for a free connection, connections idle for
+    longer than recycle_seconds are replaced, and idle connections are
+    pinged before being handed out when ping_on_checkout is set.
+    """
+
+    def __init__(self, db_config, pool_size=10, checkout_timeout=5.0,
+                 recycle_seconds=300, ping_on_checkout=True):
+        self.db_config = dict(db_config)
+        self.pool_size = pool_size
+        self.checkout_timeout = checkout_timeout
+        self.recycle_seconds = recycle_seconds
+        self.ping_on_checkout = ping_on_checkout
+
+        self._lock = threading.Condition()
+        self._idle = []  # (connection, returned_at) pairs, most recently used last
+        self._in_use = 0
+        self._stats = {
+            'checkouts': 0,
+            'connections_created': 0,
+            'connections_recycled': 0,
+            'failed_pings': 0,
+            'timeouts': 0,
+            'total_wait_seconds': 0.0,
+            'max_wait_seconds': 0.0
+        }
+
+    def _connect(self):
+        connection = mysql.connector.connect(**self.db_config)
+        with self._lock:
+            self._stats['connections_created'] += 1
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Error:
+            pass
+
+    def _is_alive(self, connection):
+        try:
+            connection.ping(reconnect=False)
+            return True
+        except Error:
+            with self._lock:
+                self._stats['failed_pings'] += 1
+            return False
+
+    def get_connection(self):
+        """Check a connection out of the pool"""
+        started = time.monotonic()
+        deadline = started + self.checkout_timeout
+
+        with self._lock:
+            while not self._idle and self._in_use >= self.pool_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        msg=f'No database connection available within {self.checkout_timeout}s')
+                self._lock.wait(remaining)
+
+            idle_entry = self._idle.pop() if self._idle else None
+            self._in_use += 1
+
+            waited = time.monotonic() - started
+            self._stats['checkouts'] += 1
+            self._stats['total_wait_seconds'] += waited
+            self._stats['max_wait_seconds'] = max(self._stats['max_wait_seconds'], waited)
+        record_pool_wait(waited)
+
+        try:
+            connection = None
+            if idle_entry:
+                connection, returned_at = idle_entry
+                if time.monotonic() - returned_at > self.recycle_seconds:
+                    with self._lock:
+                        self._stats['connections_recycled'] += 1
+                    self._discard(connection)
+                    connection = None
+                elif self.ping_on_checkout and not self._is_alive(connection):
+                    self._discard(connection)
+                    connection = None
+
+            if connection is None:
+                connection = self._connect()
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+        return PooledConnection(self, connection)
+
+    def release(self, connection):
+        """Return a connection to the pool, discarding it if it is broken"""
+        reusable = False
+        try:
+            if connection.is_connected():
+                # Drop any uncommitted work, as a real disconnect would
+                connection.rollback()
+                reusable = True
+        except Error:
+            reusable = False
+
+        if not reusable:
+            self._discard(connection)
+
+        with self._lock:
+            self._in_use -= 1
+            if reusable:
+                self._idle.append((connection, time.monotonic()))
+            self._lock.notify()
+
+    def warm(self, count):
+        """Open idle connections up to count (capped at pool_size); returns how many were opened"""
+        target = min(count, self.pool_size)
+        opened = 0
+        while True:
+            with self._lock:
+                if len(self._idle) + self._in_use >= target:
+                    return opened
+                self._in_use += 1
+            try:
+                connection = self._connect()
+            finally:
+                with self._lock:
+                    self._in_use -= 1
+                    self._lock.notify()
+            with self._lock:
+                self._idle.append((connection, time.monotonic()))
+            opened += 1
+
+    def reset_after_fork(self):
+        """Forget connections inherited from the parent process
+
+        They are dropped without close(), which would send COM_QUIT over a
+        socket the parent is still using.
+        """
+        self._lock = threading.Condition()
+        self._idle = []
+        self._in_use = 0
+
+    def close_all(self):
+        """Disconnect every idle connection"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection, _ in idle:
+            self._discard(connection)
+
+    def stats(self):
+        """Snapshot of pool usage counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats.update({
+                'pool_size': self.pool_size,
+                'in_use': self._in_use,
+                'idle': len(self._idle),
+                'checkout_timeout': self.checkout_timeout,
+                'recycle_seconds': self.recycle_seconds
+            })
+        if stats['checkouts']:
+            stats['avg_wait_seconds'] = stats['total_wait_seconds'] / stats['checkouts']
+        else:
+            stats['avg_wait_seconds'] = 0.0
+        return stats
@@ -0,0 +1,259 @@
+"""
+ClaimEase Document Jobs
+Background post-processing of uploaded documents on a bounded worker pool
+"""
+
+import hashlib
+import os
+import queue
+import re
+import threading
+import time
+from mysql.connector import Error
+from data_access import db_session, fetch_all
+
+try:
+    from PIL import Image
+except ImportError:  # thumbnails are skipped without Pillow
+    Image = None
+
+# Worker pool and retry policy (override through environment variables)
+JOB_CONFIG = {
+    'workers': int(os.environ.get('DOCUMENT_JOB_WORKERS', 2)),
+    'queue_size': int(os.environ.get('DOCUMENT_JOB_QUEUE_SIZE', 1000)),
+    'max_attempts': int(os.environ.get('DOCUMENT_JOB_MAX_ATTEMPTS', 3)),
+    'retry_seconds': float(os.environ.get('DOCUMENT_JOB_RETRY_SECONDS', 30)),
+    'sweep_seconds': float(os.environ.get('DOCUMENT_JOB_SWEEP_SECONDS', 60)),
+    'timeout_seconds': int(os.environ.get('DOCUMENT_JOB_TIMEOUT_SECONDS', 600))
+}
+
+THUMBNAIL_SIZE = (256, 256)
+
+# Leading bytes of the file types we accept for upload
+MAGIC_NUMBERS = [
+    (b'%PDF-', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'PK\x03\x04', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'application/msword')
+]
+
+# A page object in a PDF; "/Type /Pages" (the page tree) must not match
+PDF_PAGE_PATTERN = re.compile(rb'/Type\s{0,8}/Page(?![A-Za-z])')
+PDF_PAGE_OVERLAP = 32
+
+
+def sniff_mime_type(head):
+    """MIME type from the first bytes of a file"""
+    for magic, mime_type in MAGIC_NUMBERS:
+        if head.startswith(magic):
+            return mime_type
+    try:
+        head.decode('utf-8')
+        return 'text/plain'
+    except UnicodeDecodeError:
+        return 'application/octet-stream'
+
+
+def scan_file(path, chunk_size=64 * 1024):
+    """Read a file once, returning (sha256, mime_type, pdf_page_count)"""
+    digest = hashlib.sha256()
+    pages = 0
+    tail = b''
+    mime_type = None
+    with open(path, 'rb') as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if mime_type is None:
+                mime_type = sniff_mime_type(chunk[:512])
+            if not chunk:
+                break
+            digest.update(chunk)
+            if mime_type == 'application/pdf':
+                # Count matches that start before the carried-over tail; the
+                # tail is rescanned with the next chunk
+                buffer = tail + chunk
+                limit = len(buffer) - PDF_PAGE_OVERLAP
+                pages += sum(1 for match in PDF_PAGE_PATTERN.finditer(buffer) if match.start() < limit)
+                tail = buffer[max(limit, 0):]
+    if mime_type == 'application/pdf':
+        pages += len(PDF_PAGE_PATTERN.findall(tail))
+    elif mime_type and mime_type.startswith('image/'):
+        pages = 1
+    else:
+        pages = None
+    return digest.hexdigest(), mime_type, pages
+
+
+def make_thumbnail(path, dest):
+    """Write a JPEG thumbnail of an image to dest; returns dest, or None if unavailable"""
+    if Image is None:
+        return None
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    with Image.open(path) as image:
+        image.thumbnail(THUMBNAIL_SIZE)
+        image.convert('RGB').save(dest, 'JPEG', quality=80)
+    return dest
+
+
+class JobStats:
+    """Running totals across processed documents"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {'completed': 0, 'retried': 0, 'failed': 0, 'dropped': 0,
+                       'total_ms': 0.0, 'max_ms': 0.0}
+
+    def record(self, outcome, elapsed=None):
+        with self._lock:
+            self._stats[outcome] += 1
+            if elapsed is not None:
+                elapsed_ms = elapsed * 1000
+                self._stats['total_ms'] += elapsed_ms
+                self._stats['max_ms'] = max(self._stats['max_ms'], elapsed_ms)
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self._stats)
+        runs = stats['completed'] + stats['retried'] + stats['failed']
+        stats['avg_ms'] = stats['total_ms'] / runs if runs else 0.0
+        return stats
+
+
+class DocumentJobQueue:
+    """In-process queue of document ids processed by a fixed set of worker threads
+
+    Upload routes insert a Pending Document_Processing row in the same
+    transaction as the document and then call enqueue(), which never blocks.
+    Call start() when a worker process comes up (serve.py does so during
+    warm-up): the sweeper then runs at once and every sweep_seconds, so a
+    process that receives no uploads still picks up jobs. It re-queues
+    documents the queue missed (full queue, another process, a restart,
+    retries whose timer was lost, jobs stuck in Processing past the
+    timeout). Workers claim a job with a conditional UPDATE, so each
+    document is processed by one worker across processes.
+    """
+
+    def __init__(self, store, workers=2, queue_size=1000, max_attempts=3,
+                 retry_seconds=30, sweep_seconds=60, timeout_seconds=600):
+        self.store = store
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self.sweep_seconds = sweep_seconds
+        self.timeout_seconds = timeout_seconds
+        self.stats = JobStats()
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._queued = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stop = threading.Event()
+
+    def start(self):
+        """Start the worker and sweeper threads if they are not running"""
+        with self._lock:
+            if self._threads and all(thread.is_alive() for thread in self._threads):
+                return
+            # Threads do not survive fork, so a forked worker starts its own
+            self._stop.clear()
+            self._queued.clear()
+            self._queue = queue.Queue(maxsize=self._queue.maxsize)
+            self._threads = [threading.Thread(target=self._work, name=f'document-job-{index}',
+                                              daemon=True) for index in range(self.workers)]
+            self._threads.append(threading.Thread(target=self._sweep, name='document-job-sweep',
+                                                  daemon=True))
+            for thread in self._threads:
+                thread.start()
+
+    def stop(self):
+        """Stop the sweeper and let workers exit once idle"""
+        self._stop.set()
+
+    def enqueue(self, document_id):
+        """Queue a document for processing without blocking the caller"""
+        self.start()
+        with self._lock:
+            if document_id in self._queued:
+                return
+            try:
+                self._queue.put_nowait(document_id)
+            except queue.Full:
+                # Its Pending row stays in the database for the sweeper
+                self.stats.record('dropped')
+                return
+            self._queued.add(document_id)
+
+    def _sweep(self):
+        # First sweep right away, to recover jobs left over from before a restart
+        while True:
+            try:
+                rows = fetch_all('pending_document_jobs',
+                                 (self.retry_seconds, self.timeout_seconds, self._queue.maxsize))
+                with db_session() as db:
+                    for row in rows:
+                        db.execute('queue_document_job', (row['document_id'],))
+                    db.commit()
+            except Error as e:
+                print(f"Document job sweep error: {e}")
+            else:
+                for row in rows:
+                    self.enqueue(row['document_id'])
+            if self._stop.wait(self.sweep_seconds):
+                return
+
+    def _work(self):
+        while not self._stop.is_set():
+            try:
+                document_id = self._queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            with self._lock:
+                self._queued.discard(document_id)
+            try:
+                self.process(document_id)
+            except Exception as e:
+                print(f"Document job {document_id} error: {e}")
+
+    def _thumbnail_path(self, checksum):
+        return os.path.join(self.store.root, 'thumbnails', checksum[:2], checksum + '.jpg')
+
+    def process(self, document_id):
+        """Claim and run one job, recording its result or scheduling a retry"""
+        with db_session() as db:
+            claimed = db.execute('claim_document_job', (document_id, self.timeout_seconds)).rowcount
+            db.commit()
+            if not claimed:
+                return
+            document = db.fetch_one('document_for_processing', (document_id,))
+
+        started = time.perf_counter()
+        try:
+            checksum, mime_type, pages = scan_file(document['file_path'], self.store.chunk_size)
+            verified = checksum == document['checksum'] if document['checksum'] else None
+            thumbnail = None
+            if verified is not False and mime_type.startswith('image/'):
+                thumbnail = make_thumbnail(document['file_path'], self._thumbnail_path(checksum))
+        except Exception as e:
+            elapsed = time.perf_counter() - started
+            retry = document['attempts'] < self.max_attempts
+            with db_session() as db:
+                db.execute('fail_document_job', ('Retrying' if retry else 'Failed', str(e)[:500],
+                                                 int(elapsed * 1000), document_id))
+                db.commit()
+            self.stats.record('retried' if retry else 'failed', elapsed)
+            if retry:
+                timer = threading.Timer(self.retry_seconds * document['attempts'],
+                                        self.enqueue, (document_id,))
+                timer.daemon = True
+                timer.start()
+            return
+
+        elapsed = time.perf_counter() - started
+        with db_session() as db:
+            db.execute('complete_document_job', (verified, mime_type, pages, thumbnail,
+                                                 int(elapsed * 1000), document_id))
+            db.commit()
+        self.stats.record('completed', elapsed)
+
@@ -0,0 +1,112 @@
+"""
+ClaimEase Document Store
+Streaming, content-addressed file storage for uploaded claim documents
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+
+# Bytes read from the upload stream per write
+CHUNK_SIZE = int(os.environ.get('DOCUMENT_CHUNK_SIZE', 64 * 1024))
+
+# Download offload to a reverse proxy: '' (serve directly), 'x-accel' (nginx) or 'x-sendfile'
+DOWNLOAD_OFFLOAD = os.environ.get('DOCUMENT_DOWNLOAD_OFFLOAD', '').lower()
+# nginx internal location that maps onto the document store root
+ACCEL_REDIRECT_PREFIX = os.environ.get('DOCUMENT_ACCEL_PREFIX', '/protected-documents/')
+
+
+class StoredFile:
+    """Result of storing one upload"""
+
+    def __init__(self, path, checksum, size, deduplicated):
+        self.path = path
+        self.checksum = checksum
+        self.size = size
+        self.deduplicated = deduplicated
+
+
+class DocumentStore:
+    """Stores files under <root>/<aa>/<bb>/<sha256>
+
+    Uploads are streamed to a temporary file in the same filesystem while
+    their SHA-256 and size are computed, then atomically renamed into place.
+    If a file with the same content already exists the temporary copy is
+    dropped, so identical scans share one file on disk.
+    """
+
+    def __init__(self, root, chunk_size=64 * 1024):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def path_for(self, checksum):
+        return os.path.join(self.root, checksum[:2], checksum[2:4], checksum)
+
+    def relative_path(self, path):
+        """Path of a stored file relative to the store root, or None if outside it"""
+        relative = os.path.relpath(os.path.abspath(path), os.path.abspath(self.root))
+        if relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return relative.replace(os.sep, '/')
+
+    def _temp_dir(self):
+        temp_dir = os.path.join(self.root, 'tmp')
+        os.makedirs(temp_dir, exist_ok=True)
+        return temp_dir
+
+    def open_temp(self):
+        """Open a temporary file next to the store for staging an upload"""
+        fd, temp_path = tempfile.mkstemp(dir=self._temp_dir(), suffix='.part')
+        return os.fdopen(fd, 'wb'), temp_path
+
+    def commit_temp(self, temp_path, checksum, size):
+        """Move a fully written temporary file to its content address"""
+        path = self.path_for(checksum)
+        if os.path.exists(path):
+            os.remove(temp_path)
+            return StoredFile(path, checksum, size, deduplicated=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(temp_path, path)
+        return StoredFile(path, checksum, size, deduplicated=False)
+
+    def link_file(self, source_path, checksum, size):
+        """Place an already hashed file at its content address, keeping source_path
+
+        Uses a hard link so the bytes are not copied; falls back to copying
+        through a temporary file where links are not supported.
+        """
+        path = self.path_for(checksum)
+        if os.path.exists(path):
+            return StoredFile(path, checksum, size, deduplicated=True)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        try:
+            os.link(source_path, path)
+        except FileExistsError:
+            return StoredFile(path, checksum, size, deduplicated=True)
+        except OSError:
+            out, temp_path = self.open_temp()
+            with out, open(source_path, 'rb') as source:
+                shutil.copyfileobj(source, out, self.chunk_size)
+            return self.commit_temp(temp_path, checksum, size)
+        return StoredFile(path, checksum, size, deduplicated=False)
+
+    def store_stream(self, stream):
+        """Copy a readable binary stream into the store"""
+        digest = hashlib.sha256()
+        size = 0
+        out, temp_path = self.open_temp()
+        try:
+            with out:
+                while True:
+                    chunk = stream.read(self.chunk_size)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+            return self.commit_temp(temp_path, digest.hexdigest(), size)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
@@ -0,0 +1,72 @@
+"""
+ClaimEase Sparse Fieldsets
+?fields= parsing against per-resource column whitelists, rendered into SELECT lists
+"""
+
+from data_access import QUERIES
+
+# resource -> (field -> SQL expression, in output order; fields always returned)
+FIELDSETS = {
+    'hospital': ({field: field for field in [
+        'hospital_id', 'hospital_name', 'hospital_type', 'registration_number', 'address',
+        'city', 'state', 'pincode', 'contact_number', 'email', 'website', 'specializations',
+        'bed_capacity', 'accreditation', 'empaneled_insurers', 'latitude', 'longitude',
+        'is_active', 'created_at', 'updated_at'
+    ]}, ('hospital_id', 'hospital_name')),
+    'profile': (dict({field: f'u.{field}' for field in [
+        'user_id', 'first_name', 'last_name', 'email', 'phone', 'address', 'city', 'state',
+        'pincode', 'date_of_birth', 'gender', 'aadhar_number', 'pan_number', 'policy_id',
+        'policy_start_date', 'policy_end_date', 'nominee_name', 'nominee_relation',
+        'is_verified', 'created_at', 'updated_at'
+    ]}, policy_name='p.policy_name', coverage_amount='p.coverage_amount',
+        company_name='ic.company_name'), ('user_id',)),
+    'claim': (dict({field: f'c.{field}' for field in [
+        'claim_id', 'claim_number', 'user_id', 'hospital_id', 'policy_id', 'claim_type',
+        'treatment_type', 'admission_date', 'discharge_date', 'claim_date', 'claim_status',
+        'claim_amount', 'approved_amount', 'rejected_reason', 'settlement_date', 'diagnosis',
+        'treatment_details', 'doctor_name', 'room_type', 'is_emergency', 'created_at',
+        'updated_at'
+    ]}, hospital_name='h.hospital_name', hospital_phone='h.contact_number',
+        policy_name='p.policy_name', coverage_amount='p.coverage_amount',
+        company_name='ic.company_name', helpline='ic.helpline'),
+        # claim_includes stitches relations on these keys
+        ('claim_id', 'hospital_id', 'policy_id'))
+}
+
+
+class InvalidFieldsError(ValueError):
+    """Raised when ?fields= names a column outside the resource's whitelist"""
+
+
+def parse_fields(args, resource):
+    """Fields requested through ?fields=a,b in whitelist order, or None for all fields"""
+    value = args.get('fields')
+    if value is None:
+        return None
+    columns, required = FIELDSETS[resource]
+    requested = {name.strip().lower() for name in value.split(',') if name.strip()}
+    unknown = sorted(requested - columns.keys())
+    if unknown:
+        raise InvalidFieldsError(f"Unknown field: {', '.join(unknown)}. "
+                                 f"Allowed: {', '.join(columns)}")
+    requested.update(required)
+    # A canonical order means one SQL text (and prepared statement) per field set
+    return tuple(field for field in columns if field in requested)
+
+
+def select_list(resource, fields=None):
+    """Explicit SELECT column list for fields (every whitelisted field when None)"""
+    columns, _ = FIELDSETS[resource]
+    selected = []
+    for field in fields or columns:
+        expression = columns[field]
+        if expression == field or expression.endswith('.' + field):
+            selected.append(expression)
+        else:
+            selected.append(f'{expression} as {field}')
+    return ', '.join(selected)
+
+
+def fieldset_sql(name, resource, fields=None):
+    """Named query with its {columns} placeholder filled from fields"""
+    return QUERIES[name].format(columns=select_list(resource, fields))
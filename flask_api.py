@@ -3,43 +3,130 @@ ClaimEase Flask API Backend
 RESTful API for Health Insurance Claims Management System
 """
 
-from flask import Flask, request, jsonify, session
+from flask import Flask, Response, request, jsonify, send_file, session
 from flask_cors import CORS
-import mysql.connector
 from mysql.connector import Error
 import hashlib
+import hmac
+import os
+import re
 import jwt
 import datetime
 from functools import wraps
-import os
 from werkzeug.utils import secure_filename
+from data_access import (db_pool, db_session, fetch_all, fetch_one, query_stats, on_table_write,
+                         stream_sql, QUERIES)
+from cache import cache_key, reference_cache
+from auth_cache import decode_token, get_user_context, token_cache, user_context_cache
+from claim_includes import InvalidIncludeError, load_includes, parse_includes
+from claim_batch import MAX_BATCH_ITEMS, batch_stats, ingest_claims
+from claim_numbers import claim_number_allocator
+from compression import COMPRESSION_CONFIG, ResponseCompressor
+from dashboard_stats import dashboard_summary
+from document_jobs import JOB_CONFIG, DocumentJobQueue
+from document_store import ACCEL_REDIRECT_PREFIX, CHUNK_SIZE, DOWNLOAD_OFFLOAD, DocumentStore
+from fieldsets import InvalidFieldsError, fieldset_sql, parse_fields, select_list
+from hospital_search import hospital_index
+from hospital_geo import hospital_geo_index
+from json_output import FastJSONProvider
+from metrics import metrics, record_upload
+from network_index import network_index
+from request_batch import InvalidBatchError, parse_batch, run_batch
+from request_profiler import request_profiler
+from resumable_uploads import ResumableUploads, UploadError
+from slow_queries import slow_query_log
+from pagination import InvalidCursorError, add_next_cursor, get_cursor, get_page_size, split_page
 
 app = Flask(__name__)
 app.config['SECRET_KEY'] = 'your-secret-key-here'  # Change this in production
 app.config['UPLOAD_FOLDER'] = 'uploads/documents'
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
+app.config['USE_X_SENDFILE'] = DOWNLOAD_OFFLOAD == 'x-sendfile'
+
+# Shared secret for operator endpoints under /api/admin; they are disabled while it is unset
+ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN', '')
 
 CORS(app)
 
-# Database configuration
-DB_CONFIG = {
-    'host': 'localhost',
-    'user': 'root',
-    'password': 'mahalakshmi',  # Update with your actual MySQL password
-    'database': 'claimease'
-}
+# Row-aware JSON encoding and gzip/brotli for larger responses
+app.json = FastJSONProvider(app)
+ResponseCompressor(**COMPRESSION_CONFIG).init_app(app)
+
+# Per-route latency, DB and pool-wait timing, exported at /api/metrics
+metrics.init_app(app)
 
 # Allowed file extensions for document upload
 ALLOWED_EXTENSIONS = {'txt', 'pdf', 'png', 'jpg', 'jpeg', 'gif', 'doc', 'docx'}
 
-def get_db_connection():
-    """Get database connection"""
-    try:
-        connection = mysql.connector.connect(**DB_CONFIG)
-        return connection
-    except Error as e:
-        print(f"Database connection error: {e}")
-        return None
+# Content-addressed storage for uploaded documents
+document_store = DocumentStore(app.config['UPLOAD_FOLDER'], CHUNK_SIZE)
+
+# Checksum verification, MIME sniffing, page counts and thumbnails run off the request thread
+document_jobs = DocumentJobQueue(document_store, **JOB_CONFIG)
+# Started per worker process at warm-up (serve.py) or below in __main__
+app.extensions['document_jobs'] = document_jobs
+
+# Resumable upload sessions, staged next to the store so finalize can hard-link
+resumable_uploads = ResumableUploads(os.path.join(app.config['UPLOAD_FOLDER'], 'resumable'),
+                                     document_store, CHUNK_SIZE)
+
+@metrics.collector
+def collect_stats_metrics():
+    """Counters the pool, caches and query stats already keep, read at scrape time"""
+    for name, entry in query_stats.snapshot().items():
+        yield 'claimease_db_queries_total', {'query': name}, entry['calls']
+        yield 'claimease_db_query_errors_total', {'query': name}, entry['errors']
+        yield 'claimease_db_query_seconds_total', {'query': name}, entry['total_ms'] / 1000
+        yield 'claimease_db_query_rows_total', {'query': name}, entry['rows']
+    pool = db_pool.stats()
+    yield 'claimease_db_pool_connections', {'state': 'in_use'}, pool['in_use']
+    yield 'claimease_db_pool_connections', {'state': 'idle'}, pool['idle']
+    yield 'claimease_db_pool_timeouts_total', {}, pool['timeouts']
+    for name, cache in (('reference', reference_cache), ('tokens', token_cache),
+                        ('user_context', user_context_cache)):
+        stats = cache.stats()
+        yield 'claimease_cache_hits_total', {'cache': name}, stats['hits']
+        yield 'claimease_cache_misses_total', {'cache': name}, stats['misses']
+        yield 'claimease_cache_entries', {'cache': name}, stats['entries']
+    jobs = document_jobs.stats.snapshot()
+    for outcome in ('completed', 'retried', 'failed', 'dropped'):
+        yield 'claimease_document_jobs_total', {'outcome': outcome}, jobs[outcome]
+
+@on_table_write
+def invalidate_reference_cache(tables):
+    """Drop cached reference data read from tables that were just written"""
+    reference_cache.invalidate(*tables)
+
+@on_table_write
+def refresh_hospital_index(tables):
+    """Re-index changed hospitals before the next search"""
+    if 'Hospitals' in tables:
+        hospital_index.mark_dirty()
+
+@on_table_write
+def refresh_hospital_geo_index(tables):
+    """Reload hospital coordinates and empanelment before the next nearby query"""
+    if 'Hospitals' in tables:
+        hospital_geo_index.mark_dirty()
+
+@on_table_write
+def refresh_network_index(tables):
+    """Reload the cashless network index before the next lookup"""
+    if tables & {'Hospitals', 'Insurance_Companies', 'Hospital_Insurance_Empanelment'}:
+        network_index.mark_dirty()
+
+@on_table_write
+def refresh_dashboard_counters(tables):
+    """Recount the dashboard totals kept from the written tables on the next read"""
+    dashboard_summary.mark_stale(tables)
+
+def network_mode():
+    """Empanelment mode requested through ?cashless= / ?reimbursement="""
+    if request.args.get('cashless', '').lower() in ('1', 'true', 'yes'):
+        return 'cashless'
+    if request.args.get('reimbursement', '').lower() in ('1', 'true', 'yes'):
+        return 'reimbursement'
+    return 'any'
 
 def token_required(f):
     """Decorator for routes that require authentication"""
@@ -52,7 +139,8 @@ def token_required(f):
         try:
             if token.startswith('Bearer '):
                 token = token[7:]
-            data = jwt.decode(token, app.config['SECRET_KEY'], algorithms=['HS256'])
+            data = decode_token(
+                token, lambda t: jwt.decode(t, app.config['SECRET_KEY'], algorithms=['HS256']))
             current_user_id = data['user_id']
         except:
             return jsonify({'message': 'Token is invalid'}), 401
@@ -60,10 +148,51 @@ def token_required(f):
         return f(current_user_id, *args, **kwargs)
     return decorated
 
+def admin_authorized():
+    """Check whether the request carries the admin token in X-Admin-Token"""
+    token = request.headers.get('X-Admin-Token', '')
+    return bool(ADMIN_API_TOKEN) and hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode())
+
+def admin_required(f):
+    """Decorator for operator endpoints, authorized by the X-Admin-Token header"""
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if not ADMIN_API_TOKEN:
+            return jsonify({'message': 'Admin endpoints are disabled'}), 403
+        if not admin_authorized():
+            return jsonify({'message': 'Admin token is missing or invalid'}), 401
+        return f(*args, **kwargs)
+    return decorated
+
+# Per-request profiles on X-Profile: 1 (admin) or 1-in-N sampling; no hooks unless PROFILING_ENABLED
+request_profiler.init_app(app, authorize=admin_authorized)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def wants_stream():
+    """Check whether the client asked for a streamed (unpaginated) response"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+def stream_json(stream):
+    """Stream a RowStream as a JSON array, one chunk per fetchmany() batch"""
+    dumps = app.json.dumps
+    
+    def generate():
+        yield '['
+        first = True
+        for rows in stream:
+            # Encode the whole batch in one call and drop its brackets
+            chunk = dumps(rows)[1:-1]
+            yield chunk if first else ',' + chunk
+            first = False
+        yield ']'
+    
+    response = Response(generate(), mimetype='application/json')
+    response.call_on_close(stream.close)
+    return response
+
 # Authentication Routes
 @app.route('/api/auth/register', methods=['POST'])
 def register():
@@ -80,42 +209,26 @@ def register():
         # Hash password
         password_hash = hashlib.sha256(data['password'].encode()).hexdigest()
         
-        connection = get_db_connection()
-        if not connection:
-            return jsonify({'error': 'Database connection failed'}), 500
-        
-        cursor = connection.cursor()
-        
-        # Check if user already exists
-        cursor.execute("SELECT user_id FROM Users WHERE email = %s", (data['email'],))
-        if cursor.fetchone():
-            return jsonify({'error': 'User already exists'}), 409
-        
-        # Insert new user
-        insert_query = """
-        INSERT INTO Users (first_name, last_name, email, phone, address, city, state, 
-                          pincode, date_of_birth, gender, password_hash) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
-        
-        user_data = (
-            data['first_name'], data['last_name'], data['email'], data['phone'],
-            data.get('address', ''), data.get('city', ''), data.get('state', ''),
-            data.get('pincode', ''), data['date_of_birth'], data.get('gender', ''),
-            password_hash
-        )
-        
-        cursor.execute(insert_query, user_data)
-        connection.commit()
+        with db_session() as db:
+            # Check if user already exists
+            if db.fetch_one('user_by_email', (data['email'],)):
+                return jsonify({'error': 'User already exists'}), 409
+            
+            # Insert new user
+            user_data = (
+                data['first_name'], data['last_name'], data['email'], data['phone'],
+                data.get('address', ''), data.get('city', ''), data.get('state', ''),
+                data.get('pincode', ''), data['date_of_birth'], data.get('gender', ''),
+                password_hash
+            )
+            
+            db.execute('insert_user', user_data)
+            db.commit()
         
         return jsonify({'message': 'User registered successfully'}), 201
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/auth/login', methods=['POST'])
 def login():
@@ -130,16 +243,7 @@ def login():
         
         password_hash = hashlib.sha256(password.encode()).hexdigest()
         
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT user_id, first_name, last_name, email, policy_id 
-            FROM Users 
-            WHERE email = %s AND password_hash = %s
-        """, (email, password_hash))
-        
-        user = cursor.fetchone()
+        user = fetch_one('user_login', (email, password_hash))
         
         if user:
             # Generate JWT token
@@ -157,58 +261,44 @@ def login():
             
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # User Routes
 @app.route('/api/user/profile', methods=['GET'])
 @token_required
 def get_user_profile(current_user_id):
-    """Get user profile"""
+    """Get user profile; ?fields= limits the columns returned"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT u.*, p.policy_name, p.coverage_amount, ic.company_name
-            FROM Users u
-            LEFT JOIN Policies p ON u.policy_id = p.policy_id
-            LEFT JOIN Insurance_Companies ic ON p.company_id = ic.company_id
-            WHERE u.user_id = %s
-        """, (current_user_id,))
-        
-        user = cursor.fetchone()
-        
-        if user:
-            # Remove sensitive data
-            user.pop('password_hash', None)
-            return jsonify(user), 200
+        fields = parse_fields(request.args, 'profile')
+        with db_session() as db:
+            # password_hash is not in the profile whitelist, so it is never selected
+            users = db.fetch_all_sql('user_profile', fieldset_sql('user_profile', 'profile', fields),
+                                     (current_user_id,))
+        
+        if users:
+            return jsonify(users[0]), 200
         else:
             return jsonify({'error': 'User not found'}), 404
             
+    except InvalidFieldsError as e:
+        return jsonify({'error': str(e)}), 400
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # Hospital Routes
 @app.route('/api/hospitals', methods=['GET'])
 def get_hospitals():
-    """Get list of hospitals"""
+    """Get list of hospitals; ?fields= limits the columns returned"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
         # Get query parameters
         city = request.args.get('city')
         state = request.args.get('state')
         hospital_type = request.args.get('type')
+        streaming = wants_stream()
+        page_size = get_page_size(request.args)
+        after = None if streaming else get_cursor(request.args, 2)
+        fields = parse_fields(request.args, 'hospital')
         
-        query = "SELECT * FROM Hospitals WHERE is_active = TRUE"
+        query = f"SELECT {select_list('hospital', fields)} FROM Hospitals WHERE is_active = TRUE"
         params = []
         
         if city:
@@ -223,70 +313,158 @@ def get_hospitals():
             query += " AND hospital_type = %s"
             params.append(hospital_type)
         
-        query += " ORDER BY hospital_name"
+        # Full export: stream every matching row without paging or caching
+        if streaming:
+            query += " ORDER BY hospital_name, hospital_id"
+            return stream_json(stream_sql('hospitals_stream', query, params))
+        
+        # Keyset pagination on (hospital_name, hospital_id)
+        if after:
+            query += " AND (hospital_name > %s OR (hospital_name = %s AND hospital_id > %s))"
+            params.extend([after[0], after[0], after[1]])
+        
+        query += " ORDER BY hospital_name, hospital_id LIMIT %s"
+        params.append(page_size + 1)
         
-        cursor.execute(query, params)
-        hospitals = cursor.fetchall()
+        def load_hospitals():
+            with db_session() as db:
+                rows = db.fetch_all_sql('hospitals', query, params)
+            return split_page(rows, page_size, ('hospital_name', 'hospital_id'))
         
+        hospitals, next_cursor = reference_cache.get_or_load(
+            cache_key('hospitals', request.args, ('city', 'state', 'type'),
+                      extra=(page_size, tuple(after or ()), fields)),
+            load_hospitals, tables=('Hospitals',))
+        
+        return add_next_cursor(jsonify(hospitals), next_cursor, request), 200
+        
+    except (InvalidCursorError, InvalidFieldsError) as e:
+        return jsonify({'error': str(e)}), 400
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hospitals/search', methods=['GET'])
+def search_hospitals():
+    """Autocomplete hospitals by name, city or state"""
+    try:
+        query = request.args.get('q', '').strip()
+        if not query:
+            return jsonify({'error': 'q is required'}), 400
+        
+        try:
+            limit = min(max(int(request.args.get('limit', 10)), 1), 50)
+        except ValueError:
+            return jsonify({'error': 'limit must be an integer'}), 400
+        
+        return jsonify(hospital_index.search(query, limit)), 200
+        
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hospitals/nearby', methods=['GET'])
+def get_nearby_hospitals():
+    """Get hospitals near a location, nearest first"""
+    try:
+        try:
+            lat = float(request.args['lat'])
+            lng = float(request.args['lng'])
+            radius = float(request.args.get('radius', 10))
+            limit = int(request.args.get('limit', 20))
+            company_id = request.args.get('company_id')
+            company_id = int(company_id) if company_id else None
+        except KeyError:
+            return jsonify({'error': 'lat and lng are required'}), 400
+        except ValueError:
+            return jsonify({'error': 'lat, lng, radius, limit and company_id must be numeric'}), 400
+        
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            return jsonify({'error': 'lat/lng out of range'}), 400
+        
+        # radius in km, capped to keep the number of scanned grid cells bounded
+        radius = min(max(radius, 0.1), 200)
+        limit = min(max(limit, 1), 100)
+        
+        hospitals = hospital_geo_index.nearby(lat, lng, radius, limit,
+                                              hospital_type=request.args.get('type'),
+                                              company_id=company_id, mode=network_mode())
         return jsonify(hospitals), 200
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/hospitals/<int:hospital_id>', methods=['GET'])
 def get_hospital_details(hospital_id):
-    """Get hospital details"""
+    """Get hospital details; ?fields= limits the columns returned"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM Hospitals WHERE hospital_id = %s", (hospital_id,))
-        hospital = cursor.fetchone()
-        
-        if hospital:
-            return jsonify(hospital), 200
+        fields = parse_fields(request.args, 'hospital')
+        with db_session() as db:
+            hospitals = db.fetch_all_sql('hospital_details',
+                                         fieldset_sql('hospital_details', 'hospital', fields),
+                                         (hospital_id,))
+        
+        if hospitals:
+            return jsonify(hospitals[0]), 200
         else:
             return jsonify({'error': 'Hospital not found'}), 404
             
+    except InvalidFieldsError as e:
+        return jsonify({'error': str(e)}), 400
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/hospitals/<int:hospital_id>/insurers', methods=['GET'])
+def get_hospital_insurers(hospital_id):
+    """Get insurers accepted at a hospital (?cashless=true for cashless only)"""
+    try:
+        if not network_index.has_hospital(hospital_id):
+            return jsonify({'error': 'Hospital not found'}), 404
+        
+        return jsonify(network_index.hospital_insurers(hospital_id, network_mode())), 200
+        
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/network/check', methods=['GET'])
+def check_network():
+    """Check whether a hospital is in an insurer's network"""
+    try:
+        try:
+            hospital_id = int(request.args['hospital_id'])
+            company_id = int(request.args['company_id'])
+        except (KeyError, ValueError):
+            return jsonify({'error': 'hospital_id and company_id are required integers'}), 400
+        
+        return jsonify(network_index.check(hospital_id, company_id)), 200
+        
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # Claims Routes
 @app.route('/api/claims', methods=['GET'])
 @token_required
 def get_user_claims(current_user_id):
-    """Get user's claims"""
+    """Get user's claims; ?include=documents,hospital,policy adds related rows"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT c.*, h.hospital_name, p.policy_name, ic.company_name
-            FROM Claims c
-            JOIN Hospitals h ON c.hospital_id = h.hospital_id
-            JOIN Policies p ON c.policy_id = p.policy_id
-            JOIN Insurance_Companies ic ON p.company_id = ic.company_id
-            WHERE c.user_id = %s
-            ORDER BY c.claim_date DESC
-        """, (current_user_id,))
-        
-        claims = cursor.fetchall()
-        return jsonify(claims), 200
+        page_size = get_page_size(request.args)
+        after = get_cursor(request.args, 2)
+        includes = parse_includes(request.args)
+        
+        with db_session() as db:
+            # Keyset pagination on (claim_date, claim_id), newest first
+            if after:
+                rows = db.fetch_all('user_claims_after',
+                                    (current_user_id, after[0], after[0], after[1], page_size + 1))
+            else:
+                rows = db.fetch_all('user_claims', (current_user_id, page_size + 1))
+            
+            claims, next_cursor = split_page(rows, page_size, ('claim_date', 'claim_id'))
+            load_includes(db, claims, includes)
+        return add_next_cursor(jsonify(claims), next_cursor, request), 200
         
+    except (InvalidCursorError, InvalidIncludeError) as e:
+        return jsonify({'error': str(e)}), 400
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/claims', methods=['POST'])
 @token_required
@@ -301,116 +479,127 @@ def create_claim(current_user_id):
             if field not in data:
                 return jsonify({'error': f'{field} is required'}), 400
         
-        connection = get_db_connection()
-        cursor = connection.cursor()
-        
-        # Get user's policy
-        cursor.execute("SELECT policy_id FROM Users WHERE user_id = %s", (current_user_id,))
-        user_policy = cursor.fetchone()
+        # Get user's policy (cached per user)
+        user_context = get_user_context(current_user_id)
         
-        if not user_policy or not user_policy[0]:
+        if not user_context or not user_context['policy_id']:
             return jsonify({'error': 'User does not have an active policy'}), 400
         
-        # Generate claim number
-        claim_number = f"CLM{datetime.datetime.now().strftime('%Y%m%d%H%M%S')}"
+        # Generate claim number (unique across workers, no round-trip per claim)
+        claim_number = claim_number_allocator.next_claim_number()
+        
+        with db_session() as db:
+            # Insert claim
+            claim_data = (
+                claim_number, current_user_id, data['hospital_id'], user_context['policy_id'],
+                data['claim_type'], data['treatment_type'], data.get('admission_date'),
+                data.get('discharge_date'), data['claim_amount'], data['diagnosis'],
+                data.get('treatment_details', ''), data.get('doctor_name', ''),
+                data.get('room_type', ''), data.get('is_emergency', False)
+            )
+            
+            db.execute('insert_claim', claim_data)
+            db.commit()
         
-        # Insert claim
-        insert_query = """
-        INSERT INTO Claims (claim_number, user_id, hospital_id, policy_id, claim_type, 
-                          treatment_type, admission_date, discharge_date, claim_amount, 
-                          diagnosis, treatment_details, doctor_name, room_type, is_emergency) 
-        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-        """
+        dashboard_summary.record_claim_status(None, 'Pending')
+        
+        return jsonify({'message': 'Claim created successfully', 'claim_number': claim_number}), 201
+        
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/claims/batch', methods=['POST'])
+@token_required
+def create_claims_batch(current_user_id):
+    """Create many claims in one request (?atomic=true for all-or-nothing)"""
+    try:
+        data = request.get_json()
+        items = data.get('claims') if isinstance(data, dict) else data
         
-        claim_data = (
-            claim_number, current_user_id, data['hospital_id'], user_policy[0],
-            data['claim_type'], data['treatment_type'], data.get('admission_date'),
-            data.get('discharge_date'), data['claim_amount'], data['diagnosis'],
-            data.get('treatment_details', ''), data.get('doctor_name', ''),
-            data.get('room_type', ''), data.get('is_emergency', False)
-        )
+        if not isinstance(items, list) or not items:
+            return jsonify({'error': 'claims must be a non-empty list'}), 400
         
-        cursor.execute(insert_query, claim_data)
-        connection.commit()
+        if len(items) > MAX_BATCH_ITEMS:
+            return jsonify({'error': f'At most {MAX_BATCH_ITEMS} claims per batch'}), 413
         
-        return jsonify({'message': 'Claim created successfully', 'claim_number': claim_number}), 201
+        atomic = request.args.get('atomic', '').lower() in ('1', 'true', 'yes')
+        results, summary = ingest_claims(items, current_user_id, atomic=atomic)
+        
+        if summary['inserted']:
+            dashboard_summary.record_claim_status(None, 'Pending', summary['inserted'])
+        
+        if summary['inserted'] == summary['received']:
+            status = 201
+        elif summary['inserted']:
+            status = 207
+        else:
+            status = 400
+        return jsonify({'summary': summary, 'results': results}), status
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/claims/<int:claim_id>', methods=['GET'])
 @token_required
 def get_claim_details(current_user_id, claim_id):
-    """Get claim details"""
+    """Get claim details; documents are included unless ?include= says otherwise,
+    ?fields= limits the claim columns returned"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT c.*, h.hospital_name, h.contact_number as hospital_phone,
-                   p.policy_name, p.coverage_amount, ic.company_name, ic.helpline
-            FROM Claims c
-            JOIN Hospitals h ON c.hospital_id = h.hospital_id
-            JOIN Policies p ON c.policy_id = p.policy_id
-            JOIN Insurance_Companies ic ON p.company_id = ic.company_id
-            WHERE c.claim_id = %s AND c.user_id = %s
-        """, (claim_id, current_user_id))
-        
-        claim = cursor.fetchone()
-        
-        if claim:
-            # Get claim documents
-            cursor.execute("""
-                SELECT document_id, document_name, document_type, upload_date, is_verified
-                FROM Documents 
-                WHERE claim_id = %s
-            """, (claim_id,))
+        includes = parse_includes(request.args, default=('documents',))
+        fields = parse_fields(request.args, 'claim')
+        with db_session() as db:
+            claims = db.fetch_all_sql('claim_details', fieldset_sql('claim_details', 'claim', fields),
+                                      (claim_id, current_user_id))
             
-            documents = cursor.fetchall()
-            claim['documents'] = documents
-            
-            return jsonify(claim), 200
+            if claims:
+                load_includes(db, claims, includes)
+        
+        if claims:
+            return jsonify(claims[0]), 200
         else:
             return jsonify({'error': 'Claim not found'}), 404
             
+    except (InvalidIncludeError, InvalidFieldsError) as e:
+        return jsonify({'error': str(e)}), 400
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # Insurance Routes
 @app.route('/api/insurance-companies', methods=['GET'])
 def get_insurance_companies():
     """Get list of insurance companies"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("SELECT * FROM Insurance_Companies ORDER BY company_name")
-        companies = cursor.fetchall()
+        companies = reference_cache.get_or_load(
+            cache_key('insurance_companies', request.args, ()),
+            lambda: fetch_all('insurance_companies'), tables=('Insurance_Companies',))
         
         return jsonify(companies), 200
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+@app.route('/api/insurance-companies/<int:company_id>/hospitals', methods=['GET'])
+def get_company_hospitals(company_id):
+    """Get hospitals empanelled with an insurer (?cashless=true for cashless only)"""
+    try:
+        if not network_index.has_company(company_id):
+            return jsonify({'error': 'Insurance company not found'}), 404
+        
+        hospitals = network_index.company_hospitals(
+            company_id, network_mode(),
+            city=request.args.get('city'),
+            state=request.args.get('state'),
+            hospital_type=request.args.get('type'))
+        hospitals.sort(key=lambda hospital: (hospital['hospital_name'], hospital['hospital_id']))
+        return jsonify(hospitals), 200
+        
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
 
 @app.route('/api/policies', methods=['GET'])
 def get_policies():
     """Get list of policies"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
         company_id = request.args.get('company_id')
         
         query = """
@@ -427,96 +616,115 @@ def get_policies():
         
         query += " ORDER BY p.policy_name"
         
-        cursor.execute(query, params)
-        policies = cursor.fetchall()
+        def load_policies():
+            with db_session() as db:
+                return db.fetch_all_sql('policies', query, params)
+        
+        policies = reference_cache.get_or_load(
+            cache_key('policies', request.args, ('company_id',)),
+            load_policies, tables=('Policies', 'Insurance_Companies'))
         
         return jsonify(policies), 200
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 # Statistics Routes
 @app.route('/api/stats/dashboard', methods=['GET'])
 def get_dashboard_stats():
     """Get dashboard statistics"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        stats = {}
-        
-        # Total hospitals
-        cursor.execute("SELECT COUNT(*) as total FROM Hospitals WHERE is_active = TRUE")
-        stats['total_hospitals'] = cursor.fetchone()['total']
-        
-        # Total insurance companies
-        cursor.execute("SELECT COUNT(*) as total FROM Insurance_Companies")
-        stats['total_insurance_companies'] = cursor.fetchone()['total']
-        
-        # Total policies
-        cursor.execute("SELECT COUNT(*) as total FROM Policies WHERE is_active = TRUE")
-        stats['total_policies'] = cursor.fetchone()['total']
-        
-        # Total users
-        cursor.execute("SELECT COUNT(*) as total FROM Users WHERE is_verified = TRUE")
-        stats['total_users'] = cursor.fetchone()['total']
-        
-        # Claims by status
-        cursor.execute("""
-            SELECT claim_status, COUNT(*) as count 
-            FROM Claims 
-            GROUP BY claim_status
-        """)
-        stats['claims_by_status'] = cursor.fetchall()
-        
-        # Hospital statistics by state
-        cursor.execute("""
-            SELECT state_name, public_hospitals_count, private_hospitals_count,
-                   (public_hospitals_count + private_hospitals_count) as total_hospitals
-            FROM Hospital_States 
-            ORDER BY total_hospitals DESC 
-            LIMIT 10
-        """)
-        stats['top_states_by_hospitals'] = cursor.fetchall()
-        
+        # Served from the maintained summary; stats_as_of gives its freshness
+        stats = dashboard_summary.snapshot()
         return jsonify(stats), 200
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
 
 @app.route('/api/stats/hospital-states', methods=['GET'])
 def get_hospital_states():
     """Get hospital statistics by state"""
     try:
-        connection = get_db_connection()
-        cursor = connection.cursor(dictionary=True)
-        
-        cursor.execute("""
-            SELECT state_name, public_hospitals_count, private_hospitals_count,
-                   public_hospitals_amount, private_hospitals_amount,
-                   (public_hospitals_count + private_hospitals_count) as total_hospitals,
-                   (public_hospitals_amount + private_hospitals_amount) as total_amount
-            FROM Hospital_States 
-            ORDER BY total_hospitals DESC
-        """)
-        
-        states = cursor.fetchall()
+        if wants_stream():
+            return stream_json(stream_sql('hospital_states_stream', QUERIES['hospital_states']))
+        
+        states = reference_cache.get_or_load(
+            cache_key('hospital_states', request.args, ()),
+            lambda: fetch_all('hospital_states'), tables=('Hospital_States',))
         return jsonify(states), 200
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+@app.route('/api/stats/pool', methods=['GET'])
+def get_pool_stats():
+    """Get database connection pool statistics"""
+    return jsonify(db_pool.stats()), 200
+
+@app.route('/api/stats/queries', methods=['GET'])
+def get_query_stats():
+    """Get per-query timing and row counts"""
+    return jsonify(query_stats.snapshot()), 200
+
+@app.route('/api/stats/claims-batch', methods=['GET'])
+def get_claims_batch_stats():
+    """Get bulk claim ingestion latency and row-rate totals"""
+    return jsonify(batch_stats.snapshot()), 200
+
+@app.route('/api/stats/document-jobs', methods=['GET'])
+def get_document_job_stats():
+    """Background document processing statistics"""
+    return jsonify(document_jobs.stats.snapshot()), 200
+
+@app.route('/api/stats/cache', methods=['GET'])
+def get_cache_stats():
+    """Get cache hit/miss counters (reference data at the top level)"""
+    stats = reference_cache.stats()
+    stats['tokens'] = token_cache.stats()
+    stats['user_context'] = user_context_cache.stats()
+    return jsonify(stats), 200
+
+@app.route('/api/admin/slow-queries', methods=['GET'])
+@admin_required
+def get_slow_queries():
+    """Slowest and most recent queries over the slow query threshold (this worker)"""
+    return jsonify(slow_query_log.snapshot()), 200
+
+@app.route('/api/admin/slow-queries', methods=['DELETE'])
+@admin_required
+def reset_slow_queries():
+    """Clear the slow query log, e.g. after a deploy"""
+    slow_query_log.reset()
+    return jsonify({'message': 'Slow query log cleared'}), 200
+
+@app.route('/api/admin/profiles', methods=['GET'])
+@admin_required
+def list_profiles():
+    """Newest request profiles across workers, with their hottest functions"""
+    try:
+        limit = min(max(int(request.args.get('limit', 50)), 1), request_profiler.max_files)
+    except ValueError:
+        return jsonify({'error': 'limit must be an integer'}), 400
+    return jsonify({
+        'enabled': request_profiler.enabled,
+        'sample_every': request_profiler.sample_every,
+        'profiles': request_profiler.recent(limit)
+    }), 200
+
+@app.route('/api/admin/profiles/<name>', methods=['GET'])
+@admin_required
+def download_profile(name):
+    """Download a .prof file for pstats, snakeviz or flameprof"""
+    path = request_profiler.profile_path(name)
+    if path is None:
+        return jsonify({'error': 'Profile not found'}), 404
+    return send_file(path, mimetype='application/octet-stream', as_attachment=True,
+                     download_name=name)
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """Prometheus metrics for every worker process"""
+    return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
 
 # File upload route (placeholder)
 @app.route('/api/documents/upload', methods=['POST'])
@@ -540,36 +748,200 @@ def upload_document(current_user_id):
         if file and allowed_file(file.filename):
             filename = secure_filename(file.filename)
             # In production, save to cloud storage (AWS S3, etc.)
-            file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            
-            # Create upload directory if it doesn't exist
-            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
-            
-            file.save(file_path)
+            # Streamed in chunks and stored by SHA-256, so identical files share one copy
+            stored = document_store.store_stream(file.stream)
+            record_upload('multipart', stored.size)
             
             # Save document info to database
-            connection = get_db_connection()
-            cursor = connection.cursor()
-            
-            cursor.execute("""
-                INSERT INTO Documents (claim_id, document_name, document_type, 
-                                     file_path, file_size, mime_type, uploaded_by) 
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (claim_id, filename, document_type, file_path, 
-                  os.path.getsize(file_path), file.mimetype, current_user_id))
-            
-            connection.commit()
+            with db_session() as db:
+                cursor = db.execute('insert_document', (claim_id, filename, document_type,
+                                                        stored.path, stored.size, file.mimetype,
+                                                        stored.checksum, current_user_id))
+                document_id = cursor.lastrowid
+                db.execute('queue_document_job', (document_id,))
+                db.commit()
+            document_jobs.enqueue(document_id)
             
-            return jsonify({'message': 'Document uploaded successfully'}), 201
+            return jsonify({
+                'message': 'Document uploaded successfully',
+                'document_id': document_id,
+                'checksum': stored.checksum,
+                'file_size': stored.size,
+                'deduplicated': stored.deduplicated
+            }), 201
         
         return jsonify({'error': 'Invalid file type'}), 400
         
     except Error as e:
         return jsonify({'error': str(e)}), 500
-    finally:
-        if connection and connection.is_connected():
-            cursor.close()
-            connection.close()
+
+def upload_error(e):
+    """JSON response for an UploadError, including the offset to resume from"""
+    body = {'error': e.message}
+    if e.offset is not None:
+        body['offset'] = e.offset
+    return jsonify(body), e.status
+
+def chunk_offset():
+    """Offset of a PUT chunk from Content-Range (bytes start-end/total) or ?offset="""
+    content_range = request.headers.get('Content-Range')
+    if content_range:
+        match = re.match(r'bytes (\d+)-\d+/(\d+|\*)$', content_range.strip())
+        if not match:
+            raise UploadError('Invalid Content-Range header')
+        return int(match.group(1))
+    try:
+        return int(request.args.get('offset', 0))
+    except ValueError:
+        raise UploadError('offset must be an integer')
+
+@app.route('/api/documents/uploads', methods=['POST'])
+@token_required
+def initiate_upload(current_user_id):
+    """Start a resumable upload; chunks are then PUT at increasing offsets"""
+    try:
+        data = request.get_json() or {}
+        claim_id = data.get('claim_id')
+        document_type = data.get('document_type')
+        filename = secure_filename(data.get('filename') or '')
+
+        if not claim_id or not document_type or not data.get('total_size'):
+            return jsonify({'error': 'claim_id, document_type and total_size are required'}), 400
+        if not filename or not allowed_file(filename):
+            return jsonify({'error': 'Invalid file type'}), 400
+        try:
+            total_size = int(data['total_size'])
+        except (TypeError, ValueError):
+            return jsonify({'error': 'total_size must be an integer'}), 400
+
+        if not fetch_one('user_claim_exists', (claim_id, current_user_id)):
+            return jsonify({'error': 'Claim not found'}), 404
+
+        progress = resumable_uploads.initiate(current_user_id, claim_id, document_type, filename,
+                                              total_size, data.get('mime_type'))
+        progress['max_chunk_size'] = app.config['MAX_CONTENT_LENGTH']
+        return jsonify(progress), 201
+
+    except UploadError as e:
+        return upload_error(e)
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/documents/uploads/<upload_id>', methods=['GET'])
+@token_required
+def get_upload_progress(current_user_id, upload_id):
+    """Bytes received so far; the client resumes from 'offset'"""
+    try:
+        return jsonify(resumable_uploads.progress(upload_id, current_user_id)), 200
+    except UploadError as e:
+        return upload_error(e)
+
+@app.route('/api/documents/uploads/<upload_id>', methods=['PUT'])
+@token_required
+def upload_chunk(current_user_id, upload_id):
+    """Write the request body at the given offset, streamed to disk"""
+    try:
+        offset = chunk_offset()
+        progress = resumable_uploads.write_chunk(upload_id, current_user_id, offset,
+                                                 request.stream, request.content_length)
+        record_upload('resumable', progress['offset'] - offset)
+        return jsonify(progress), 200
+    except UploadError as e:
+        return upload_error(e)
+
+@app.route('/api/documents/uploads/<upload_id>/finalize', methods=['POST'])
+@token_required
+def finalize_upload(current_user_id, upload_id):
+    """Store a completed upload and create its Documents row"""
+    def create_document(upload, stored):
+        with db_session() as db:
+            cursor = db.execute('insert_document', (
+                upload['claim_id'], upload['filename'], upload['document_type'], stored.path,
+                stored.size, upload['mime_type'], stored.checksum, current_user_id))
+            db.execute('queue_document_job', (cursor.lastrowid,))
+            db.commit()
+        document_jobs.enqueue(cursor.lastrowid)
+        return {
+            'message': 'Document uploaded successfully',
+            'document_id': cursor.lastrowid,
+            'checksum': stored.checksum,
+            'file_size': stored.size,
+            'deduplicated': stored.deduplicated
+        }
+
+    try:
+        return jsonify(resumable_uploads.finalize(upload_id, current_user_id, create_document)), 201
+    except UploadError as e:
+        return upload_error(e)
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/documents/<int:document_id>', methods=['GET'])
+@token_required
+def download_document(current_user_id, document_id):
+    """Download a document of one of the user's claims
+
+    Supports Range and If-None-Match (the ETag is the content checksum). The
+    file body is sent through the server's file wrapper, or handed to the
+    reverse proxy with X-Accel-Redirect / X-Sendfile when offload is enabled.
+    """
+    try:
+        document = fetch_one('user_document', (document_id, current_user_id))
+        if not document:
+            return jsonify({'error': 'Document not found'}), 404
+
+        path = os.path.abspath(document['file_path'] or '')
+        if not os.path.isfile(path):
+            return jsonify({'error': 'Document file not found'}), 404
+
+        as_attachment = request.args.get('download', '').lower() in ('1', 'true', 'yes')
+        mimetype = document['mime_type'] or None
+        accel_path = document_store.relative_path(path) if DOWNLOAD_OFFLOAD == 'x-accel' else None
+
+        if accel_path:
+            # nginx serves the bytes (and Range) from an internal location
+            response = Response(mimetype=mimetype or 'application/octet-stream')
+            response.headers['X-Accel-Redirect'] = ACCEL_REDIRECT_PREFIX.rstrip('/') + '/' + accel_path
+            response.headers.set('Content-Disposition', 'attachment' if as_attachment else 'inline',
+                                 filename=document['document_name'])
+            if document['checksum']:
+                response.set_etag(document['checksum'])
+            response.make_conditional(request)
+        else:
+            response = send_file(path, mimetype=mimetype, as_attachment=as_attachment,
+                                 download_name=document['document_name'],
+                                 etag=document['checksum'] or True)
+        response.cache_control.private = True
+        return response
+
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/documents/<int:document_id>/status', methods=['GET'])
+@token_required
+def get_document_status(current_user_id, document_id):
+    """Post-processing status of a document"""
+    try:
+        status = fetch_one('document_status', (document_id, current_user_id))
+        if not status:
+            return jsonify({'error': 'Document not found'}), 404
+        return jsonify(status), 200
+    except Error as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/batch', methods=['POST'])
+def batch_requests():
+    """Run several GET routes in one round-trip
+
+    Body: {"requests": [{"id": "stats", "path": "/api/stats/dashboard"}, ...]}.
+    Sub-requests carry this request's Authorization header, run concurrently
+    and share one pooled connection; each result has its own status.
+    """
+    try:
+        items = parse_batch(request.get_json(silent=True))
+        return jsonify({'responses': run_batch(app, items, request)}), 200
+    except InvalidBatchError as e:
+        return jsonify({'error': str(e)}), 400
 
 # Error handlers
 @app.errorhandler(404)
@@ -587,13 +959,41 @@ if __name__ == '__main__':
     print("   POST /api/auth/login - User login")
     print("   GET  /api/user/profile - Get user profile")
     print("   GET  /api/hospitals - Get hospitals list")
-    print("   GET  /api/claims - Get user claims")
+    print("   GET  /api/hospitals/search - Autocomplete hospitals by name, city or state")
+    print("   GET  /api/hospitals/nearby - Get hospitals near a location")
+    print("   GET  /api/claims - Get user claims (?include=documents,hospital,policy)")
     print("   POST /api/claims - Create new claim")
+    print("   POST /api/claims/batch - Create claims in bulk")
     print("   GET  /api/insurance-companies - Get insurance companies")
+    print("   GET  /api/insurance-companies/<id>/hospitals - Get network hospitals of an insurer")
+    print("   GET  /api/hospitals/<id>/insurers - Get insurers accepted at a hospital")
+    print("   GET  /api/network/check - Check whether a hospital is in an insurer's network")
     print("   GET  /api/policies - Get policies")
     print("   GET  /api/stats/dashboard - Get dashboard statistics")
     print("   GET  /api/stats/hospital-states - Get hospital statistics by state")
+    print("   GET  /api/stats/pool - Get database connection pool statistics")
+    print("   GET  /api/stats/queries - Get per-query timing statistics")
+    print("   GET  /api/stats/claims-batch - Get bulk claim ingestion statistics")
+    print("   GET  /api/stats/document-jobs - Get document processing statistics")
+    print("   GET  /api/stats/cache - Get cache statistics")
+    print("   GET  /api/metrics - Prometheus metrics")
+    print("   GET  /api/admin/slow-queries - Slow query log (X-Admin-Token)")
+    print("   DELETE /api/admin/slow-queries - Clear the slow query log (X-Admin-Token)")
+    print("   GET  /api/admin/profiles - List recent request profiles (X-Admin-Token)")
+    print("   GET  /api/admin/profiles/<name> - Download a request profile (X-Admin-Token)")
     print("   POST /api/documents/upload - Upload documents")
+    print("   GET  /api/documents/<id> - Download a document (supports Range)")
+    print("   GET  /api/documents/<id>/status - Get document processing status")
+    print("   POST /api/documents/uploads - Start a resumable document upload")
+    print("   PUT  /api/documents/uploads/<id> - Upload a chunk at an offset")
+    print("   GET  /api/documents/uploads/<id> - Get resumable upload progress")
+    print("   POST /api/documents/uploads/<id>/finalize - Complete a resumable upload")
+    print("   POST /api/batch - Run several GET requests in one round-trip")
     print("\n🌐 Server running on http://localhost:5000")
     
-    app.run(debug=True, port=5000)
\ No newline at end of file
+    # Process jobs left Pending by an earlier run
+    document_jobs.start()
+
+    # Development server only; use serve.py for production
+    app.run(debug=os.environ.get('FLASK_DEBUG', 'False').lower() == 'true',
+            port=int(os.environ.get('FLASK_PORT', 5000)))
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+ClaimEase Hospital Geo Index
+In-memory grid index over Hospitals.latitude/longitude for nearest-hospital queries
+"""
+
+import heapq
+import math
+import os
+from collections import defaultdict
+from data_access import db_session
+from network_index import network_index
+from refreshable_index import RefreshableIndex
+
+# Grid cell size in degrees (0.1 degree is roughly 11 km of latitude)
+CELL_DEGREES = float(os.environ.get('GEO_CELL_DEGREES', 0.1))
+
+# Seconds between full reloads even without change notifications
+REBUILD_SECONDS = float(os.environ.get('GEO_REBUILD_SECONDS', 3600))
+
+# Seconds between checks of the Hospitals table for changes made outside this process
+REFRESH_SECONDS = float(os.environ.get('GEO_REFRESH_SECONDS', 30))
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+
+class HospitalGeoIndex(RefreshableIndex):
+    """Uniform lat/lng grid of active hospitals
+
+    A radius query only visits the cells overlapping the bounding box of the
+    search circle and computes exact distances for hospitals in those cells.
+    Insurer filtering uses the shared cashless network index. Refreshes
+    compare the row count and latest updated_at of Hospitals with the last
+    load and reload the grid only when they moved.
+    """
+
+    def __init__(self, cell_degrees=0.1, rebuild_seconds=3600, refresh_seconds=30):
+        super().__init__(rebuild_seconds, refresh_seconds)
+        self.cell_degrees = cell_degrees
+        self._cells = {}
+        self._version = None
+
+    def _cell(self, lat, lng):
+        return (math.floor(lat / self.cell_degrees), math.floor(lng / self.cell_degrees))
+
+    def rebuild(self):
+        """Reload hospital coordinates from the database"""
+        with db_session() as db:
+            version = db.fetch_one('hospitals_version')
+            hospitals = db.fetch_all('geo_hospitals')
+
+        cells = defaultdict(list)
+        for row in hospitals:
+            lat, lng = float(row['latitude']), float(row['longitude'])
+            point = {
+                'hospital_id': row['hospital_id'],
+                'hospital_name': row['hospital_name'],
+                'hospital_type': row['hospital_type'],
+                'city': row['city'],
+                'state': row['state'],
+                'contact_number': row['contact_number'],
+                'latitude': lat,
+                'longitude': lng
+            }
+            cells[self._cell(lat, lng)].append(point)
+
+        with self._lock:
+            self._cells = dict(cells)
+            self._version = version
+
+    def refresh(self):
+        """Reload the grid if Hospitals changed since the last load"""
+        with db_session() as db:
+            version = db.fetch_one('hospitals_version')
+        if version != self._version:
+            self.rebuild()
+
+    def nearby(self, lat, lng, radius_km, limit=20, hospital_type=None, company_id=None,
+               mode='any'):
+        """Hospitals within radius_km of (lat, lng), nearest first"""
+        self.ensure_fresh()
+        network = network_index.company_bits(company_id, mode) if company_id is not None else None
+
+        lat_span = radius_km / KM_PER_DEGREE
+        cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+        lng_span = min(radius_km / (KM_PER_DEGREE * cos_lat), 180.0)
+        min_cell = self._cell(max(lat - lat_span, -90.0), lng - lng_span)
+        max_cell = self._cell(min(lat + lat_span, 90.0), lng + lng_span)
+        lng_cells = int(round(360 / self.cell_degrees))
+
+        # Columns wrap around the antimeridian
+        columns = {(col + lng_cells // 2) % lng_cells - lng_cells // 2
+                   for col in range(min_cell[1], max_cell[1] + 1)}
+
+        matches = []
+        with self._lock:
+            cells = self._cells
+        for row in range(min_cell[0], max_cell[0] + 1):
+            for col in columns:
+                for point in cells.get((row, col), ()):
+                    if hospital_type and point['hospital_type'].lower() != hospital_type.lower():
+                        continue
+                    if network is not None and not network >> point['hospital_id'] & 1:
+                        continue
+                    distance = haversine_km(lat, lng, point['latitude'], point['longitude'])
+                    if distance <= radius_km:
+                        matches.append((distance, point['hospital_id'], point))
+
+        nearest = heapq.nsmallest(limit, matches, key=lambda match: (match[0], match[1]))
+        return [dict(point, distance_km=round(distance, 3)) for distance, _, point in nearest]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'cells': len(self._cells),
+                'hospitals': sum(len(points) for points in self._cells.values())
+            }
+
+
+hospital_geo_index = HospitalGeoIndex(CELL_DEGREES, REBUILD_SECONDS, REFRESH_SECONDS)
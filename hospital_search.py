@@ -0,0 +1,192 @@
+"""
+ClaimEase Hospital Search
+In-memory trigram/prefix index over hospital name, city and state for autocomplete
+"""
+
+import heapq
+import os
+import re
+from collections import defaultdict
+from data_access import db_session
+from refreshable_index import RefreshableIndex
+
+# Seconds between full index rebuilds (catches hard deletes missed by incremental refresh)
+REBUILD_SECONDS = float(os.environ.get('SEARCH_REBUILD_SECONDS', 3600))
+
+# Seconds between incremental refreshes that pick up hospitals changed outside this process
+REFRESH_SECONDS = float(os.environ.get('SEARCH_REFRESH_SECONDS', 30))
+
+# Ranking weight of a match in each indexed field
+FIELD_WEIGHTS = {'hospital_name': 3.0, 'city': 2.0, 'state': 1.0}
+
+_NON_ALNUM = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text):
+    """Lower-case text and collapse punctuation/whitespace to single spaces"""
+    return _NON_ALNUM.sub(' ', (text or '').lower()).strip()
+
+
+def trigrams(term):
+    """Character trigrams of a single normalized term"""
+    return {term[i:i + 3] for i in range(len(term) - 2)}
+
+
+class HospitalSearchIndex(RefreshableIndex):
+    """Substring/prefix search over active hospitals
+
+    Terms of three or more characters are looked up through a trigram
+    inverted index; shorter terms through a word-prefix index. Candidates
+    are verified against the stored text and ranked by field weight, with
+    bonuses for whole-word and word-prefix matches. Refreshes re-index the
+    hospitals whose updated_at reached the watermark of the last load.
+    """
+
+    def __init__(self, rebuild_seconds=3600, refresh_seconds=30):
+        super().__init__(rebuild_seconds, refresh_seconds)
+        self._docs = {}  # hospital_id -> (row, {field: normalized text})
+        self._grams = defaultdict(set)
+        self._prefixes = defaultdict(set)
+        self._watermark = None
+
+    def _keys(self, fields):
+        grams, prefixes = set(), set()
+        for text in fields.values():
+            for word in text.split():
+                grams |= trigrams(word)
+                prefixes.add(word[:1])
+                prefixes.add(word[:2])
+        return grams, prefixes
+
+    def _remove(self, hospital_id):
+        doc = self._docs.pop(hospital_id, None)
+        if doc is None:
+            return
+        grams, prefixes = self._keys(doc[1])
+        for gram in grams:
+            self._grams[gram].discard(hospital_id)
+            if not self._grams[gram]:
+                del self._grams[gram]
+        for prefix in prefixes:
+            self._prefixes[prefix].discard(hospital_id)
+            if not self._prefixes[prefix]:
+                del self._prefixes[prefix]
+
+    def _add(self, row):
+        hospital_id = row['hospital_id']
+        self._remove(hospital_id)
+        if not row.get('is_active', True):
+            return
+        fields = {field: normalize(row.get(field)) for field in FIELD_WEIGHTS}
+        result = {
+            'hospital_id': hospital_id,
+            'hospital_name': row.get('hospital_name'),
+            'hospital_type': row.get('hospital_type'),
+            'city': row.get('city'),
+            'state': row.get('state')
+        }
+        self._docs[hospital_id] = (result, fields)
+        grams, prefixes = self._keys(fields)
+        for gram in grams:
+            self._grams[gram].add(hospital_id)
+        for prefix in prefixes:
+            self._prefixes[prefix].add(hospital_id)
+
+    def _apply(self, rows, replace):
+        with self._lock:
+            if replace:
+                self._docs.clear()
+                self._grams.clear()
+                self._prefixes.clear()
+            for row in rows:
+                self._add(row)
+                updated_at = row.get('updated_at')
+                if updated_at and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+
+    def rebuild(self):
+        """Reload every hospital from the database"""
+        with db_session() as db:
+            rows = db.fetch_all('search_hospitals_all')
+        self._apply(rows, replace=True)
+
+    def refresh(self):
+        """Re-index hospitals updated since the last load"""
+        if self._watermark is None:
+            return self.rebuild()
+        with db_session() as db:
+            rows = db.fetch_all('search_hospitals_changed', (self._watermark,))
+        self._apply(rows, replace=False)
+
+    def _candidates(self, term):
+        if len(term) < 3:
+            return set(self._prefixes.get(term, ()))
+        grams = sorted(trigrams(term), key=lambda gram: len(self._grams.get(gram, ())))
+        candidates = None
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if not postings:
+                return set()
+            candidates = set(postings) if candidates is None else candidates & postings
+            if not candidates:
+                break
+        return candidates or set()
+
+    @staticmethod
+    def _score(terms, fields):
+        score = 0.0
+        for term in terms:
+            best = 0.0
+            for field, weight in FIELD_WEIGHTS.items():
+                text = fields[field]
+                if term not in text:
+                    continue
+                words = text.split()
+                if term in words:
+                    match = 3.0
+                elif any(word.startswith(term) for word in words):
+                    match = 2.0
+                else:
+                    match = 1.0
+                best = max(best, weight * match)
+            if not best:
+                return 0.0
+            score += best
+        return score
+
+    def search(self, query, limit=10):
+        """Top-ranked hospitals matching every term of query"""
+        terms = normalize(query).split()
+        if not terms:
+            return []
+        self.ensure_fresh()
+
+        with self._lock:
+            candidates = None
+            for term in sorted(terms, key=len, reverse=True):
+                matches = self._candidates(term)
+                candidates = matches if candidates is None else candidates & matches
+                if not candidates:
+                    return []
+
+            ranked = []
+            for hospital_id in candidates:
+                result, fields = self._docs[hospital_id]
+                score = self._score(terms, fields)
+                if score:
+                    ranked.append((score, result))
+
+        top = heapq.nlargest(limit, ranked,
+                             key=lambda item: (item[0], -len(item[1]['hospital_name'] or '')))
+        return [dict(result, score=score) for score, result in top]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'hospitals': len(self._docs),
+                'trigrams': len(self._grams),
+                'prefixes': len(self._prefixes)
+            }
+
+
+hospital_index = HospitalSearchIndex(REBUILD_SECONDS, REFRESH_SECONDS)
@@ -0,0 +1,83 @@
+"""
+ClaimEase JSON Output
+Fast JSON provider for MySQL row types (Decimal, date, datetime, timedelta)
+"""
+
+import datetime
+import json
+import os
+from decimal import Decimal
+from flask.json.provider import JSONProvider
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # falls back to the standard library encoder
+    orjson = None
+
+# 'http' keeps Flask's RFC 822 dates ("Wed, 03 Jan 2024 00:00:00 GMT"), 'iso' emits ISO 8601
+JSON_DATE_FORMAT = os.environ.get('JSON_DATE_FORMAT', 'http').lower()
+
+
+def _http_default(value):
+    """Encode the non-JSON types the MySQL connector returns, matching Flask's formats"""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return http_date(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime.timedelta):  # TIME columns
+        return str(value)
+    if isinstance(value, datetime.time):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', 'replace')
+    if isinstance(value, set):
+        return list(value)
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+def _iso_default(value):
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return _http_default(value)
+
+
+class FastJSONProvider(JSONProvider):
+    """JSON provider that encodes with orjson when it is installed
+
+    Responses are built from the encoded bytes directly, and keys keep the
+    order of the row instead of being sorted.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        self._default = _iso_default if JSON_DATE_FORMAT == 'iso' else _http_default
+        if orjson is not None:
+            # Dates go through default() too unless ISO output is wanted
+            self._options = orjson.OPT_NON_STR_KEYS
+            if JSON_DATE_FORMAT != 'iso':
+                self._options |= orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps_bytes(self, obj):
+        """Encode obj to UTF-8 JSON bytes"""
+        if orjson is not None:
+            return orjson.dumps(obj, default=self._default, option=self._options)
+        return json.dumps(obj, default=self._default, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+
+    def dumps(self, obj, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.dumps(obj, default=self._default, option=self._options).decode('utf-8')
+        kwargs.setdefault('default', self._default)
+        kwargs.setdefault('ensure_ascii', False)
+        kwargs.setdefault('separators', (',', ':'))
+        return json.dumps(obj, **kwargs)
+
+    def loads(self, s, **kwargs):
+        if orjson is not None and not kwargs:
+            return orjson.loads(s)
+        return json.loads(s, **kwargs)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype='application/json')
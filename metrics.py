@@ -0,0 +1,298 @@
+"""
+ClaimEase Metrics
+Request, database, pool, cache and upload metrics in Prometheus text format, aggregated across workers
+"""
+
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from flask import request
+
+# Metrics settings (override through environment variables)
+METRICS_CONFIG = {
+    # Directory shared by the worker processes; empty for single-process metrics.
+    # serve.py creates a temporary one when none is set.
+    'directory': os.environ.get('METRICS_DIR', ''),
+    'flush_seconds': float(os.environ.get('METRICS_FLUSH_SECONDS', 5))
+}
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# name -> (type, help, buckets)
+METRICS = {
+    'claimease_http_request_duration_seconds': (
+        'histogram', 'Request latency by route, method and status', LATENCY_BUCKETS),
+    'claimease_http_request_db_seconds': (
+        'histogram', 'Time per request spent executing SQL', LATENCY_BUCKETS),
+    'claimease_http_request_python_seconds': (
+        'histogram', 'Time per request outside SQL and pool waits', LATENCY_BUCKETS),
+    'claimease_db_pool_wait_seconds': (
+        'histogram', 'Time spent waiting to check a connection out of the pool', LATENCY_BUCKETS),
+    'claimease_upload_bytes_total': ('counter', 'Document bytes received', None),
+    'claimease_upload_seconds_total': ('counter', 'Time spent in requests receiving uploads', None),
+    'claimease_db_queries_total': ('counter', 'Named queries executed', None),
+    'claimease_db_query_errors_total': ('counter', 'Named queries that raised', None),
+    'claimease_db_query_seconds_total': ('counter', 'Time spent in named queries', None),
+    'claimease_db_query_rows_total': ('counter', 'Rows returned or affected by named queries', None),
+    'claimease_db_pool_connections': ('gauge', 'Pool connections by state', None),
+    'claimease_db_pool_timeouts_total': ('counter', 'Pool checkouts that timed out', None),
+    'claimease_cache_hits_total': ('counter', 'Cache lookups served from the cache', None),
+    'claimease_cache_misses_total': ('counter', 'Cache lookups that missed', None),
+    'claimease_cache_entries': ('gauge', 'Entries currently cached', None),
+    'claimease_document_jobs_total': ('counter', 'Document processing outcomes', None)
+}
+
+# Per-request [started, db_seconds, pool_wait_seconds, status]; None outside requests
+_request_timing = contextvars.ContextVar('request_timing', default=None)
+
+
+def record_db_time(seconds):
+    """Add SQL execution time to the current request, if any"""
+    timing = _request_timing.get()
+    if timing is not None:
+        timing[1] += seconds
+
+
+def record_pool_wait(seconds):
+    """Record a pool checkout wait, for the histogram and the current request"""
+    metrics.observe('claimease_db_pool_wait_seconds', seconds)
+    timing = _request_timing.get()
+    if timing is not None:
+        timing[2] += seconds
+
+
+def record_upload(kind, size):
+    """Count received document bytes and the request time spent receiving them"""
+    timing = _request_timing.get()
+    metrics.inc('claimease_upload_bytes_total', size, kind=kind)
+    if timing is not None:
+        metrics.inc('claimease_upload_seconds_total', time.perf_counter() - timing[0], kind=kind)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels_text(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels) + '}'
+
+
+def _format_value(value):
+    if value == int(value):
+        return str(int(value))
+    return repr(float(value))
+
+
+class MetricsRegistry:
+    """Process-local counters and histograms, optionally shared through a directory
+
+    Recording only touches in-memory dicts under one lock. With a directory
+    set, each process writes its totals to <directory>/<pid>.json every
+    flush_seconds (and when scraped), and render() sums the files of every
+    worker so any worker can answer a scrape for the whole server. Counters
+    of exited workers keep counting; gauges only include live processes.
+    """
+
+    def __init__(self, directory='', flush_seconds=5.0):
+        self.directory = directory
+        self.flush_seconds = flush_seconds
+        self._lock = threading.Lock()
+        self._counters = {}    # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., +Inf count, sum]
+        self._collectors = []
+        self._flusher = None
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        self.observe_many(((name, value, labels),))
+
+    def observe_many(self, observations):
+        """Record several (name, value, labels) histogram observations under one lock"""
+        with self._lock:
+            for name, value, labels in observations:
+                buckets = METRICS[name][2]
+                key = (name, tuple(sorted(labels.items())))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = [0] * (len(buckets) + 1) + [0.0]
+                histogram[bisect_left(buckets, value)] += 1
+                histogram[-1] += value
+        self._ensure_flusher()
+
+    def collector(self, function):
+        """Register a callable yielding (name, labels dict, value) samples at scrape time
+
+        Use it for values other modules already count (caches, the pool,
+        query stats), so they cost nothing per request.
+        """
+        self._collectors.append(function)
+        return function
+
+    def snapshot(self):
+        """This process's metrics as JSON-serializable lists"""
+        samples = []
+        for function in self._collectors:
+            try:
+                samples.extend((name, sorted(labels.items()), value)
+                               for name, labels, value in function())
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        with self._lock:
+            counters = [(name, list(labels), value)
+                        for (name, labels), value in self._counters.items()]
+            histograms = [(name, list(labels), list(values))
+                          for (name, labels), values in self._histograms.items()]
+        return {'pid': os.getpid(), 'counters': counters + samples, 'histograms': histograms}
+
+    def set_directory(self, directory, clear=False):
+        """Share metrics through directory; clear drops files left by an earlier run"""
+        os.makedirs(directory, exist_ok=True)
+        if clear:
+            for path in glob.glob(os.path.join(directory, '*.json')):
+                os.remove(path)
+        self.directory = directory
+
+    def flush(self):
+        """Write this process's snapshot for the other workers to read"""
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f'{os.getpid()}.json')
+        temp_path = f'{path}.tmp'
+        with open(temp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(temp_path, path)
+
+    def _ensure_flusher(self):
+        if self._flusher is not None or not self.directory:
+            return
+        with self._lock:
+            if self._flusher is not None:
+                return
+            self._flusher = threading.Thread(target=self._flush_loop, daemon=True,
+                                             name='metrics-flush')
+        self._flusher.start()
+
+    def _flush_loop(self):
+        while True:
+            time.sleep(self.flush_seconds)
+            try:
+                self.flush()
+            except OSError as e:
+                print(f"Metrics flush error: {e}")
+
+    def _snapshots(self):
+        if not self.directory:
+            return [self.snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, '*.json')):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # replaced or removed while reading
+        return snapshots
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        counters, histograms = {}, {}
+        for snapshot in self._snapshots():
+            alive = snapshot['pid'] == os.getpid() or _pid_alive(snapshot['pid'])
+            for name, labels, value in snapshot['counters']:
+                if name not in METRICS or (METRICS[name][0] == 'gauge' and not alive):
+                    continue
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                merged = histograms.get(key)
+                histograms[key] = values if merged is None else [
+                    a + b for a, b in zip(merged, values)]
+
+        lines = []
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = sorted((labels, value) for (metric, labels), value in
+                            (counters if kind != 'histogram' else histograms).items()
+                            if metric == name)
+            if not series:
+                continue
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in series:
+                if kind != 'histogram':
+                    lines.append(f'{name}{_labels_text(labels)} {_format_value(value)}')
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ('+Inf',), value):
+                    cumulative += count
+                    lines.append(f'{name}_bucket{_labels_text(labels + (("le", bound),))} '
+                                 f'{cumulative}')
+                lines.append(f'{name}_sum{_labels_text(labels)} {_format_value(value[-1])}')
+                lines.append(f'{name}_count{_labels_text(labels)} {cumulative}')
+        return '\n'.join(lines) + '\n'
+
+    def reset_after_fork(self):
+        # A forked worker starts from zero under its own pid file
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+        self._flusher = None
+
+    def init_app(self, app):
+        """Time every request of a Flask app"""
+        app.before_request(self._start_request)
+        app.after_request(self._capture_status)
+        app.teardown_request(self._finish_request)
+
+    def _start_request(self):
+        # Kept in the WSGI environ, which (unlike g) batch sub-requests do not share
+        timing = request.environ['claimease.metrics'] = [time.perf_counter(), 0.0, 0.0, 500]
+        _request_timing.set(timing)
+
+    def _capture_status(self, response):
+        timing = request.environ.get('claimease.metrics')
+        if timing is not None:
+            timing[3] = response.status_code
+        return response
+
+    def _finish_request(self, exc=None):
+        timing = request.environ.pop('claimease.metrics', None)
+        if timing is None:
+            return
+        elapsed = time.perf_counter() - timing[0]
+        if _request_timing.get() is timing:
+            _request_timing.set(None)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        self.observe_many((
+            ('claimease_http_request_duration_seconds', elapsed,
+             {'route': route, 'method': request.method, 'status': str(timing[3])}),
+            ('claimease_http_request_db_seconds', timing[1], {'route': route}),
+            ('claimease_http_request_python_seconds',
+             max(elapsed - timing[1] - timing[2], 0.0), {'route': route})
+        ))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+metrics = MetricsRegistry(**METRICS_CONFIG)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metrics.reset_after_fork)
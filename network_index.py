@@ -0,0 +1,165 @@
+"""
+ClaimEase Cashless Network Index
+Precomputed bitsets over Hospital_Insurance_Empanelment for in-network lookups
+"""
+
+import os
+from collections import defaultdict
+from data_access import db_session
+from refreshable_index import RefreshableIndex
+
+# Seconds between full reloads even without change notifications
+REBUILD_SECONDS = float(os.environ.get('NETWORK_REBUILD_SECONDS', 3600))
+
+# Seconds between checks of the underlying tables for changes made outside this process
+REFRESH_SECONDS = float(os.environ.get('NETWORK_REFRESH_SECONDS', 30))
+
+
+def iter_bits(bits):
+    """Yield the positions of set bits (hospital_ids) in ascending order"""
+    while bits:
+        lowest = bits & -bits
+        yield lowest.bit_length() - 1
+        bits ^= lowest
+
+
+def _norm(value):
+    return (value or '').strip().lower()
+
+
+class NetworkIndex(RefreshableIndex):
+    """Hospital/insurer empanelment held as Python-int bitsets keyed by hospital_id
+
+    Each insurer has one bitset of empanelled hospitals per mode (any,
+    cashless, reimbursement), and active hospitals are bucketed by city,
+    state and type, so filtered network lookups are a few integer ANDs.
+    Refreshes compare row counts, latest updated_at values and a checksum
+    of the empanelment rows with the last load, and reload only on change.
+    """
+
+    MODES = ('any', 'cashless', 'reimbursement')
+
+    def __init__(self, rebuild_seconds=3600, refresh_seconds=30):
+        super().__init__(rebuild_seconds, refresh_seconds)
+        self._data = None
+        self._version = None
+
+    def rebuild(self):
+        """Reload hospitals, insurers and empanelment from the database"""
+        with db_session() as db:
+            version = db.fetch_one('network_version')
+            hospitals = db.fetch_all('network_hospitals')
+            companies = db.fetch_all('insurance_companies')
+            empanelments = db.fetch_all('active_empanelments')
+
+        hospital_rows = {row['hospital_id']: row for row in hospitals}
+        active = 0
+        by_city, by_state, by_type = defaultdict(int), defaultdict(int), defaultdict(int)
+        for hospital_id, row in hospital_rows.items():
+            bit = 1 << hospital_id
+            active |= bit
+            by_city[_norm(row['city'])] |= bit
+            by_state[_norm(row['state'])] |= bit
+            by_type[_norm(row['hospital_type'])] |= bit
+
+        company_bits = {mode: defaultdict(int) for mode in self.MODES}
+        hospital_insurers = defaultdict(dict)
+        for row in empanelments:
+            hospital_id, company_id = row['hospital_id'], row['company_id']
+            if hospital_id not in hospital_rows:
+                continue
+            bit = 1 << hospital_id
+            company_bits['any'][company_id] |= bit
+            if row['cashless_available']:
+                company_bits['cashless'][company_id] |= bit
+            if row['reimbursement_available']:
+                company_bits['reimbursement'][company_id] |= bit
+            hospital_insurers[hospital_id][company_id] = (bool(row['cashless_available']),
+                                                          bool(row['reimbursement_available']))
+
+        # Swap in a complete snapshot so readers never see a half-built index
+        self._data = {
+            'hospitals': hospital_rows,
+            'companies': {row['company_id']: row for row in companies},
+            'active': active,
+            'city': dict(by_city),
+            'state': dict(by_state),
+            'type': dict(by_type),
+            'company_bits': {mode: dict(bits) for mode, bits in company_bits.items()},
+            'hospital_insurers': dict(hospital_insurers)
+        }
+        self._version = version
+
+    def refresh(self):
+        """Reload if hospitals, insurers or empanelment changed since the last load"""
+        with db_session() as db:
+            version = db.fetch_one('network_version')
+        if version != self._version:
+            self.rebuild()
+
+    def ensure_fresh(self):
+        """The current index data, reloaded first if it is missing, stale or dirty"""
+        super().ensure_fresh()
+        return self._data
+
+    def company_bits(self, company_id, mode='any'):
+        """Bitset of active hospitals empanelled with an insurer"""
+        return self.ensure_fresh()['company_bits'][mode].get(company_id, 0)
+
+    def is_empanelled(self, hospital_id, company_id, mode='any'):
+        return bool(self.company_bits(company_id, mode) >> hospital_id & 1)
+
+    def check(self, hospital_id, company_id):
+        """Network status of one hospital for one insurer"""
+        data = self.ensure_fresh()
+        modes = data['hospital_insurers'].get(hospital_id, {}).get(company_id)
+        return {
+            'hospital_id': hospital_id,
+            'company_id': company_id,
+            'in_network': modes is not None,
+            'cashless_available': bool(modes and modes[0]),
+            'reimbursement_available': bool(modes and modes[1])
+        }
+
+    def company_hospitals(self, company_id, mode='any', city=None, state=None, hospital_type=None):
+        """Hospitals empanelled with an insurer, optionally filtered by city/state/type"""
+        data = self.ensure_fresh()
+        bits = data['company_bits'][mode].get(company_id, 0)
+        for key, value in (('city', city), ('state', state), ('type', hospital_type)):
+            if value:
+                bits &= data[key].get(_norm(value), 0)
+
+        results = []
+        for hospital_id in iter_bits(bits):
+            row = data['hospitals'][hospital_id]
+            cashless, reimbursement = data['hospital_insurers'][hospital_id][company_id]
+            results.append(dict(row, cashless_available=cashless,
+                                reimbursement_available=reimbursement))
+        return results
+
+    def hospital_insurers(self, hospital_id, mode='any'):
+        """Insurers accepted at a hospital"""
+        data = self.ensure_fresh()
+        results = []
+        for company_id, (cashless, reimbursement) in data['hospital_insurers'].get(hospital_id, {}).items():
+            if (mode == 'cashless' and not cashless) or (mode == 'reimbursement' and not reimbursement):
+                continue
+            company = data['companies'].get(company_id, {})
+            results.append({
+                'company_id': company_id,
+                'company_name': company.get('company_name'),
+                'helpline': company.get('helpline'),
+                'cashless_available': cashless,
+                'reimbursement_available': reimbursement
+            })
+        results.sort(key=lambda company: company['company_name'] or '')
+        return results
+
+    def has_hospital(self, hospital_id):
+        return hospital_id in self.ensure_fresh()['hospitals']
+
+    def has_company(self, company_id):
+        return company_id in self.ensure_fresh()['companies']
+
+
+network_index = NetworkIndex(REBUILD_SECONDS, REFRESH_SECONDS)
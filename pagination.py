@@ -0,0 +1,95 @@
+"""
+ClaimEase Keyset Pagination
+Opaque cursor encoding and page-size handling for list endpoints
+"""
+
+import base64
+import datetime
+import json
+import os
+from decimal import Decimal
+from urllib.parse import urlencode
+
+# Page size configuration (override through environment variables)
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 50))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 200))
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor or page size cannot be decoded"""
+
+
+def _to_json_value(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+def encode_cursor(values):
+    """Encode the keyset values of the last row on a page into an opaque token"""
+    payload = json.dumps([_to_json_value(value) for value in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, length):
+    """Decode a token produced by encode_cursor into a list of keyset values"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+    except (ValueError, UnicodeError):
+        raise InvalidCursorError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != length:
+        raise InvalidCursorError('Invalid cursor')
+    # Keyset values are bound into SQL and cache keys; nested lists or objects never are
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        raise InvalidCursorError('Invalid cursor')
+    return values
+
+
+def get_page_size(args):
+    """Read the ?limit= parameter, defaulting to and capped at the configured sizes"""
+    limit = args.get('limit')
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    try:
+        limit = int(limit)
+    except ValueError:
+        raise InvalidCursorError('limit must be an integer')
+    if limit < 1:
+        raise InvalidCursorError('limit must be positive')
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def get_cursor(args, length):
+    """Read the ?cursor= parameter; returns None for the first page"""
+    token = args.get('cursor')
+    if not token:
+        return None
+    return decode_cursor(token, length)
+
+
+def split_page(rows, page_size, key_columns):
+    """Trim a page fetched with LIMIT page_size + 1 and build its next cursor
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    if len(rows) <= page_size:
+        return rows, None
+    rows = rows[:page_size]
+    last = rows[-1]
+    return rows, encode_cursor([last[column] for column in key_columns])
+
+
+def add_next_cursor(response, next_cursor, request):
+    """Expose the next-page cursor through X-Next-Cursor and a Link header
+
+    The response body stays a plain JSON array so existing clients keep working.
+    """
+    if next_cursor:
+        args = request.args.to_dict()
+        args['cursor'] = next_cursor
+        response.headers['X-Next-Cursor'] = next_cursor
+        response.headers['Link'] = f'<{request.base_url}?{urlencode(args)}>; rel="next"'
+    return response
@@ -0,0 +1,70 @@
+"""
+ClaimEase Refreshable Index
+Staleness tracking shared by the in-memory indexes built from MySQL tables
+"""
+
+import threading
+import time
+
+
+class RefreshableIndex:
+    """Base class deciding when an in-memory index reloads from the database
+
+    ensure_fresh() runs rebuild() when the index was never built or is
+    older than rebuild_seconds, and the cheaper refresh() when it was
+    marked dirty or refresh_seconds have passed since the last check.
+    mark_dirty() only hears about commits made by this process, so the
+    interval is what picks up changes made by other workers or outside
+    the app. Subclasses implement rebuild() and, when they can catch up
+    more cheaply than a full reload, refresh().
+    """
+
+    def __init__(self, rebuild_seconds=3600, refresh_seconds=30):
+        self.rebuild_seconds = rebuild_seconds
+        self.refresh_seconds = refresh_seconds
+        self._lock = threading.RLock()
+        self._refresh_lock = threading.Lock()
+        self._built_at = None
+        self._checked_at = None
+        self._dirty = True
+
+    def rebuild(self):
+        """Reload the whole index from the database"""
+        raise NotImplementedError
+
+    def refresh(self):
+        """Catch up with changes since the last load"""
+        self.rebuild()
+
+    def mark_dirty(self):
+        """Refresh before the next lookup"""
+        with self._lock:
+            self._dirty = True
+
+    def _due(self, now):
+        if self._built_at is None or now - self._built_at > self.rebuild_seconds:
+            return self.rebuild
+        if self._dirty or now - self._checked_at > self.refresh_seconds:
+            return self.refresh
+        return None
+
+    def ensure_fresh(self):
+        """Rebuild or refresh the index if it is missing, stale or dirty"""
+        if self._due(time.monotonic()) is None:
+            return
+        with self._refresh_lock:
+            started = time.monotonic()
+            load = self._due(started)
+            if load is None:
+                return
+            # Cleared before loading, so a write committed during the load marks it dirty again
+            with self._lock:
+                self._dirty = False
+            try:
+                load()
+            except Exception:
+                self.mark_dirty()
+                raise
+            self._checked_at = started
+            if load == self.rebuild:
+                self._built_at = started
@@ -0,0 +1,123 @@
+"""
+ClaimEase Request Batching
+Runs several GET sub-requests in one HTTP request on one pooled connection
+"""
+
+import contextvars
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.test import EnvironBuilder
+from data_access import shared_connection
+
+# Batch limits (override through environment variables)
+MAX_BATCH_REQUESTS = int(os.environ.get('API_BATCH_MAX_REQUESTS', 20))
+BATCH_WORKERS = int(os.environ.get('API_BATCH_WORKERS', 4))
+
+# Request headers passed on to every sub-request
+FORWARDED_HEADERS = ('Authorization', 'Accept-Language', 'User-Agent')
+
+# Response headers copied into each sub-response
+RETURNED_HEADERS = ('X-Next-Cursor', 'Link', 'ETag')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+class InvalidBatchError(ValueError):
+    """Raised when the batch body is malformed"""
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS,
+                                           thread_name_prefix='api-batch')
+        return _executor
+
+
+def _reset_executor():
+    # Worker threads do not survive fork; the child builds its own pool
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_executor)
+
+
+def parse_batch(data):
+    """Validate the batch body and return its sub-requests as (id, path) pairs"""
+    items = data.get('requests') if isinstance(data, dict) else None
+    if not isinstance(items, list) or not items:
+        raise InvalidBatchError('requests must be a non-empty list')
+    if len(items) > MAX_BATCH_REQUESTS:
+        raise InvalidBatchError(f'A batch may contain at most {MAX_BATCH_REQUESTS} requests')
+
+    parsed = []
+    for index, item in enumerate(items):
+        if isinstance(item, str):
+            item = {'path': item}
+        if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+            raise InvalidBatchError(f'requests[{index}] must have a path')
+        if item.get('method', 'GET').upper() != 'GET':
+            raise InvalidBatchError(f'requests[{index}]: only GET requests can be batched')
+        path = item['path']
+        if not path.startswith('/api/') or path.split('?', 1)[0].rstrip('/') == '/api/batch':
+            raise InvalidBatchError(
+                f'requests[{index}]: path must be an /api/ route other than /api/batch')
+        parsed.append((item.get('id', index), path))
+    return parsed
+
+
+def _dispatch(app, item_id, path, headers, base_url):
+    """Run one sub-request through the app's normal routing and handlers"""
+    started = time.perf_counter()
+    path, _, query_string = path.partition('?')
+    environ = EnvironBuilder(path=path, query_string=query_string, method='GET',
+                             headers=headers, base_url=base_url).get_environ()
+    try:
+        with app.request_context(environ):
+            response = app.full_dispatch_request()
+            status = response.status_code
+            data = response.get_data()
+            if response.is_json:
+                body = app.json.loads(data) if data else None
+            else:
+                body = data.decode('utf-8', 'replace')
+            returned = {name: response.headers[name] for name in RETURNED_HEADERS
+                        if name in response.headers}
+            response.close()
+    except Exception as e:
+        status, body, returned = 500, {'error': str(e)}, {}
+
+    return {
+        'id': item_id,
+        'status': status,
+        'headers': returned,
+        'body': body,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 3)
+    }
+
+
+def run_batch(app, items, request):
+    """Run sub-requests concurrently, sharing one pooled connection, in request order
+
+    The connection serves one sub-request's database work at a time; the
+    others meanwhile proceed through caches and in-memory indexes.
+    """
+    headers = {name: request.headers[name] for name in FORWARDED_HEADERS if name in request.headers}
+    base_url = request.host_url
+    executor = _get_executor()
+
+    with shared_connection():
+        futures = []
+        for item_id, path in items:
+            # Each task runs in a copy of this context so it sees the shared connection
+            context = contextvars.copy_context()
+            futures.append(executor.submit(context.run, _dispatch, app, item_id, path,
+                                           headers, base_url))
+        return [future.result() for future in futures]
@@ -0,0 +1,182 @@
+"""
+ClaimEase Request Profiler
+Opt-in cProfile capture of single requests, triggered by an admin header or 1-in-N sampling
+"""
+
+import cProfile
+import datetime
+import io
+import itertools
+import json
+import os
+import pstats
+import re
+import threading
+import time
+from flask import request
+
+# Profiler settings (override through environment variables)
+PROFILE_CONFIG = {
+    # When disabled no hooks are installed, so requests pay nothing
+    'enabled': os.environ.get('PROFILING_ENABLED', 'False').lower() in ('1', 'true', 'yes'),
+    'directory': os.environ.get('PROFILE_DIR', 'profiles'),
+    # Profile every Nth request; 0 profiles only requests sent with X-Profile: 1
+    'sample_every': int(os.environ.get('PROFILE_SAMPLE_EVERY', 0)),
+    'max_files': int(os.environ.get('PROFILE_MAX_FILES', 200))
+}
+
+# Functions summarized in each profile's listing entry
+TOP_FUNCTIONS = 15
+
+PROFILE_NAME_PATTERN = re.compile(r'^[0-9T-]+_[A-Z]+_[\w.-]+_\d+\.prof$')
+
+
+def _route_slug(route):
+    return re.sub(r'[^A-Za-z0-9]+', '-', route).strip('-') or 'root'
+
+
+def _top_functions(profile):
+    stats = pstats.Stats(profile, stream=io.StringIO())
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][3], reverse=True)
+    return [{
+        'function': f'{filename}:{line}({name})',
+        'calls': primitive_calls,
+        'total_ms': round(total_time * 1000, 3),
+        'cumulative_ms': round(cumulative_time * 1000, 3)
+    } for (filename, line, name), (primitive_calls, _, total_time, cumulative_time, _)
+        in rows[:TOP_FUNCTIONS]]
+
+
+class RequestProfiler:
+    """Profiles chosen requests into <directory>/<timestamp>_<method>_<route>_<pid>.prof
+
+    A request is profiled when sample_every is set and it is the Nth one,
+    or when it carries X-Profile: 1 and authorize() accepts it. The view,
+    its after-request hooks and teardown run under cProfile in the request's
+    own thread; the .prof file loads in pstats, snakeviz or flameprof, and a
+    .json sidecar holds the route, timing and hottest functions. Only one
+    request per process is profiled at a time (cProfile on Python 3.12+
+    cannot run two profilers at once); others run normally.
+    """
+
+    def __init__(self, enabled=False, directory='profiles', sample_every=0, max_files=200):
+        self.enabled = enabled
+        self.directory = directory
+        self.sample_every = sample_every
+        self.max_files = max_files
+        self.authorize = None
+        self._counter = itertools.count(1)
+        self._busy = threading.Lock()
+
+    def init_app(self, app, authorize):
+        """Install the request hooks; authorize() decides whether X-Profile is honoured"""
+        if not self.enabled:
+            return
+        self.authorize = authorize
+        os.makedirs(self.directory, exist_ok=True)
+        app.before_request(self._start)
+        app.after_request(self._tag_response)
+        app.teardown_request(self._finish)
+
+    def _wanted(self):
+        if request.headers.get('X-Profile') == '1' and self.authorize():
+            return 'header'
+        if self.sample_every and next(self._counter) % self.sample_every == 0:
+            return 'sample'
+        return None
+
+    def _start(self):
+        trigger = self._wanted()
+        if trigger is None or not self._busy.acquire(blocking=False):
+            return
+        route = request.url_rule.rule if request.url_rule is not None else request.path
+        now = datetime.datetime.now()
+        name = (f"{now.strftime('%Y%m%dT%H%M%S')}-{now.microsecond // 1000:03d}_"
+                f"{request.method}_{_route_slug(route)}_{os.getpid()}.prof")
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # another profiler (a debugger, coverage) is active
+            self._busy.release()
+            return
+        request.environ['claimease.profile'] = {
+            'profile': profile,
+            'name': name,
+            'route': route,
+            'trigger': trigger,
+            'started': time.perf_counter(),
+            'created_at': now.isoformat(timespec='milliseconds')
+        }
+
+    def _tag_response(self, response):
+        current = request.environ.get('claimease.profile')
+        if current is not None:
+            current['status'] = response.status_code
+            response.headers['X-Profile-Id'] = current['name']
+        return response
+
+    def _finish(self, exc=None):
+        current = request.environ.pop('claimease.profile', None)
+        if current is None:
+            return
+        try:
+            current['profile'].disable()
+            elapsed = time.perf_counter() - current['started']
+            self._write(current, elapsed)
+        except OSError as e:
+            print(f"Profile write error: {e}")
+        finally:
+            self._busy.release()
+
+    def _write(self, current, elapsed):
+        path = os.path.join(self.directory, current['name'])
+        current['profile'].dump_stats(path)
+        metadata = {
+            'name': current['name'],
+            'route': current['route'],
+            'method': request.method,
+            'path': request.full_path.rstrip('?'),
+            'status': current.get('status', 500),
+            'trigger': current['trigger'],
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'pid': os.getpid(),
+            'created_at': current['created_at'],
+            'top': _top_functions(current['profile'])
+        }
+        with open(path[:-len('.prof')] + '.json', 'w') as f:
+            json.dump(metadata, f)
+        self._prune()
+
+    def _prune(self):
+        names = sorted(name for name in os.listdir(self.directory) if name.endswith('.prof'))
+        for name in names[:max(len(names) - self.max_files, 0)]:
+            for suffix in ('.prof', '.json'):
+                try:
+                    os.remove(os.path.join(self.directory, name[:-len('.prof')] + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def recent(self, limit=50):
+        """Metadata of the newest profiles across all workers, newest first"""
+        if not self.enabled or not os.path.isdir(self.directory):
+            return []
+        names = sorted((name for name in os.listdir(self.directory) if name.endswith('.json')),
+                       reverse=True)
+        profiles = []
+        for name in names[:limit]:
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # pruned or still being written
+        return profiles
+
+    def profile_path(self, name):
+        """Path of a stored .prof file, or None for unknown or malformed names"""
+        if not PROFILE_NAME_PATTERN.match(name):
+            return None
+        path = os.path.abspath(os.path.join(self.directory, name))
+        return path if os.path.isfile(path) else None
+
+
+request_profiler = RequestProfiler(**PROFILE_CONFIG)
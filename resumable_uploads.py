@@ -0,0 +1,194 @@
+"""
+ClaimEase Resumable Uploads
+Chunked upload sessions (initiate, put chunk at offset, progress, finalize) on disk
+"""
+
+import hashlib
+import json
+import os
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Limits (override through environment variables)
+MAX_UPLOAD_SIZE = int(os.environ.get('RESUMABLE_MAX_SIZE_MB', 512)) * 1024 * 1024
+SESSION_TTL_SECONDS = float(os.environ.get('RESUMABLE_SESSION_TTL_SECONDS', 24 * 3600))
+
+
+class UploadError(Exception):
+    """Client-visible upload protocol error with an HTTP status"""
+
+    def __init__(self, message, status=400, offset=None):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.offset = offset
+
+
+class _FileLock:
+    """Exclusive cross-process lock held on a small lock file"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, 'a+b')
+        if fcntl:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+        else:
+            self._file.seek(0)
+            msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+
+
+class ResumableUploads:
+    """Upload sessions stored as <root>/<upload_id>.json + .part (+ .lock)
+
+    The current offset is always the size of the .part file, so a chunk cut
+    off by a dropped connection simply leaves the offset where the bytes
+    stopped and the client resumes from there. Chunks are streamed straight
+    to disk; the whole file is never held in memory.
+    """
+
+    def __init__(self, root, store, chunk_size=64 * 1024):
+        self.root = root
+        self.store = store
+        self.chunk_size = chunk_size
+
+    def _paths(self, upload_id):
+        # upload_id comes from the URL; only accept ids this class generated
+        try:
+            upload_id = uuid.UUID(hex=upload_id).hex
+        except (ValueError, TypeError):
+            raise UploadError('Upload not found', 404)
+        base = os.path.join(self.root, upload_id)
+        return base + '.json', base + '.part', base + '.lock'
+
+    def _load(self, upload_id, user_id):
+        meta_path, part_path, lock_path = self._paths(upload_id)
+        try:
+            with open(meta_path) as f:
+                session = json.load(f)
+        except FileNotFoundError:
+            raise UploadError('Upload not found', 404)
+        if session['user_id'] != user_id:
+            raise UploadError('Upload not found', 404)
+        return session, part_path, lock_path
+
+    def _remove(self, upload_id):
+        for path in self._paths(upload_id):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def cleanup_expired(self):
+        """Delete sessions that have not been touched within the TTL"""
+        if not os.path.isdir(self.root):
+            return
+        cutoff = time.time() - SESSION_TTL_SECONDS
+        for name in os.listdir(self.root):
+            if name.endswith('.json') and os.path.getmtime(os.path.join(self.root, name)) < cutoff:
+                self._remove(name[:-5])
+
+    def initiate(self, user_id, claim_id, document_type, filename, total_size, mime_type):
+        """Create an upload session and return its progress"""
+        if total_size <= 0 or total_size > MAX_UPLOAD_SIZE:
+            raise UploadError(f'total_size must be between 1 and {MAX_UPLOAD_SIZE} bytes')
+        os.makedirs(self.root, exist_ok=True)
+        self.cleanup_expired()
+
+        upload_id = uuid.uuid4().hex
+        meta_path, part_path, _ = self._paths(upload_id)
+        session = {
+            'upload_id': upload_id,
+            'user_id': user_id,
+            'claim_id': claim_id,
+            'document_type': document_type,
+            'filename': filename,
+            'mime_type': mime_type,
+            'total_size': total_size,
+            'created_at': time.time()
+        }
+        open(part_path, 'wb').close()
+        with open(meta_path, 'w') as f:
+            json.dump(session, f)
+        return self._progress(session, 0)
+
+    def _progress(self, session, offset):
+        return {
+            'upload_id': session['upload_id'],
+            'offset': offset,
+            'total_size': session['total_size'],
+            'complete': offset == session['total_size']
+        }
+
+    def progress(self, upload_id, user_id):
+        session, part_path, _ = self._load(upload_id, user_id)
+        return self._progress(session, os.path.getsize(part_path))
+
+    def write_chunk(self, upload_id, user_id, offset, stream, length=None):
+        """Append the bytes of stream at offset, which must equal the current offset"""
+        session, part_path, lock_path = self._load(upload_id, user_id)
+        with _FileLock(lock_path):
+            current = os.path.getsize(part_path)
+            if offset != current:
+                raise UploadError('Offset does not match upload progress', 409, offset=current)
+            remaining = session['total_size'] - current
+            if length is not None and length > remaining:
+                raise UploadError('Chunk exceeds total_size', 413, offset=current)
+
+            with open(part_path, 'r+b') as out:
+                out.seek(current)
+                while remaining > 0:
+                    chunk = stream.read(min(self.chunk_size, remaining))
+                    if not chunk:
+                        break
+                    out.write(chunk)
+                    remaining -= len(chunk)
+                written = out.tell()
+            # Bytes beyond total_size are never read from the stream
+            os.utime(os.path.join(self.root, session['upload_id'] + '.json'))
+        return self._progress(session, written)
+
+    def finalize(self, upload_id, user_id, create_document):
+        """Store the assembled file and create its Documents row
+
+        create_document(session, stored) must insert and commit the row; if it
+        raises, the session is left intact so finalize can be retried. The
+        staged file is hard-linked into the content store where possible so
+        no second copy is written.
+        """
+        session, part_path, lock_path = self._load(upload_id, user_id)
+        with _FileLock(lock_path):
+            if not os.path.exists(part_path):
+                raise UploadError('Upload not found', 404)
+            size = os.path.getsize(part_path)
+            if size != session['total_size']:
+                raise UploadError('Upload is incomplete', 409, offset=size)
+
+            digest = hashlib.sha256()
+            with open(part_path, 'rb') as f:
+                for chunk in iter(lambda: f.read(self.chunk_size), b''):
+                    digest.update(chunk)
+            stored = self.store.link_file(part_path, digest.hexdigest(), size)
+
+            result = create_document(session, stored)
+            self._remove(upload_id)
+        return result
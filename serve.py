@@ -0,0 +1,281 @@
+"""
+ClaimEase Production Server
+Pre-fork multi-process WSGI launcher with bounded thread pools (POSIX only)
+
+Usage: python serve.py [--app flask_api] [--workers N] [--threads N] [--host H] [--port P]
+                       [--mode threaded|async]
+"""
+
+import argparse
+import asyncio
+import importlib
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+from metrics import METRICS_CONFIG, metrics
+
+# Server settings (override through environment variables or command-line flags)
+SERVER_CONFIG = {
+    'host': os.environ.get('SERVER_HOST', '0.0.0.0'),
+    'port': int(os.environ.get('SERVER_PORT', os.environ.get('FLASK_PORT', 5000))),
+    'workers': int(os.environ.get('SERVER_WORKERS', os.cpu_count() or 1)),
+    'threads': int(os.environ.get('SERVER_THREADS', 8)),
+    'backlog': int(os.environ.get('SERVER_BACKLOG', 1024)),
+    'keepalive_timeout': float(os.environ.get('SERVER_KEEPALIVE_TIMEOUT', 15)),
+    'graceful_timeout': float(os.environ.get('SERVER_GRACEFUL_TIMEOUT', 30)),
+    'access_log': os.environ.get('SERVER_ACCESS_LOG', 'false').lower() in ('1', 'true', 'yes'),
+    # threaded: one pool thread per connection; async: asyncio owns the sockets
+    # and the pool threads only run the app (see async_server.py)
+    'mode': os.environ.get('SERVER_MODE', 'threaded')
+}
+
+
+class RequestHandler(WSGIRequestHandler):
+    """Werkzeug handler with the per-request access log made optional"""
+
+    access_log = False
+    # Seconds a socket read may block, so idle keep-alive clients release their thread
+    timeout = 15
+
+    def log_request(self, *args, **kwargs):
+        if self.access_log:
+            super().log_request(*args, **kwargs)
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """WSGI server that handles connections on a fixed-size thread pool
+
+    Unlike werkzeug's threaded server it never starts more than `threads`
+    handler threads, and it only accepts a connection once one of them is
+    free. Extra connections wait in the listen backlog shared by all
+    workers, so an idle sibling picks them up instead of a busy worker
+    queueing them in memory.
+    """
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads, fd=None):
+        super().__init__(host, port, app, handler=RequestHandler, fd=fd)
+        self.executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix='wsgi')
+        self._slots = threading.BoundedSemaphore(threads)
+        self._handed_off = False
+
+    def _handle_request_noblock(self):
+        # Called by serve_forever when the socket is readable, before accept()
+        if not self._slots.acquire(timeout=0.5):
+            return  # all threads busy; serve_forever checks for shutdown and retries
+        self._handed_off = False
+        try:
+            super()._handle_request_noblock()
+        finally:
+            if not self._handed_off:
+                # accept() failed or the request was refused; _handle never runs
+                self._slots.release()
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self._handle, request, client_address)
+        self._handed_off = True
+
+    def _handle(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+            self._slots.release()
+
+
+def warm_worker(app, threads):
+    """Open pool connections, build indexes and start background jobs before taking traffic"""
+    from data_access import db_pool
+    from dashboard_stats import dashboard_summary
+    from hospital_geo import hospital_geo_index
+    from hospital_search import hospital_index
+    from network_index import network_index
+
+    steps = [
+        ('db pool', lambda: db_pool.warm(threads)),
+        ('hospital search index', hospital_index.ensure_fresh),
+        ('hospital geo index', hospital_geo_index.ensure_fresh),
+        ('network index', network_index.ensure_fresh),
+        ('dashboard summary', dashboard_summary.snapshot)
+    ]
+    document_jobs = app.extensions.get('document_jobs')
+    if document_jobs is not None:
+        # Threads do not survive fork, and the sweeper recovers jobs from before a restart
+        steps.append(('document jobs', document_jobs.start))
+    for name, step in steps:
+        try:
+            step()
+        except Exception as e:
+            # The worker still starts; the data loads on first request instead
+            print(f"[worker {os.getpid()}] warmup of {name} failed: {e}", file=sys.stderr)
+
+
+def run_worker(app, listener, config):
+    """Serve on the inherited listening socket until SIGTERM, then drain and exit"""
+    if config['mode'] == 'async':
+        asyncio.run(run_async_worker(app, listener, config))
+        return
+
+    server = PooledWSGIServer(config['host'], config['port'], app, config['threads'],
+                              fd=listener.fileno())
+
+    def stop(signum, frame):
+        # shutdown() waits for serve_forever() to return, so call it off the main thread
+        threading.Thread(target=server.shutdown, daemon=True).start()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl+C
+
+    warm_worker(app, config['threads'])
+    server.serve_forever()
+
+    # Let in-flight requests finish before the process exits
+    server.executor.shutdown(wait=True)
+    from data_access import db_pool
+    db_pool.close_all()
+
+
+async def run_async_worker(app, listener, config):
+    """Async-mode worker: the event loop handles connections, the executor runs the app"""
+    from async_server import ASYNC_CONFIG, AsyncWSGIServer
+    from data_access import db_pool
+
+    server = AsyncWSGIServer(app, config['threads'], keepalive_timeout=config['keepalive_timeout'],
+                             max_body=app.config.get('MAX_CONTENT_LENGTH'),
+                             access_log=config['access_log'], **ASYNC_CONFIG)
+    loop = asyncio.get_running_loop()
+    stopping = asyncio.Event()
+    loop.add_signal_handler(signal.SIGTERM, stopping.set)
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent handles Ctrl+C
+
+    await loop.run_in_executor(None, warm_worker, app, config['threads'])
+    listener.setblocking(False)
+    await server.start(listener)
+    await stopping.wait()
+
+    await server.shutdown(config['graceful_timeout'])
+    db_pool.close_all()
+
+
+def spawn_worker(app, listener, config):
+    pid = os.fork()
+    if pid == 0:
+        status = 0
+        try:
+            run_worker(app, listener, config)
+            # Final totals, so a replaced worker's counters are not lost
+            metrics.flush()
+        except BaseException:
+            import traceback
+            traceback.print_exc()
+            status = 1
+        finally:
+            os._exit(status)
+    return pid
+
+
+def serve(app, config):
+    """Bind once in the parent, fork workers that share the socket, and supervise them"""
+    if not hasattr(os, 'fork'):
+        sys.exit('serve.py needs fork(); on Windows run the app behind waitress or in WSL')
+
+    listener = socket.create_server((config['host'], config['port']), backlog=config['backlog'],
+                                    reuse_port=False)
+    listener.set_inheritable(True)
+    RequestHandler.access_log = config['access_log']
+    RequestHandler.timeout = config['keepalive_timeout']
+
+    # Workers write their metrics here so any one of them can answer /api/metrics for all
+    metrics_dir = METRICS_CONFIG['directory'] or tempfile.mkdtemp(prefix='claimease-metrics-')
+    metrics.set_directory(metrics_dir, clear=True)
+
+    workers = {}
+    stopping = threading.Event()
+
+    def stop(signum, frame):
+        stopping.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    for _ in range(config['workers']):
+        pid = spawn_worker(app, listener, config)
+        workers[pid] = time.monotonic()
+    print(f"ClaimEase serving on http://{config['host']}:{config['port']} "
+          f"with {config['workers']} {config['mode']} workers x {config['threads']} threads")
+
+    # Restart workers that die; stop on SIGTERM/SIGINT
+    while not stopping.is_set():
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid and pid in workers:
+            started = workers.pop(pid)
+            print(f"Worker {pid} exited with status {status}; restarting", file=sys.stderr)
+            if time.monotonic() - started < 1:
+                # Do not spin if workers die during startup
+                stopping.wait(1)
+            new_pid = spawn_worker(app, listener, config)
+            workers[new_pid] = time.monotonic()
+        else:
+            stopping.wait(0.5)
+
+    print("Shutting down workers...")
+    for pid in workers:
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+
+    deadline = time.monotonic() + config['graceful_timeout']
+    while workers and time.monotonic() < deadline:
+        try:
+            pid, _ = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid:
+            workers.pop(pid, None)
+        else:
+            time.sleep(0.1)
+    for pid in workers:
+        # Still busy after the graceful timeout
+        try:
+            os.kill(pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    listener.close()
+    if not METRICS_CONFIG['directory']:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a ClaimEase API with pre-forked workers')
+    parser.add_argument('--app', default='flask_api', help='module that defines `app`')
+    parser.add_argument('--host', default=SERVER_CONFIG['host'])
+    parser.add_argument('--port', type=int, default=SERVER_CONFIG['port'])
+    parser.add_argument('--workers', type=int, default=SERVER_CONFIG['workers'])
+    parser.add_argument('--threads', type=int, default=SERVER_CONFIG['threads'])
+    parser.add_argument('--access-log', action='store_true', default=SERVER_CONFIG['access_log'])
+    parser.add_argument('--mode', choices=('threaded', 'async'), default=SERVER_CONFIG['mode'])
+    args = parser.parse_args(argv)
+
+    config = dict(SERVER_CONFIG, host=args.host, port=args.port, workers=args.workers,
+                  threads=args.threads, access_log=args.access_log, mode=args.mode)
+    # Import before forking so workers share the loaded code copy-on-write
+    app = importlib.import_module(args.app).app
+    serve(app, config)
+
+
+if __name__ == '__main__':
+    main()
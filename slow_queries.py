@@ -0,0 +1,186 @@
+"""
+ClaimEase Slow Query Log
+Queries over a time threshold, with redacted parameters, EXPLAIN plan, rows examined and calling route
+"""
+
+import datetime
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from flask import has_request_context, request
+from mysql.connector import Error
+
+# Slow query settings (override through environment variables)
+SLOW_QUERY_CONFIG = {
+    'threshold_ms': float(os.environ.get('SLOW_QUERY_THRESHOLD_MS', 200)),
+    'max_entries': int(os.environ.get('SLOW_QUERY_LOG_SIZE', 50)),
+    'explain': os.environ.get('SLOW_QUERY_EXPLAIN', 'True').lower() in ('1', 'true', 'yes'),
+    # A query shape is EXPLAINed at most once per interval; later entries reuse that plan
+    'explain_interval_seconds': float(os.environ.get('SLOW_QUERY_EXPLAIN_INTERVAL', 60))
+}
+
+# Statements MySQL can EXPLAIN without running them
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+# Rows examined by the statement that finished last on this connection (MySQL 8.0.16+)
+ROWS_EXAMINED_SQL = """
+    SELECT ROWS_EXAMINED AS rows_examined
+    FROM performance_schema.events_statements_history
+    WHERE THREAD_ID = PS_CURRENT_THREAD_ID()
+    ORDER BY EVENT_ID DESC LIMIT 1
+"""
+
+MAX_CACHED_PLANS = 256
+
+
+def redact(params):
+    """Parameter types and lengths, never their values"""
+    redacted = []
+    for value in params:
+        if value is None:
+            redacted.append(None)
+        elif isinstance(value, (str, bytes)):
+            redacted.append(f'<{type(value).__name__}:{len(value)}>')
+        else:
+            redacted.append(f'<{type(value).__name__}>')
+    return redacted
+
+
+def calling_route():
+    """Route pattern of the current request, or the thread name outside requests"""
+    if has_request_context():
+        rule = request.url_rule
+        return f"{request.method} {rule.rule if rule is not None else request.path}"
+    return threading.current_thread().name
+
+
+def _plain(row):
+    return {key: value.decode('utf-8', 'replace') if isinstance(value, (bytes, bytearray))
+            else value for key, value in row.items()}
+
+
+class SlowQueryLog:
+    """Worst and most recent slow queries of this process
+
+    Queries under the threshold cost one comparison. A slow query is
+    printed to the server log and kept in two bounded buffers: the
+    max_entries slowest since start (or the last reset) and the
+    max_entries most recent. Rows examined come from performance_schema
+    and the plan from EXPLAIN, both run on the connection that ran the
+    query, right after it.
+    """
+
+    def __init__(self, threshold_ms=200, max_entries=50, explain=True,
+                 explain_interval_seconds=60):
+        self.threshold = threshold_ms / 1000
+        self.max_entries = max_entries
+        self.explain = explain
+        self.explain_interval_seconds = explain_interval_seconds
+        self._lock = threading.Lock()
+        self._worst = []  # min-heap of (elapsed, sequence, entry)
+        self._recent = deque(maxlen=max_entries)
+        self._sequence = itertools.count()
+        self._plans = {}  # sql -> (captured_at, plan)
+        self._rows_examined_available = True
+        self._logged = 0
+
+    def record(self, connection, name, sql, params, elapsed, rows, error=None):
+        """Log a query that took at least the threshold
+
+        connection is the one the query ran on, with its results already
+        read; pass None when it is busy (an open streamed result) or broken,
+        and the entry is kept without rows examined or a plan.
+        """
+        entry = {
+            'query': name,
+            'sql': ' '.join(sql.split()),
+            'params': redact(params),
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'rows': rows,
+            'rows_examined': None,
+            'route': calling_route(),
+            'logged_at': datetime.datetime.now().isoformat(timespec='seconds'),
+            'explain': None
+        }
+        if error is not None:
+            entry['error'] = str(error)
+        if connection is not None:
+            # Must run before EXPLAIN, which would become the last statement
+            entry['rows_examined'] = self._rows_examined(connection)
+            if self.explain:
+                entry['explain'] = self._explain(connection, sql, params)
+
+        print(f"Slow query {name}: {entry['elapsed_ms']}ms, {rows} rows, "
+              f"{entry['rows_examined']} examined, route {entry['route']}")
+        with self._lock:
+            self._logged += 1
+            self._recent.append(entry)
+            item = (elapsed, next(self._sequence), entry)
+            if len(self._worst) < self.max_entries:
+                heapq.heappush(self._worst, item)
+            elif elapsed > self._worst[0][0]:
+                heapq.heapreplace(self._worst, item)
+
+    def _rows_examined(self, connection):
+        if not self._rows_examined_available:
+            return None
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute(ROWS_EXAMINED_SQL)
+            row = cursor.fetchone()
+            return row['rows_examined'] if row else None
+        except Error:
+            # performance_schema disabled, no SELECT grant on it, or MySQL before 8.0.16
+            self._rows_examined_available = False
+            return None
+        finally:
+            cursor.close()
+
+    def _explain(self, connection, sql, params):
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return None
+        now = time.monotonic()
+        with self._lock:
+            cached = self._plans.get(sql)
+        if cached is not None and now - cached[0] < self.explain_interval_seconds:
+            return cached[1]
+
+        cursor = connection.cursor(dictionary=True)
+        try:
+            cursor.execute('EXPLAIN ' + sql, tuple(params))
+            plan = [_plain(row) for row in cursor.fetchall()]
+        except Error as e:
+            plan = {'error': str(e)}
+        finally:
+            cursor.close()
+        with self._lock:
+            if len(self._plans) >= MAX_CACHED_PLANS:
+                self._plans.clear()
+            self._plans[sql] = (now, plan)
+        return plan
+
+    def snapshot(self):
+        with self._lock:
+            worst = [entry for _, _, entry in sorted(self._worst, reverse=True)]
+            recent = list(reversed(self._recent))
+            logged = self._logged
+        return {
+            'pid': os.getpid(),
+            'threshold_ms': self.threshold * 1000,
+            'logged': logged,
+            'worst': worst,
+            'recent': recent
+        }
+
+    def reset(self):
+        with self._lock:
+            self._worst = []
+            self._recent.clear()
+            self._plans.clear()
+            self._logged = 0
+
+
+slow_query_log = SlowQueryLog(**SLOW_QUERY_CONFIG)
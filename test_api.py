@@ -46,10 +46,20 @@ def main():
     print("\n📋 Testing Public Endpoints:")
     
     test_endpoint("GET", "/insurance-companies")
+    test_endpoint("GET", "/insurance-companies/1/hospitals?cashless=true")
+    test_endpoint("GET", "/hospitals/1/insurers")
+    test_endpoint("GET", "/network/check?hospital_id=1&company_id=1")
     test_endpoint("GET", "/policies")
     test_endpoint("GET", "/hospitals")
+    test_endpoint("GET", "/hospitals?stream=true")
+    test_endpoint("GET", "/hospitals/search?q=apollo")
+    test_endpoint("GET", "/hospitals/nearby?lat=28.5672&lng=77.2100&radius=10")
     test_endpoint("GET", "/stats/dashboard")
     test_endpoint("GET", "/stats/hospital-states")
+    test_endpoint("GET", "/stats/pool")
+    test_endpoint("GET", "/stats/queries")
+    test_endpoint("GET", "/stats/cache")
+    test_endpoint("GET", "/metrics")
     
     # Test authentication endpoints
     print("\n🔐 Testing Authentication Endpoints:")
@@ -0,0 +1,132 @@
+"""
+ClaimEase Async Server Tests
+Request bodies, streamed responses and backpressure of async_server.AsyncWSGIServer
+"""
+
+import asyncio
+import contextlib
+import socket
+import threading
+
+import async_server
+from async_server import AsyncWSGIServer
+
+
+def echo_app(environ, start_response):
+    body = environ['wsgi.input'].read()
+    start_response('200 OK', [('Content-Type', 'text/plain')])
+    return [b'echo:', body]
+
+
+@contextlib.asynccontextmanager
+async def serving(app, **options):
+    sock = socket.socket()
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    server = AsyncWSGIServer(app, threads=options.pop('threads', 2), **options)
+    await server.start(sock)
+    try:
+        yield server, sock.getsockname()[1]
+    finally:
+        await server.shutdown(timeout=0)
+
+
+async def exchange(port, request):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(request)
+    await writer.drain()
+    response = await asyncio.wait_for(reader.read(), 5)
+    writer.close()
+    return response
+
+
+def test_buffered_response_gets_a_content_length():
+    async def scenario():
+        async with serving(echo_app) as (server, port):
+            response = await exchange(port, b'POST /x HTTP/1.1\r\nContent-Length: 3\r\n'
+                                            b'Connection: close\r\n\r\nabc')
+            assert server.stats['requests'] == 1
+        return response
+
+    head, _, body = asyncio.run(scenario()).partition(b'\r\n\r\n')
+    assert head.startswith(b'HTTP/1.1 200 OK')
+    assert b'Content-Length: 8' in head
+    assert b'Connection: close' in head
+    assert body == b'echo:abc'
+
+
+def test_chunked_request_body_is_reassembled():
+    async def scenario():
+        async with serving(echo_app) as (_, port):
+            return await exchange(port, b'POST /x HTTP/1.1\r\nTransfer-Encoding: chunked\r\n'
+                                        b'Connection: close\r\n\r\n'
+                                        b'3;ext=1\r\nabc\r\n2\r\nde\r\n0\r\nX-Trailer: 1\r\n\r\n')
+
+    assert asyncio.run(scenario()).endswith(b'\r\n\r\necho:abcde')
+
+
+def test_bad_chunk_size_is_a_400():
+    async def scenario():
+        async with serving(echo_app) as (_, port):
+            return await exchange(port, b'POST /x HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n'
+                                        b'zz\r\n')
+
+    assert asyncio.run(scenario()).startswith(b'HTTP/1.1 400 Bad Request')
+
+
+def test_stalled_chunked_body_is_closed_after_header_timeout():
+    async def scenario():
+        async with serving(echo_app, header_timeout=0.2) as (_, port):
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            writer.write(b'POST /x HTTP/1.1\r\nTransfer-Encoding: chunked\r\n\r\n5\r\nab')
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), 5)
+            writer.close()
+            return response
+
+    # Closed without a response instead of holding the connection open forever
+    assert asyncio.run(scenario()) == b''
+
+
+def test_streaming_error_cuts_the_connection_short():
+    def failing_app(environ, start_response):
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        yield b'x' * async_server.BUFFER_BYTES
+        raise RuntimeError('lost the database')
+
+    async def scenario():
+        async with serving(failing_app) as (_, port):
+            return await exchange(port, b'GET /x HTTP/1.1\r\n\r\n')
+
+    response = asyncio.run(scenario())
+    assert b'Transfer-Encoding: chunked' in response
+    # No terminating chunk, so the client can tell the body is incomplete
+    assert not response.endswith(b'0\r\n\r\n')
+
+
+def test_requests_beyond_max_pending_get_503():
+    release = threading.Event()
+
+    def held_app(environ, start_response):
+        release.wait(5)
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+        return [b'ok']
+
+    async def scenario():
+        async with serving(held_app, threads=1, max_pending=1) as (server, port):
+            request = b'GET /x HTTP/1.1\r\nConnection: close\r\n\r\n'
+            first = asyncio.ensure_future(exchange(port, request))
+            while server.stats['max_waiting'] < 1:
+                await asyncio.sleep(0.01)
+            second = asyncio.ensure_future(exchange(port, request))
+            while server._waiting < 1:
+                await asyncio.sleep(0.01)
+            rejected = await exchange(port, request)
+            release.set()
+            return rejected, await first, await second, server.stats['rejected']
+
+    rejected, first, second, count = asyncio.run(scenario())
+    assert rejected.startswith(b'HTTP/1.1 503 Service Unavailable')
+    assert b'Retry-After: 1' in rejected
+    assert first.endswith(b'ok') and second.endswith(b'ok')
+    assert count == 1
@@ -0,0 +1,105 @@
+"""
+ClaimEase Authentication Cache Tests
+Verified-token caching, per-user context caching and the /api/stats/cache response
+"""
+
+import time
+
+import jwt
+import pytest
+
+import auth_cache
+from auth_cache import decode_token, get_user_context, invalidate_user
+from cache import TTLCache
+from data_access import notify_table_write
+
+SECRET = 'test-secret'
+
+
+@pytest.fixture(autouse=True)
+def caches(monkeypatch):
+    monkeypatch.setattr(auth_cache, 'token_cache', TTLCache(300, 100))
+    monkeypatch.setattr(auth_cache, 'user_context_cache', TTLCache(60, 100))
+
+
+def counting_decoder():
+    calls = []
+
+    def decode(token):
+        calls.append(token)
+        return jwt.decode(token, SECRET, algorithms=['HS256'])
+
+    return decode, calls
+
+
+def test_verified_token_is_decoded_once():
+    token = jwt.encode({'user_id': 7, 'exp': time.time() + 3600}, SECRET, algorithm='HS256')
+    decode, calls = counting_decoder()
+    assert decode_token(token, decode)['user_id'] == 7
+    assert decode_token(token, decode)['user_id'] == 7
+    assert len(calls) == 1
+
+
+def test_invalid_token_is_never_cached():
+    token = jwt.encode({'user_id': 7}, 'wrong-secret', algorithm='HS256')
+    decode, calls = counting_decoder()
+    for _ in range(2):
+        with pytest.raises(jwt.InvalidSignatureError):
+            decode_token(token, decode)
+    assert len(calls) == 2
+    assert auth_cache.token_cache.stats()['entries'] == 0
+
+
+def test_cached_token_does_not_outlive_its_expiry(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, 'time', lambda: now[0])
+    monkeypatch.setattr(time, 'monotonic', lambda: now[0])
+    claims = {'user_id': 7, 'exp': now[0] + 30}
+    calls = []
+    decode = lambda token: calls.append(token) or claims
+    decode_token('t', decode)
+    now[0] += 29
+    decode_token('t', decode)
+    now[0] += 2
+    decode_token('t', decode)
+    assert len(calls) == 2
+
+
+def test_user_context_is_cached_until_that_user_changes(monkeypatch):
+    calls = []
+
+    def fetch_one(name, params=()):
+        calls.append((name, params))
+        return {'user_id': params[0], 'policy_id': 3}
+
+    monkeypatch.setattr(auth_cache, 'fetch_one', fetch_one)
+    assert get_user_context(7)['policy_id'] == 3
+    get_user_context(7)
+    get_user_context(8)
+    assert calls == [('user_context', (7,)), ('user_context', (8,))]
+    invalidate_user(7)
+    get_user_context(7)
+    get_user_context(8)
+    assert calls[2:] == [('user_context', (7,))]
+
+
+def test_registration_keeps_cached_contexts(monkeypatch):
+    import flask_api
+
+    monkeypatch.setattr(auth_cache, 'fetch_one', lambda name, params=(): {'user_id': params[0]})
+    monkeypatch.setattr(flask_api, 'user_context_cache', auth_cache.user_context_cache)
+    get_user_context(7)
+    notify_table_write('Users')
+    assert auth_cache.user_context_cache.stats()['entries'] == 1
+
+
+def test_cache_stats_keep_reference_counters_at_top_level():
+    from flask_api import app
+
+    response = app.test_client().get('/api/stats/cache')
+    stats = response.get_json()
+    assert response.status_code == 200
+    # Reference-cache counters stay where existing clients read them
+    assert {'hits', 'misses', 'entries', 'hit_ratio', 'ttl_seconds'} <= set(stats)
+    assert {'hits', 'entries'} <= set(stats['tokens'])
+    assert {'hits', 'entries'} <= set(stats['user_context'])
@@ -0,0 +1,128 @@
+"""
+ClaimEase Reference Cache Tests
+TTL expiry, LRU eviction, table invalidation and cache keys of cache.TTLCache
+"""
+
+import pytest
+
+import cache
+from cache import TTLCache, cache_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+def test_entry_expires_after_ttl(clock):
+    entries = TTLCache(ttl_seconds=10)
+    entries.set('k', 'v')
+    clock[0] += 9
+    assert entries.get('k') == (True, 'v')
+    clock[0] += 2
+    assert entries.get('k') == (False, None)
+    assert entries.stats()['expirations'] == 1
+
+
+def test_per_entry_ttl_only_shortens(clock):
+    entries = TTLCache(ttl_seconds=10)
+    entries.set('short', 1, ttl_seconds=2)
+    entries.set('long', 2, ttl_seconds=60)
+    clock[0] += 5
+    assert entries.get('short') == (False, None)
+    assert entries.get('long') == (True, 2)
+    clock[0] += 6
+    assert entries.get('long') == (False, None)
+
+
+def test_non_positive_ttl_is_not_stored():
+    entries = TTLCache()
+    entries.set('k', 'v', ttl_seconds=0)
+    assert entries.stats()['entries'] == 0
+
+
+def test_least_recently_used_is_evicted():
+    entries = TTLCache(max_entries=2)
+    entries.set('a', 1)
+    entries.set('b', 2)
+    entries.get('a')
+    entries.set('c', 3)
+    assert entries.get('b') == (False, None)
+    assert entries.get('a') == (True, 1)
+    assert entries.stats()['evictions'] == 1
+
+
+def test_invalidate_drops_entries_of_written_tables():
+    entries = TTLCache()
+    entries.set('hospitals', 1, tables=('Hospitals',))
+    entries.set('network', 2, tables=('Hospitals', 'Insurance_Companies'))
+    entries.set('policies', 3, tables=('Policies',))
+    entries.invalidate('hospitals')
+    assert entries.get('hospitals')[0] is False
+    assert entries.get('network')[0] is False
+    assert entries.get('policies') == (True, 3)
+    assert entries.stats()['invalidations'] == 2
+
+
+def test_invalidate_without_tables_clears_everything():
+    entries = TTLCache()
+    entries.set('a', 1, tables=('Hospitals',))
+    entries.set('b', 2)
+    entries.invalidate()
+    assert entries.stats()['entries'] == 0
+
+
+def test_load_racing_an_invalidation_is_not_cached():
+    entries = TTLCache()
+
+    def loader():
+        # A write commits while the query runs
+        entries.invalidate('Hospitals')
+        return 'stale'
+
+    assert entries.get_or_load('k', loader, tables=('Hospitals',)) == 'stale'
+    assert entries.get('k') == (False, None)
+
+
+def test_discard_drops_one_entry_and_racing_loads():
+    entries = TTLCache()
+    entries.set('a', 1)
+    entries.set('b', 2)
+    entries.discard('a')
+    entries.discard('missing')
+    assert entries.get('a') == (False, None)
+    assert entries.get('b') == (True, 2)
+    assert entries.stats()['invalidations'] == 1
+
+    def loader():
+        entries.discard('c')
+        return 'stale'
+
+    entries.get_or_load('c', loader)
+    assert entries.get('c') == (False, None)
+
+
+def test_get_or_load_calls_loader_once():
+    entries = TTLCache()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        return 'v'
+
+    assert entries.get_or_load('k', loader) == 'v'
+    assert entries.get_or_load('k', loader) == 'v'
+    assert len(calls) == 1
+    assert entries.stats()['hit_ratio'] == 0.5
+
+
+def test_cache_key_normalizes_filters():
+    assert (cache_key('hospitals', {'city': ' Delhi ', 'state': ''}, ('city', 'state')) ==
+            cache_key('hospitals', {'city': 'delhi'}, ('state', 'city')))
+
+
+def test_cache_key_ignores_unlisted_params_and_keeps_extra():
+    key = cache_key('hospitals', {'city': 'Pune', 'debug': '1'}, ('city',), extra=(20, 'AbC'))
+    assert key == ('hospitals', (('city', 'pune'),), (20, 'AbC'))
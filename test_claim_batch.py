@@ -0,0 +1,196 @@
+"""
+ClaimEase Bulk Claim Ingestion Tests
+Per-item validation and batch insert behaviour of claim_batch, with the database faked
+"""
+
+from contextlib import contextmanager
+
+import pytest
+
+import claim_batch
+from claim_batch import BatchStats, _validate, ingest_claims
+
+
+def claim(**overrides):
+    item = {'hospital_id': 1, 'claim_type': 'Cashless', 'treatment_type': 'Surgery',
+            'claim_amount': '125000.50', 'diagnosis': 'Appendicitis',
+            'admission_date': '2024-05-01', 'discharge_date': '2024-05-04'}
+    item.update(overrides)
+    return item
+
+
+def test_valid_item_has_no_errors():
+    assert _validate(claim(), 7) == (7, [])
+
+
+def test_missing_required_fields():
+    user_id, errors = _validate({}, 7)
+    assert errors == [f'{field} is required' for field in claim_batch.REQUIRED_FIELDS]
+
+
+def test_non_object_item():
+    assert _validate(['not', 'a', 'claim'], 7) == (None, ['item must be an object'])
+
+
+@pytest.mark.parametrize('amount, error', [
+    ('Infinity', 'claim_amount must be a finite number'),
+    ('NaN', 'claim_amount must be a finite number'),
+    ('-5', 'claim_amount must be positive'),
+    (0, 'claim_amount must be positive'),
+    ('1e13', 'claim_amount is too large'),
+    ('lots', 'claim_amount must be a number'),
+])
+def test_invalid_claim_amount(amount, error):
+    assert _validate(claim(claim_amount=amount), 7)[1] == [error]
+
+
+@pytest.mark.parametrize('overrides, error', [
+    ({'admission_date': '01/05/2024'}, 'admission_date must be a date (YYYY-MM-DD)'),
+    ({'discharge_date': 20240504}, 'discharge_date must be a date (YYYY-MM-DD)'),
+    ({'discharge_date': '2024-04-30'}, 'discharge_date must not be before admission_date'),
+    ({'diagnosis': ['Appendicitis']}, 'diagnosis must be a string'),
+    ({'treatment_type': 'x' * 101}, 'treatment_type must be at most 100 characters'),
+    ({'room_type': 5}, 'room_type must be a string'),
+    ({'is_emergency': 'yes'}, 'is_emergency must be true or false'),
+    ({'claim_type': 'Direct'}, 'claim_type must be one of Cashless, Reimbursement'),
+    ({'hospital_id': 'abc'}, 'hospital_id must be an integer'),
+])
+def test_invalid_fields(overrides, error):
+    assert _validate(claim(**overrides), 7)[1] == [error]
+
+
+def test_dates_are_optional():
+    assert _validate(claim(admission_date=None, discharge_date=''), 7)[1] == []
+
+
+def test_submitting_for_another_user(monkeypatch):
+    assert _validate(claim(user_id=8), 7)[1] == ['Not allowed to submit claims for another user']
+    monkeypatch.setattr(claim_batch, 'BATCH_SUBMITTER_IDS', {7})
+    assert _validate(claim(user_id='8'), 7) == (8, [])
+
+
+class FakeDB:
+    def __init__(self, state):
+        self.state = state
+
+    def fetch_in(self, name, sql_template, values):
+        if name == 'batch_user_policies':
+            return [{'user_id': user_id, 'policy_id': self.state.policies[user_id]}
+                    for user_id in values if user_id in self.state.policies]
+        return [{'hospital_id': hospital_id} for hospital_id in values
+                if hospital_id in self.state.hospitals]
+
+    def execute_many(self, name, params):
+        if self.state.fail_insert:
+            raise RuntimeError('deadlock')
+        self.state.inserted.append(list(params))
+
+    def commit(self):
+        self.state.commits += 1
+
+    def rollback(self):
+        self.state.rollbacks += 1
+
+
+class FakeState:
+    def __init__(self):
+        self.policies = {7: 3, 8: None}
+        self.hospitals = {1, 2}
+        self.inserted = []
+        self.commits = 0
+        self.rollbacks = 0
+        self.fail_insert = False
+        self.open_sessions = 0
+        self.max_open_sessions = 0
+
+
+class FakeAllocator:
+    def __init__(self, state):
+        self.state = state
+        self.next = 0
+
+    def next_claim_numbers(self, count):
+        # A block reservation checks out its own connection
+        assert self.state.open_sessions == 0
+        numbers = [f'CLM{self.next + n:04d}' for n in range(count)]
+        self.next += count
+        return numbers
+
+
+@pytest.fixture
+def db(monkeypatch):
+    state = FakeState()
+
+    @contextmanager
+    def db_session():
+        state.open_sessions += 1
+        state.max_open_sessions = max(state.max_open_sessions, state.open_sessions)
+        try:
+            yield FakeDB(state)
+        finally:
+            state.open_sessions -= 1
+
+    monkeypatch.setattr(claim_batch, 'db_session', db_session)
+    monkeypatch.setattr(claim_batch, 'claim_number_allocator', FakeAllocator(state))
+    monkeypatch.setattr(claim_batch, 'batch_stats', BatchStats())
+    return state
+
+
+def statuses(results):
+    return [result['status'] for result in results]
+
+
+def test_batch_inserts_valid_items_and_rejects_the_rest(db):
+    items = [claim(), claim(claim_amount='Infinity'), claim(hospital_id=9), claim(hospital_id=2)]
+    results, summary = ingest_claims(items, 7)
+    assert statuses(results) == ['created', 'rejected', 'rejected', 'created']
+    assert results[2]['errors'] == ['Hospital not found']
+    assert [result.get('claim_number') for result in results] == ['CLM0000', None, None,
+                                                                   'CLM0001']
+    assert summary['received'] == 4 and summary['inserted'] == 2 and summary['rejected'] == 2
+    assert db.commits == 1
+    assert db.max_open_sessions == 1
+
+
+def test_user_without_policy_is_rejected(monkeypatch, db):
+    monkeypatch.setattr(claim_batch, 'BATCH_SUBMITTER_IDS', {7})
+    results, _ = ingest_claims([claim(user_id=8)], 7)
+    assert results[0]['errors'] == ['User does not have an active policy']
+
+
+def test_atomic_batch_skips_valid_items_when_any_is_invalid(db):
+    results, summary = ingest_claims([claim(), claim(claim_type='Direct')], 7, atomic=True)
+    assert statuses(results) == ['skipped', 'rejected']
+    assert summary['inserted'] == 0
+    assert db.inserted == []
+
+
+def test_insert_params_map_optional_fields(db):
+    ingest_claims([claim(admission_date='', discharge_date=None, is_emergency=True)], 7)
+    (row,) = db.inserted[0]
+    assert row[:6] == ('CLM0000', 7, 1, 3, 'Cashless', 'Surgery')
+    assert row[6] is None and row[7] is None
+    assert row[-1] is True
+
+
+def test_inserts_are_chunked(monkeypatch, db):
+    monkeypatch.setattr(claim_batch, 'INSERT_CHUNK_SIZE', 2)
+    ingest_claims([claim() for _ in range(5)], 7)
+    assert [len(chunk) for chunk in db.inserted] == [2, 2, 1]
+    assert db.commits == 1
+
+
+def test_failed_insert_rolls_back(db):
+    db.fail_insert = True
+    with pytest.raises(RuntimeError):
+        ingest_claims([claim()], 7)
+    assert db.rollbacks == 1 and db.commits == 0
+
+
+def test_batch_stats_totals():
+    stats = BatchStats()
+    stats.record(10, 8, 0.5)
+    stats.record(4, 4, 0.5)
+    snapshot = stats.snapshot()
+    assert snapshot['rejected'] == 2
+    assert snapshot['rows_per_second'] == pytest.approx(12.0)
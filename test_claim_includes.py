@@ -0,0 +1,70 @@
+"""
+ClaimEase Claim Include Tests
+?include= parsing and batched relation loading of claim_includes
+"""
+
+import pytest
+
+from claim_includes import InvalidIncludeError, load_includes, parse_includes
+
+
+class FakeDB:
+    def __init__(self):
+        self.lookups = []
+        self.tables = {
+            'include_documents': [
+                {'claim_id': 1, 'document_id': 10, 'document_name': 'bill.pdf'},
+                {'claim_id': 1, 'document_id': 11, 'document_name': 'scan.png'},
+                {'claim_id': 3, 'document_id': 12, 'document_name': 'report.pdf'}
+            ],
+            'include_hospital': [{'hospital_id': 5, 'hospital_name': 'Ruby Hall Clinic'}],
+            'include_policy': [{'policy_id': 9, 'policy_name': 'Family Floater'}]
+        }
+
+    def fetch_in(self, name, sql_template, values):
+        self.lookups.append((name, sorted(values)))
+        key = {'include_documents': 'claim_id', 'include_hospital': 'hospital_id',
+               'include_policy': 'policy_id'}[name]
+        return [dict(row) for row in self.tables[name] if row[key] in values]
+
+
+def claims():
+    return [{'claim_id': 1, 'hospital_id': 5, 'policy_id': 9},
+            {'claim_id': 2, 'hospital_id': 5, 'policy_id': None},
+            {'claim_id': 3, 'hospital_id': 6, 'policy_id': 9}]
+
+
+def test_parse_includes():
+    assert parse_includes({'include': ' Documents, hospital ,,'}) == ['documents', 'hospital']
+    assert parse_includes({}, default=('documents',)) == ['documents']
+    assert parse_includes({'include': ''}, default=('documents',)) == []
+
+
+def test_unknown_include_is_rejected():
+    with pytest.raises(InvalidIncludeError) as error:
+        parse_includes({'include': 'documents,payments'})
+    assert 'payments' in str(error.value)
+
+
+def test_one_query_per_relation():
+    db = FakeDB()
+    rows = load_includes(db, claims(), ['documents', 'hospital', 'policy'])
+    assert db.lookups == [('include_documents', [1, 2, 3]), ('include_hospital', [5, 6]),
+                          ('include_policy', [9])]
+    assert [doc['document_id'] for doc in rows[0]['documents']] == [10, 11]
+    assert rows[1]['documents'] == []
+    assert rows[2]['hospital'] is None
+    assert rows[0]['policy']['policy_name'] == 'Family Floater'
+    assert rows[1]['policy'] is None
+
+
+def test_documents_drop_the_repeated_claim_id():
+    rows = load_includes(FakeDB(), claims(), ['documents'])
+    assert 'claim_id' not in rows[0]['documents'][0]
+
+
+def test_no_query_without_keys():
+    db = FakeDB()
+    rows = load_includes(db, [{'claim_id': 1, 'policy_id': None}], ['policy'])
+    assert db.lookups == []
+    assert rows[0]['policy'] is None
@@ -0,0 +1,124 @@
+"""
+ClaimEase Claim Number Tests
+Block reservation, uniqueness across threads and formatting of claim_numbers.ClaimNumberAllocator
+"""
+
+import re
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+import claim_numbers
+from claim_numbers import ClaimNumberAllocator
+
+
+class FakeSequence:
+    """Claim_Number_Sequence rows, advanced the way the UPDATE ... LAST_INSERT_ID() query does"""
+
+    def __init__(self):
+        self.values = {}
+        self.reservations = []
+        self.commits = 0
+        self._lock = threading.Lock()
+        self._last_insert_id = None
+
+    def execute(self, name, params=()):
+        result = type('Cursor', (), {'rowcount': 0})()
+        if name == 'create_claim_number_sequence':
+            self.values.setdefault(params[0], 0)
+        elif name == 'reserve_claim_numbers':
+            size, sequence = params
+            with self._lock:
+                if sequence in self.values:
+                    self.values[sequence] += size
+                    self._last_insert_id = self.values[sequence]
+                    self.reservations.append(size)
+                    result.rowcount = 1
+        return result
+
+    def fetch_one(self, name, params=()):
+        return {'value': self._last_insert_id}
+
+    def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture
+def sequence(monkeypatch):
+    fake = FakeSequence()
+    lock = threading.Lock()
+
+    @contextmanager
+    def db_session():
+        # One connection per session, as with the real pool
+        with lock:
+            yield fake
+
+    monkeypatch.setattr(claim_numbers, 'db_session', db_session)
+    return fake
+
+
+def test_first_use_creates_the_sequence_row(sequence):
+    allocator = ClaimNumberAllocator(block_size=10)
+    assert allocator.next_value() == 0
+    assert sequence.values == {'claims': 10}
+    assert sequence.commits == 1
+
+
+def test_values_come_from_one_block_until_it_runs_out(sequence):
+    allocator = ClaimNumberAllocator(block_size=3)
+    assert [allocator.next_value() for _ in range(4)] == [0, 1, 2, 3]
+    assert sequence.reservations == [3, 3]
+    assert allocator.stats()['remaining_in_block'] == 2
+
+
+def test_next_values_uses_the_rest_of_the_block_first(sequence):
+    allocator = ClaimNumberAllocator(block_size=5)
+    allocator.next_value()
+    assert allocator.next_values(3) == [1, 2, 3]
+    assert allocator.next_values(4) == [4, 5, 6, 7]
+    assert sequence.reservations == [5, 5]
+
+
+def test_large_batch_reserves_one_big_block(sequence):
+    allocator = ClaimNumberAllocator(block_size=5)
+    assert allocator.next_values(12) == list(range(12))
+    assert sequence.reservations == [12]
+
+
+def test_allocators_sharing_a_sequence_never_overlap(sequence):
+    first = ClaimNumberAllocator(block_size=4)
+    second = ClaimNumberAllocator(block_size=4)
+    values = [first.next_value(), second.next_value(), first.next_value(), second.next_value()]
+    assert values == [0, 4, 1, 5]
+
+
+def test_concurrent_threads_get_unique_values(sequence):
+    allocator = ClaimNumberAllocator(block_size=7)
+    values = []
+
+    def take():
+        values.extend(allocator.next_value() for _ in range(50))
+
+    threads = [threading.Thread(target=take) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(values) == list(range(400))
+
+
+def test_reset_skips_the_rest_of_the_block(sequence):
+    allocator = ClaimNumberAllocator(block_size=10)
+    allocator.next_value()
+    allocator.reset()
+    assert allocator.next_value() == 10
+
+
+def test_claim_number_format(sequence):
+    allocator = ClaimNumberAllocator(block_size=10)
+    allocator.next_value()
+    number = allocator.next_claim_number()
+    assert re.fullmatch(r'CLM\d{8}0000000001', number)
+    assert [n[-10:] for n in allocator.next_claim_numbers(2)] == ['0000000002', '0000000003']
@@ -0,0 +1,119 @@
+"""
+ClaimEase Response Encoding Tests
+Accept-Encoding negotiation, response compression and the fast JSON provider
+"""
+
+import datetime
+import gzip
+from decimal import Decimal
+
+import pytest
+from flask import Flask, jsonify, send_file
+
+import compression
+import json_output
+from compression import ResponseCompressor, choose_encoding, parse_accept_encoding
+from json_output import FastJSONProvider
+
+ROWS = [{'claim_id': n, 'claim_amount': Decimal('125000.50'), 'status': 'Pending'}
+        for n in range(100)]
+
+
+def make_app():
+    app = Flask(__name__)
+    app.json = FastJSONProvider(app)
+    ResponseCompressor(min_size=1024).init_app(app)
+
+    @app.route('/claims')
+    def claims():
+        response = jsonify(ROWS)
+        response.set_etag('abc')
+        return response
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    @app.route('/stream')
+    def stream():
+        return app.response_class((b'x' * 2048 for _ in range(2)), mimetype='text/plain')
+
+    @app.route('/file')
+    def file():
+        return send_file(__file__, mimetype='text/plain')
+
+    return app
+
+
+def test_parse_accept_encoding():
+    assert parse_accept_encoding('gzip;q=0.8, br, identity;q=bad, ') == {
+        'gzip': 0.8, 'br': 1.0, 'identity': 0.0}
+    assert parse_accept_encoding(None) == {}
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('gzip, deflate, br', 'br'),
+    ('gzip;q=1.0, br;q=0.5', 'gzip'),
+    ('br;q=0, gzip;q=0', None),
+    ('*', 'br'),
+    ('identity', None),
+    ('', None),
+])
+def test_choose_encoding_with_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, 'brotli', object())
+    assert choose_encoding(header) == expected
+
+
+def test_choose_encoding_without_brotli(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    assert choose_encoding('br, gzip;q=0.5') == 'gzip'
+    assert choose_encoding('br') is None
+
+
+def test_large_json_is_gzipped(monkeypatch):
+    monkeypatch.setattr(compression, 'brotli', None)
+    response = make_app().test_client().get('/claims', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == '"abc-gzip"'
+    assert gzip.decompress(response.data).startswith(b'[{"claim_id":0,')
+
+
+@pytest.mark.parametrize('path, headers', [
+    ('/claims', {}),
+    ('/small', {'Accept-Encoding': 'gzip'}),
+    ('/stream', {'Accept-Encoding': 'gzip'}),
+    ('/file', {'Accept-Encoding': 'gzip'}),
+])
+def test_responses_left_uncompressed(path, headers):
+    response = make_app().test_client().get(path, headers=headers)
+    assert 'Content-Encoding' not in response.headers
+
+
+def test_json_matches_flask_formats():
+    app = Flask(__name__)
+    provider = FastJSONProvider(app)
+    row = {'amount': Decimal('10.50'), 'admitted': datetime.date(2024, 1, 3),
+           'stay': datetime.timedelta(hours=2), 'name': 'Ünnati'}
+    assert provider.loads(provider.dumps(row)) == {
+        'amount': '10.50', 'admitted': 'Wed, 03 Jan 2024 00:00:00 GMT', 'stay': '2:00:00',
+        'name': 'Ünnati'}
+
+
+def test_json_iso_dates(monkeypatch):
+    monkeypatch.setattr(json_output, 'JSON_DATE_FORMAT', 'iso')
+    provider = FastJSONProvider(Flask(__name__))
+    assert provider.dumps({'at': datetime.datetime(2024, 1, 3, 9, 30)}) == (
+        '{"at":"2024-01-03T09:30:00"}')
+
+
+def test_json_without_orjson_keeps_row_order(monkeypatch):
+    monkeypatch.setattr(json_output, 'orjson', None)
+    provider = FastJSONProvider(Flask(__name__))
+    assert provider.dumps_bytes({'z': 1, 'a': Decimal('2')}) == b'{"z":1,"a":"2"}'
+
+
+def test_unknown_types_are_rejected():
+    provider = FastJSONProvider(Flask(__name__))
+    with pytest.raises(TypeError):
+        provider.dumps({'value': object()})
@@ -0,0 +1,113 @@
+"""
+ClaimEase Dashboard Statistics Tests
+Reconciliation, claim status buckets and per-table recounts of dashboard_stats.DashboardSummary
+"""
+
+import pytest
+
+import dashboard_stats
+from dashboard_stats import DashboardSummary
+
+
+ROWS = {
+    'count_active_hospitals': [{'total': 120}],
+    'count_insurance_companies': [{'total': 8}],
+    'count_active_policies': [{'total': 30}],
+    'count_verified_users': [{'total': 500}],
+    'claims_by_status': [{'claim_status': 'Pending', 'count': 4},
+                         {'claim_status': 'Approved', 'count': 2}],
+    'top_states_by_hospitals': [{'state_name': 'Maharashtra', 'total_hospitals': 40}]
+}
+
+
+@pytest.fixture
+def db(fake_db):
+    return fake_db(dashboard_stats, ROWS)
+
+
+@pytest.fixture
+def summary(db):
+    summary = DashboardSummary(reconcile_seconds=3600)
+    yield summary
+    summary.stop()
+
+
+def statuses(snapshot):
+    return {row['claim_status']: row['count'] for row in snapshot['claims_by_status']}
+
+
+def test_first_snapshot_loads_from_database(summary, db):
+    snapshot = summary.snapshot()
+    assert snapshot['total_hospitals'] == 120
+    assert snapshot['total_users'] == 500
+    assert statuses(snapshot) == {'Pending': 4, 'Approved': 2}
+    assert snapshot['top_states_by_hospitals'][0]['state_name'] == 'Maharashtra'
+    summary.snapshot()
+    assert db.count('claims_by_status') == 1
+
+
+def test_claim_status_moves_between_buckets(summary):
+    summary.snapshot()
+    summary.record_claim_status(None, 'Pending', 3)
+    summary.record_claim_status('Pending', 'Approved')
+    assert statuses(summary.snapshot()) == {'Pending': 6, 'Approved': 3}
+
+
+def test_emptied_status_bucket_is_removed(summary):
+    summary.snapshot()
+    summary.record_claim_status('Approved', 'Rejected', 2)
+    assert statuses(summary.snapshot()) == {'Pending': 4, 'Rejected': 2}
+
+
+def test_claim_status_before_first_load_is_ignored(summary, db):
+    summary.record_claim_status(None, 'Pending')
+    assert statuses(summary.snapshot()) == {'Pending': 4, 'Approved': 2}
+
+
+def test_table_write_recounts_only_its_counter(summary, db):
+    summary.snapshot()
+    db.rows['count_active_hospitals'][0]['total'] = 121
+    db.rows['count_active_policies'][0]['total'] = 31
+    assert summary.snapshot()['total_hospitals'] == 120
+    summary.mark_stale({'Hospitals', 'Claims'})
+    snapshot = summary.snapshot()
+    assert (snapshot['total_hospitals'], snapshot['total_policies']) == (121, 30)
+    assert db.count('count_active_hospitals') == 2
+    assert db.count('count_active_policies') == 1
+    assert db.count('claims_by_status') == db.count('top_states_by_hospitals') == 1
+
+
+def test_registrations_do_not_recount(summary, db):
+    summary.snapshot()
+    summary.mark_stale({'Users'})
+    summary.snapshot()
+    assert len(db.calls) == len(ROWS)
+
+
+def test_write_during_recount_is_not_lost(summary, db):
+    summary.snapshot()
+    summary.mark_stale({'Policies'})
+    db.during_load = lambda: summary.mark_stale({'Policies'})
+    summary.snapshot()
+    db.during_load = None
+    summary.snapshot()
+    summary.snapshot()
+    assert db.count('count_active_policies') == 3
+
+
+def test_failed_recount_is_retried(summary, db):
+    summary.snapshot()
+    summary.mark_stale({'Hospitals'})
+    db.error = RuntimeError('connection lost')
+    with pytest.raises(RuntimeError):
+        summary.snapshot()
+    db.error = None
+    db.rows['count_active_hospitals'][0]['total'] = 125
+    assert summary.snapshot()['total_hospitals'] == 125
+
+
+def test_reconcile_corrects_drift(summary, db):
+    summary.snapshot()
+    summary.record_claim_status(None, 'Pending', 10)
+    summary.reconcile()
+    assert statuses(summary.snapshot()) == {'Pending': 4, 'Approved': 2}
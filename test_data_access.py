@@ -0,0 +1,275 @@
+"""
+ClaimEase Data Access Tests
+Named queries, prepared statements, write notifications, shared connections and row streams on a fake connection
+"""
+
+import pytest
+from mysql.connector import Error
+
+import data_access
+from data_access import (DBSession, DatabaseUnavailableError, QueryStats, WRITE_TABLE_PATTERN,
+                         db_session, in_placeholders, shared_connection)
+
+
+class FakeCursor:
+    def __init__(self, connection, prepared):
+        self.connection = connection
+        self.prepared = prepared
+        self.rowcount = 0
+        self.closed = False
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        if self.connection.fail:
+            raise Error(msg='query failed')
+        self.connection.executed.append((sql, params))
+        self._rows = list(self.connection.rows)
+        self.rowcount = len(self._rows) or 1
+
+    def executemany(self, sql, seq_params):
+        self.connection.executed.append((sql, seq_params))
+        self.rowcount = len(seq_params)
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    """Stands in for both a PooledConnection and its raw connection"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.executed = []
+        self.cursors = []
+        self.fail = False
+        self.commits = 0
+        self.rollbacks = 0
+        self.closed = False
+        self.disconnected = False
+
+    @property
+    def raw(self):
+        return self
+
+    def cursor(self, prepared=False, dictionary=False):
+        self.cursors.append(FakeCursor(self, prepared))
+        return self.cursors[-1]
+
+    def commit(self):
+        self.commits += 1
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def disconnect(self):
+        self.disconnected = True
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def checkout(monkeypatch):
+    """Route pool checkouts to fresh fake connections, returned in checkout order"""
+    connections = []
+
+    def get_connection():
+        connections.append(FakeConnection(rows=[{'id': 1}, {'id': 2}]))
+        return connections[-1]
+
+    monkeypatch.setattr(data_access.db_pool, 'get_connection', get_connection)
+    return connections
+
+
+@pytest.fixture
+def listeners(monkeypatch):
+    calls = []
+    monkeypatch.setattr(data_access, '_write_listeners', [calls.append])
+    return calls
+
+
+def test_prepared_cursor_reused_per_query():
+    connection = FakeConnection(rows=[{'user_id': 7}])
+    db = DBSession(connection)
+    assert db.fetch_one('user_by_email', ('a@example.com',)) == {'user_id': 7}
+    db.fetch_one('user_by_email', ('b@example.com',))
+    assert len(connection.cursors) == 1
+    assert connection.cursors[0].prepared
+    # The cached SQL object itself is passed back, so the connector does not re-prepare
+    assert connection.executed[0][0] is connection.executed[1][0]
+
+
+def test_statement_cache_is_shared_by_sessions_on_one_connection():
+    connection = FakeConnection()
+    DBSession(connection).fetch_all('active_hospitals')
+    DBSession(connection).fetch_all('active_hospitals')
+    assert len(connection.cursors) == 1
+
+
+def test_statement_cache_closes_least_recently_used(monkeypatch):
+    monkeypatch.setattr(data_access, 'MAX_STATEMENTS_PER_CONNECTION', 2)
+    connection = FakeConnection()
+    db = DBSession(connection)
+    for name in ('active_hospitals', 'database_version', 'active_hospitals',
+                 'active_empanelments'):
+        db.fetch_all(name)
+    first, second, third = connection.cursors
+    assert second.closed
+    assert not first.closed and not third.closed
+
+
+def test_commit_notifies_written_tables(listeners):
+    db = DBSession(FakeConnection())
+    db.execute('insert_user', (None,) * 11)
+    assert listeners == []
+    db.commit()
+    assert listeners == [{'Users'}]
+    db.commit()
+    assert listeners == [{'Users'}]
+
+
+def test_rollback_drops_written_tables(listeners):
+    db = DBSession(FakeConnection())
+    db.execute('insert_user', (None,) * 11)
+    db.rollback()
+    db.commit()
+    assert listeners == []
+
+
+def test_listener_errors_do_not_stop_other_listeners(monkeypatch):
+    calls = []
+
+    def broken(tables):
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(data_access, '_write_listeners', [broken, calls.append])
+    data_access.notify_table_write('Claims')
+    assert calls == [{'Claims'}]
+
+
+@pytest.mark.parametrize('sql, table', [
+    ('INSERT INTO Claims (a) VALUES (%s)', 'Claims'),
+    ('  insert ignore into `Documents` VALUES (%s)', 'Documents'),
+    ('UPDATE Hospitals SET is_active = FALSE', 'Hospitals'),
+    ('DELETE FROM Claim_Documents WHERE claim_id = %s', 'Claim_Documents'),
+    ('REPLACE INTO Users VALUES (%s)', 'Users'),
+])
+def test_write_table_pattern(sql, table):
+    assert WRITE_TABLE_PATTERN.match(sql).group(1) == table
+
+
+def test_write_table_pattern_ignores_reads():
+    assert WRITE_TABLE_PATTERN.match('SELECT * FROM Claims') is None
+
+
+def test_failed_query_is_counted_as_error(monkeypatch):
+    stats = QueryStats()
+    monkeypatch.setattr(data_access, 'query_stats', stats)
+    connection = FakeConnection()
+    connection.fail = True
+    with pytest.raises(Error):
+        DBSession(connection).fetch_all('active_hospitals')
+    assert stats.snapshot()['active_hospitals']['errors'] == 1
+
+
+def test_query_stats_average():
+    stats = QueryStats()
+    stats.record('q', 0.010, 2)
+    stats.record('q', 0.030, 4)
+    entry = stats.snapshot()['q']
+    assert entry['calls'] == 2
+    assert entry['rows'] == 6
+    assert entry['avg_ms'] == pytest.approx(20.0)
+    assert entry['max_ms'] == pytest.approx(30.0)
+
+
+def test_fetch_in_chunks_distinct_values():
+    connection = FakeConnection()
+    DBSession(connection).fetch_in('lookup', 'SELECT * FROM t WHERE id IN ({})',
+                                   [3, 1, 2, 3, 1], chunk_size=2)
+    assert connection.executed == [('SELECT * FROM t WHERE id IN (%s, %s)', (1, 2)),
+                                   ('SELECT * FROM t WHERE id IN (%s)', (3,))]
+
+
+def test_in_placeholders():
+    assert in_placeholders(3) == '%s, %s, %s'
+
+
+def test_db_session_returns_connection(checkout):
+    with db_session() as db:
+        db.fetch_all('active_hospitals')
+    assert checkout[0].closed
+
+
+def test_db_session_without_connection(monkeypatch):
+    def get_connection():
+        raise Error(msg='refused')
+
+    monkeypatch.setattr(data_access.db_pool, 'get_connection', get_connection)
+    with pytest.raises(DatabaseUnavailableError):
+        with db_session():
+            pass
+
+
+def test_shared_connection_is_checked_out_once(checkout):
+    with shared_connection():
+        with db_session() as db:
+            db.fetch_all('active_hospitals')
+        with db_session() as db:
+            db.fetch_all('active_hospitals')
+        assert len(checkout) == 1
+        assert not checkout[0].closed
+    assert checkout[0].closed
+
+
+def test_shared_connection_unused_checks_out_nothing(checkout):
+    with shared_connection():
+        pass
+    assert checkout == []
+
+
+def test_stream_reads_rows_in_batches(monkeypatch):
+    connection = FakeConnection(rows=[{'id': n} for n in range(5)])
+    monkeypatch.setattr(data_access.db_pool, 'get_connection', lambda: connection)
+    stream = data_access.stream_sql('hospitals_stream', 'SELECT * FROM Hospitals', batch_size=2)
+    assert [len(rows) for rows in stream] == [2, 2, 1]
+    assert connection.closed
+    assert connection.cursors[0].closed
+    assert not connection.disconnected
+
+
+def test_abandoned_stream_disconnects(checkout):
+    stream = data_access.stream_sql('hospitals_stream', 'SELECT * FROM Hospitals', batch_size=1)
+    rows = iter(stream)
+    next(rows)
+    stream.close()
+    connection = checkout[0]
+    # Draining the unread rows back into the pool could take as long as the export itself
+    assert connection.disconnected
+    assert connection.closed
+
+
+def test_stream_close_is_idempotent(checkout, monkeypatch):
+    stats = QueryStats()
+    monkeypatch.setattr(data_access, 'query_stats', stats)
+    stream = data_access.stream_sql('hospitals_stream', 'SELECT * FROM Hospitals')
+    stream.close()
+    stream.close()
+    assert stats.snapshot()['hospitals_stream']['calls'] == 1
+
+
+def test_stream_query_error_returns_connection(monkeypatch):
+    connection = FakeConnection()
+    connection.fail = True
+    monkeypatch.setattr(data_access.db_pool, 'get_connection', lambda: connection)
+    with pytest.raises(Error):
+        data_access.stream_sql('hospitals_stream', 'SELECT * FROM Hospitals')
+    assert connection.closed
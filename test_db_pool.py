@@ -0,0 +1,125 @@
+"""
+ClaimEase Connection Pool Tests
+Checkout, release, recycling and timeout behaviour of db_pool.ConnectionPool without a MySQL server
+"""
+
+import mysql.connector
+import pytest
+from mysql.connector import Error
+
+from db_pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeConnection:
+    def __init__(self):
+        self.connected = True
+        self.alive = True
+        self.rollbacks = 0
+        self.closed = False
+
+    def is_connected(self):
+        return self.connected
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise Error(msg='gone away')
+
+    def rollback(self):
+        self.rollbacks += 1
+
+    def close(self):
+        self.closed = True
+        self.connected = False
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    created = []
+
+    def connect(**config):
+        created.append(FakeConnection())
+        return created[-1]
+
+    monkeypatch.setattr(mysql.connector, 'connect', connect)
+    return created
+
+
+def test_released_connection_is_reused(connections):
+    pool = ConnectionPool({}, pool_size=2)
+    first = pool.get_connection()
+    raw = first.raw
+    first.close()
+    second = pool.get_connection()
+    assert second.raw is raw
+    assert len(connections) == 1
+    assert raw.rollbacks == 1
+
+
+def test_close_twice_returns_connection_once(connections):
+    pool = ConnectionPool({}, pool_size=1)
+    connection = pool.get_connection()
+    connection.close()
+    connection.close()
+    assert pool.stats()['in_use'] == 0
+    assert pool.stats()['idle'] == 1
+
+
+def test_returned_connection_rejects_use(connections):
+    pool = ConnectionPool({}, pool_size=1)
+    connection = pool.get_connection()
+    connection.close()
+    with pytest.raises(Error):
+        connection.cursor()
+
+
+def test_checkout_times_out_when_exhausted(connections):
+    pool = ConnectionPool({}, pool_size=1, checkout_timeout=0.05)
+    pool.get_connection()
+    with pytest.raises(PoolTimeoutError):
+        pool.get_connection()
+    assert pool.stats()['timeouts'] == 1
+
+
+def test_broken_connection_is_discarded_on_release(connections):
+    pool = ConnectionPool({}, pool_size=1)
+    connection = pool.get_connection()
+    connection.raw.connected = False
+    connection.close()
+    assert pool.stats()['idle'] == 0
+    assert pool.get_connection().raw is not connections[0]
+
+
+def test_dead_idle_connection_is_replaced(connections):
+    pool = ConnectionPool({}, pool_size=1, ping_on_checkout=True)
+    pool.get_connection().close()
+    connections[0].alive = False
+    connection = pool.get_connection()
+    assert connection.raw is connections[1]
+    assert connections[0].closed
+    assert pool.stats()['failed_pings'] == 1
+
+
+def test_idle_connection_past_recycle_age_is_replaced(connections):
+    pool = ConnectionPool({}, pool_size=1, recycle_seconds=0)
+    pool.get_connection().close()
+    assert pool.get_connection().raw is connections[1]
+    assert pool.stats()['connections_recycled'] == 1
+
+
+def test_failed_connect_frees_the_slot(monkeypatch):
+    def connect(**config):
+        raise Error(msg='refused')
+
+    monkeypatch.setattr(mysql.connector, 'connect', connect)
+    pool = ConnectionPool({}, pool_size=1)
+    with pytest.raises(Error):
+        pool.get_connection()
+    assert pool.stats()['in_use'] == 0
+
+
+def test_warm_opens_up_to_pool_size(connections):
+    pool = ConnectionPool({}, pool_size=3)
+    assert pool.warm(5) == 3
+    assert pool.warm(5) == 0
+    assert pool.stats()['idle'] == 3
+
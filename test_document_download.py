@@ -0,0 +1,103 @@
+"""
+ClaimEase Document Download Tests
+Range, ETag and reverse-proxy offload handling of GET /api/documents/<id>
+"""
+
+import datetime
+import hashlib
+
+import jwt
+import pytest
+
+import flask_api
+from document_store import DocumentStore
+
+BODY = b'0123456789' * 100
+CHECKSUM = hashlib.sha256(BODY).hexdigest()
+
+
+@pytest.fixture
+def client():
+    return flask_api.app.test_client()
+
+
+@pytest.fixture
+def auth():
+    token = jwt.encode({'user_id': 7, 'exp': datetime.datetime.utcnow() + datetime.timedelta(hours=1)},
+                       flask_api.app.config['SECRET_KEY'], algorithm='HS256')
+    return {'Authorization': f'Bearer {token}'}
+
+
+@pytest.fixture
+def document(tmp_path, monkeypatch):
+    store = DocumentStore(str(tmp_path))
+    path = store.path_for(CHECKSUM)
+    (tmp_path / CHECKSUM[:2] / CHECKSUM[2:4]).mkdir(parents=True)
+    with open(path, 'wb') as f:
+        f.write(BODY)
+    row = {'document_id': 5, 'document_name': 'bill.pdf', 'file_path': path,
+           'mime_type': 'application/pdf', 'checksum': CHECKSUM}
+    lookups = []
+
+    def fetch_one(name, params=()):
+        lookups.append((name, params))
+        return row if params == (5, 7) else None
+
+    monkeypatch.setattr(flask_api, 'fetch_one', fetch_one)
+    monkeypatch.setattr(flask_api, 'document_store', store)
+    return lookups
+
+
+def test_full_download_with_checksum_etag(client, auth, document):
+    response = client.get('/api/documents/5', headers=auth)
+    assert response.status_code == 200
+    assert response.data == BODY
+    assert response.headers['ETag'] == f'"{CHECKSUM}"'
+    assert 'private' in response.headers['Cache-Control']
+    assert document == [('user_document', (5, 7))]
+
+
+def test_range_request_returns_partial_content(client, auth, document):
+    response = client.get('/api/documents/5', headers=dict(auth, Range='bytes=100-199'))
+    assert response.status_code == 206
+    assert response.data == BODY[100:200]
+    assert response.headers['Content-Range'] == f'bytes 100-199/{len(BODY)}'
+
+
+def test_unsatisfiable_range(client, auth, document):
+    response = client.get('/api/documents/5', headers=dict(auth, Range='bytes=5000-'))
+    assert response.status_code == 416
+
+
+def test_matching_etag_is_not_modified(client, auth, document):
+    response = client.get('/api/documents/5', headers=dict(auth, **{'If-None-Match': f'"{CHECKSUM}"'}))
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_attachment_disposition(client, auth, document):
+    response = client.get('/api/documents/5?download=1', headers=auth)
+    assert response.headers['Content-Disposition'].startswith('attachment')
+
+
+def test_other_users_documents_are_not_found(client, document):
+    token = jwt.encode({'user_id': 8}, flask_api.app.config['SECRET_KEY'], algorithm='HS256')
+    response = client.get('/api/documents/5', headers={'Authorization': f'Bearer {token}'})
+    assert response.status_code == 404
+
+
+def test_missing_file_is_not_found(client, auth, document, tmp_path):
+    for path in tmp_path.rglob(CHECKSUM):
+        path.unlink()
+    assert client.get('/api/documents/5', headers=auth).status_code == 404
+
+
+def test_x_accel_offload_sends_no_body(client, auth, document, monkeypatch):
+    monkeypatch.setattr(flask_api, 'DOWNLOAD_OFFLOAD', 'x-accel')
+    monkeypatch.setattr(flask_api, 'ACCEL_REDIRECT_PREFIX', '/protected-documents/')
+    response = client.get('/api/documents/5', headers=auth)
+    assert response.status_code == 200
+    assert response.data == b''
+    assert response.headers['X-Accel-Redirect'] == (
+        f'/protected-documents/{CHECKSUM[:2]}/{CHECKSUM[2:4]}/{CHECKSUM}')
+    assert response.headers['ETag'] == f'"{CHECKSUM}"'
@@ -0,0 +1,170 @@
+"""
+ClaimEase Document Job Tests
+File scanning, job claiming, retries and queueing of document_jobs.DocumentJobQueue
+"""
+
+import hashlib
+from contextlib import contextmanager
+
+import pytest
+
+import document_jobs
+from document_jobs import DocumentJobQueue, scan_file, sniff_mime_type
+from document_store import DocumentStore
+
+PDF = (b'%PDF-1.4\n1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj\n'
+       b'2 0 obj << /Type /Pages /Kids [3 0 R 4 0 R 5 0 R] /Count 3 >> endobj\n'
+       + b''.join(b'%d 0 obj << /Type /Page /Parent 2 0 R >> endobj\n' % n + b' ' * 700
+                  for n in (3, 4, 5))
+       + b'%%EOF\n')
+
+
+@pytest.mark.parametrize('head, mime_type', [
+    (b'%PDF-1.7 ...', 'application/pdf'),
+    (b'\x89PNG\r\n\x1a\n....', 'image/png'),
+    (b'\xff\xd8\xff\xe0', 'image/jpeg'),
+    (b'PK\x03\x04word/', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'),
+    (b'Discharge summary', 'text/plain'),
+    (b'\xff\xfe\x00\x81', 'application/octet-stream'),
+])
+def test_sniff_mime_type(head, mime_type):
+    assert sniff_mime_type(head) == mime_type
+
+
+@pytest.mark.parametrize('chunk_size', [16, 37, 64 * 1024])
+def test_scan_file_counts_pdf_pages_across_chunks(tmp_path, chunk_size):
+    path = tmp_path / 'claim.pdf'
+    path.write_bytes(PDF)
+    assert scan_file(str(path), chunk_size) == (hashlib.sha256(PDF).hexdigest(),
+                                                'application/pdf', 3)
+
+
+def test_scan_file_non_pdf(tmp_path):
+    path = tmp_path / 'notes.txt'
+    path.write_bytes(b'plain notes')
+    assert scan_file(str(path))[1:] == ('text/plain', None)
+    path.write_bytes(b'\x89PNG\r\n\x1a\n' + b'\x00' * 10)
+    assert scan_file(str(path))[1:] == ('image/png', 1)
+
+
+class FakeDB:
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def execute(self, name, params=()):
+        self.jobs.executed.append((name, params))
+        rowcount = 1 if name != 'claim_document_job' else int(self.jobs.claimable)
+        return type('Cursor', (), {'rowcount': rowcount})()
+
+    def fetch_one(self, name, params=()):
+        return self.jobs.document
+
+    def commit(self):
+        pass
+
+
+class FakeJobs:
+    def __init__(self, path):
+        self.claimable = True
+        self.document = {'document_id': 5, 'file_path': str(path), 'attempts': 1,
+                         'checksum': hashlib.sha256(PDF).hexdigest()}
+        self.executed = []
+
+    def names(self):
+        return [name for name, _ in self.executed]
+
+
+@pytest.fixture
+def jobs(tmp_path, monkeypatch):
+    path = tmp_path / 'claim.pdf'
+    path.write_bytes(PDF)
+    fake = FakeJobs(path)
+
+    @contextmanager
+    def db_session():
+        yield FakeDB(fake)
+
+    monkeypatch.setattr(document_jobs, 'db_session', db_session)
+    return fake
+
+
+@pytest.fixture
+def job_queue(tmp_path, monkeypatch):
+    job_queue = DocumentJobQueue(DocumentStore(str(tmp_path)), queue_size=2, max_attempts=3)
+    # Exercise the queue without its threads
+    monkeypatch.setattr(job_queue, 'start', lambda: None)
+    return job_queue
+
+
+def test_process_records_the_scan(jobs, job_queue):
+    job_queue.process(5)
+    assert jobs.names() == ['claim_document_job', 'complete_document_job']
+    verified, mime_type, pages, thumbnail, _, document_id = jobs.executed[-1][1]
+    assert (verified, mime_type, pages, thumbnail, document_id) == (
+        True, 'application/pdf', 3, None, 5)
+    assert job_queue.stats.snapshot()['completed'] == 1
+
+
+def test_checksum_mismatch_is_recorded(jobs, job_queue):
+    jobs.document['checksum'] = '0' * 64
+    job_queue.process(5)
+    assert jobs.executed[-1][1][0] is False
+
+
+def test_job_claimed_elsewhere_is_skipped(jobs, job_queue):
+    jobs.claimable = False
+    job_queue.process(5)
+    assert jobs.names() == ['claim_document_job']
+
+
+def test_failed_job_is_retried_with_backoff(jobs, job_queue, monkeypatch):
+    timers = []
+
+    class Timer:
+        def __init__(self, interval, function, args):
+            timers.append((interval, function, args))
+            self.daemon = False
+
+        def start(self):
+            pass
+
+    monkeypatch.setattr(document_jobs.threading, 'Timer', Timer)
+    jobs.document.update(file_path='/missing/claim.pdf', attempts=2)
+    job_queue.process(5)
+    status = jobs.executed[-1][1][0]
+    assert status == 'Retrying'
+    assert timers == [(job_queue.retry_seconds * 2, job_queue.enqueue, (5,))]
+    assert job_queue.stats.snapshot()['retried'] == 1
+
+
+def test_job_fails_after_max_attempts(jobs, job_queue):
+    jobs.document.update(file_path='/missing/claim.pdf', attempts=3)
+    job_queue.process(5)
+    assert jobs.executed[-1][0] == 'fail_document_job'
+    assert jobs.executed[-1][1][0] == 'Failed'
+    assert job_queue.stats.snapshot()['failed'] == 1
+
+
+def test_enqueue_skips_queued_ids_and_drops_when_full(job_queue):
+    job_queue.enqueue(1)
+    job_queue.enqueue(1)
+    job_queue.enqueue(2)
+    job_queue.enqueue(3)
+    assert job_queue._queue.qsize() == 2
+    assert job_queue.stats.snapshot()['dropped'] == 1
+
+
+def test_start_sweeps_without_any_upload(jobs, tmp_path, monkeypatch):
+    swept = document_jobs.threading.Event()
+
+    def fetch_all(name, params=()):
+        swept.set()
+        return [{'document_id': 5}]
+
+    monkeypatch.setattr(document_jobs, 'fetch_all', fetch_all)
+    job_queue = DocumentJobQueue(DocumentStore(str(tmp_path)), workers=1, sweep_seconds=60)
+    job_queue.start()
+    try:
+        assert swept.wait(5)
+    finally:
+        job_queue.stop()
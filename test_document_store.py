@@ -0,0 +1,96 @@
+"""
+ClaimEase Document Store Tests
+Content addressing, deduplication and temporary-file handling of document_store.DocumentStore
+"""
+
+import hashlib
+import io
+import os
+
+import pytest
+
+from document_store import DocumentStore
+
+SCAN = b'%PDF-1.4 discharge summary' * 1000
+SCAN_SHA256 = hashlib.sha256(SCAN).hexdigest()
+
+
+@pytest.fixture
+def store(tmp_path):
+    return DocumentStore(str(tmp_path / 'documents'), chunk_size=4096)
+
+
+def temp_files(store):
+    temp_dir = os.path.join(store.root, 'tmp')
+    return os.listdir(temp_dir) if os.path.isdir(temp_dir) else []
+
+
+def test_stream_is_stored_at_its_content_address(store):
+    stored = store.store_stream(io.BytesIO(SCAN))
+    assert stored.checksum == SCAN_SHA256
+    assert stored.size == len(SCAN)
+    assert stored.path == os.path.join(store.root, SCAN_SHA256[:2], SCAN_SHA256[2:4],
+                                       SCAN_SHA256)
+    assert not stored.deduplicated
+    with open(stored.path, 'rb') as f:
+        assert f.read() == SCAN
+    assert temp_files(store) == []
+
+
+def test_identical_upload_is_deduplicated(store):
+    first = store.store_stream(io.BytesIO(SCAN))
+    second = store.store_stream(io.BytesIO(SCAN))
+    assert second.deduplicated
+    assert second.path == first.path
+    assert temp_files(store) == []
+
+
+def test_empty_upload(store):
+    stored = store.store_stream(io.BytesIO(b''))
+    assert stored.size == 0
+    assert stored.checksum == hashlib.sha256(b'').hexdigest()
+
+
+def test_failed_stream_leaves_no_temporary_file(store):
+    class BrokenStream:
+        def __init__(self):
+            self.reads = 0
+
+        def read(self, size):
+            self.reads += 1
+            if self.reads > 2:
+                raise ConnectionResetError('client went away')
+            return b'x' * size
+
+    with pytest.raises(ConnectionResetError):
+        store.store_stream(BrokenStream())
+    assert temp_files(store) == []
+
+
+def test_link_file_keeps_the_source(store, tmp_path):
+    source = tmp_path / 'assembled.part'
+    source.write_bytes(SCAN)
+    stored = store.link_file(str(source), SCAN_SHA256, len(SCAN))
+    assert not stored.deduplicated
+    assert source.exists()
+    assert open(stored.path, 'rb').read() == SCAN
+    assert store.link_file(str(source), SCAN_SHA256, len(SCAN)).deduplicated
+
+
+def test_link_file_copies_when_links_are_unsupported(store, tmp_path, monkeypatch):
+    def no_links(source, target):
+        raise OSError('cross-device link')
+
+    monkeypatch.setattr(os, 'link', no_links)
+    source = tmp_path / 'assembled.part'
+    source.write_bytes(SCAN)
+    stored = store.link_file(str(source), SCAN_SHA256, len(SCAN))
+    assert open(stored.path, 'rb').read() == SCAN
+    assert source.exists()
+
+
+def test_relative_path_stays_inside_the_root(store, tmp_path):
+    stored = store.store_stream(io.BytesIO(SCAN))
+    assert store.relative_path(stored.path) == f'{SCAN_SHA256[:2]}/{SCAN_SHA256[2:4]}/{SCAN_SHA256}'
+    assert store.relative_path(str(tmp_path / 'elsewhere' / 'file')) is None
+    assert store.relative_path(str(tmp_path)) is None
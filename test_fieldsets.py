@@ -0,0 +1,65 @@
+"""
+ClaimEase Sparse Fieldset Tests
+?fields= whitelist checks and SELECT list rendering of fieldsets
+"""
+
+import pytest
+
+from data_access import QUERIES
+from fieldsets import FIELDSETS, InvalidFieldsError, fieldset_sql, parse_fields, select_list
+
+
+def test_no_fields_parameter_means_all_fields():
+    assert parse_fields({}, 'hospital') is None
+
+
+def test_fields_follow_whitelist_order_and_include_required_keys():
+    assert parse_fields({'fields': 'city, HOSPITAL_TYPE,city'}, 'hospital') == (
+        'hospital_id', 'hospital_name', 'hospital_type', 'city')
+    assert parse_fields({'fields': 'claim_status'}, 'claim') == (
+        'claim_id', 'hospital_id', 'policy_id', 'claim_status')
+
+
+def test_same_fields_in_any_order_give_one_sql_text():
+    first = parse_fields({'fields': 'city,state'}, 'hospital')
+    second = parse_fields({'fields': 'state,city'}, 'hospital')
+    assert fieldset_sql('hospital_details', 'hospital', first) == \
+        fieldset_sql('hospital_details', 'hospital', second)
+
+
+@pytest.mark.parametrize('fields', [
+    'password_hash',
+    'city,1;DROP TABLE Users',
+    'u.password_hash',
+    '*',
+])
+def test_fields_outside_the_whitelist_are_rejected(fields):
+    with pytest.raises(InvalidFieldsError):
+        parse_fields({'fields': fields}, 'profile')
+
+
+def test_error_lists_unknown_fields():
+    with pytest.raises(InvalidFieldsError) as error:
+        parse_fields({'fields': 'password_hash,email'}, 'profile')
+    assert str(error.value).startswith('Unknown field: password_hash.')
+
+
+def test_no_whitelist_exposes_secrets():
+    for columns, _ in FIELDSETS.values():
+        assert 'password_hash' not in columns
+
+
+def test_select_list_aliases_renamed_expressions():
+    assert select_list('claim', ('claim_id', 'hospital_phone', 'company_name')) == (
+        'c.claim_id, h.contact_number as hospital_phone, ic.company_name')
+
+
+def test_select_list_defaults_to_every_field():
+    columns, _ = FIELDSETS['hospital']
+    assert select_list('hospital') == ', '.join(columns)
+
+
+def test_fieldset_sql_fills_the_named_query():
+    sql = fieldset_sql('user_profile', 'profile', ('user_id', 'email'))
+    assert sql == QUERIES['user_profile'].format(columns='u.user_id, u.email')
+    assert '{columns}' not in sql
@@ -0,0 +1,121 @@
+"""
+ClaimEase Hospital Geo Tests
+Radius queries, filters, antimeridian wrap-around and reloads of hospital_geo.HospitalGeoIndex
+"""
+
+import datetime
+import time
+
+import pytest
+
+import hospital_geo
+from conftest import ids
+from hospital_geo import HospitalGeoIndex, haversine_km
+
+PUNE = (18.5204, 73.8567)
+
+
+def hospital(hospital_id, lat, lng, hospital_type='Private'):
+    return {'hospital_id': hospital_id, 'hospital_name': f'Hospital {hospital_id}',
+            'hospital_type': hospital_type, 'city': 'Pune', 'state': 'Maharashtra',
+            'contact_number': None, 'latitude': lat, 'longitude': lng}
+
+
+ROWS = {
+    'hospitals_version': [{'hospitals': 4, 'updated_at': datetime.datetime(2024, 5, 1)}],
+    'geo_hospitals': [
+        hospital(1, 18.5310, 73.8446),                      # ~1.7 km from Pune centre
+        hospital(2, 18.5590, 73.7868, 'Government'),        # ~8.5 km
+        hospital(3, 18.7481, 73.4072),                      # Lonavala, ~53 km
+        hospital(4, -33.8688, 151.2093)                     # Sydney
+    ]
+}
+
+
+@pytest.fixture
+def db(fake_db):
+    return fake_db(hospital_geo, ROWS)
+
+
+def hospital_changed(db):
+    db.rows['hospitals_version'][0]['updated_at'] = datetime.datetime(2024, 5, 2)
+
+
+def test_haversine_known_distance():
+    # Mumbai to Pune is about 120 km in a straight line
+    assert haversine_km(19.0760, 72.8777, *PUNE) == pytest.approx(120, abs=5)
+    assert haversine_km(*PUNE, *PUNE) == 0
+
+
+def test_nearby_orders_by_distance_within_radius(db):
+    index = HospitalGeoIndex()
+    results = index.nearby(*PUNE, radius_km=10)
+    assert ids(results) == [1, 2]
+    assert results[0]['distance_km'] < results[1]['distance_km'] <= 10
+    assert ids(index.nearby(*PUNE, radius_km=60)) == [1, 2, 3]
+
+
+def test_matches_outside_the_circle_but_inside_the_box_are_dropped(db):
+    # The search box's corner cells hold points further away than the radius
+    db.rows['geo_hospitals'] = [hospital(1, PUNE[0] + 0.08, PUNE[1] + 0.08)]
+    index = HospitalGeoIndex()
+    assert index.nearby(*PUNE, radius_km=10) == []
+    assert ids(index.nearby(*PUNE, radius_km=13)) == [1]
+
+
+def test_limit_and_type_filter(db):
+    index = HospitalGeoIndex()
+    assert ids(index.nearby(*PUNE, radius_km=60, limit=1)) == [1]
+    assert ids(index.nearby(*PUNE, radius_km=60, hospital_type='government')) == [2]
+
+
+def test_insurer_filter_uses_network_bits(db, monkeypatch):
+    monkeypatch.setattr(hospital_geo.network_index, 'company_bits',
+                        lambda company_id, mode='any': 1 << 2 | 1 << 3)
+    index = HospitalGeoIndex()
+    assert ids(index.nearby(*PUNE, radius_km=60, company_id=7)) == [2, 3]
+
+
+def test_search_wraps_around_the_antimeridian(db):
+    db.rows['geo_hospitals'] = [hospital(1, -16.5, 179.98), hospital(2, -16.5, -179.98)]
+    index = HospitalGeoIndex()
+    assert ids(index.nearby(-16.5, 179.99, radius_km=5)) == [1, 2]
+
+
+def test_index_reloads_when_marked_dirty_and_hospitals_changed(db):
+    index = HospitalGeoIndex()
+    index.nearby(*PUNE, radius_km=10)
+    index.nearby(*PUNE, radius_km=10)
+    assert db.count('geo_hospitals') == 1
+    index.mark_dirty()
+    index.nearby(*PUNE, radius_km=10)
+    assert db.count('geo_hospitals') == 1
+    hospital_changed(db)
+    index.mark_dirty()
+    index.nearby(*PUNE, radius_km=10)
+    assert db.count('geo_hospitals') == 2
+    assert index.stats()['hospitals'] == 4
+
+
+def test_changes_from_other_processes_are_picked_up_periodically(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+    index = HospitalGeoIndex(refresh_seconds=30)
+    index.nearby(*PUNE, radius_km=10)
+    db.rows['geo_hospitals'].append(hospital(5, 18.5205, 73.8568))
+    hospital_changed(db)
+    clock[0] += 10
+    assert 5 not in ids(index.nearby(*PUNE, radius_km=10))
+    clock[0] += 30
+    assert ids(index.nearby(*PUNE, radius_km=10))[0] == 5
+    assert db.count('hospitals_version') == 3
+
+
+def test_mark_dirty_during_rebuild_is_kept(db):
+    index = HospitalGeoIndex()
+    db.during_load = index.mark_dirty
+    index.nearby(*PUNE, radius_km=10)
+    db.during_load = None
+    index.nearby(*PUNE, radius_km=10)
+    index.nearby(*PUNE, radius_km=10)
+    assert db.count('hospitals_version') == 2
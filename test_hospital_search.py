@@ -0,0 +1,140 @@
+"""
+ClaimEase Hospital Search Tests
+Trigram and prefix matching, ranking and incremental refresh of hospital_search.HospitalSearchIndex
+"""
+
+import datetime
+import time
+
+import pytest
+
+import hospital_search
+from conftest import ids
+from hospital_search import HospitalSearchIndex, normalize, trigrams
+
+MAY_1 = datetime.datetime(2024, 5, 1)
+MAY_2 = datetime.datetime(2024, 5, 2)
+
+
+def hospital(hospital_id, name, city, state, updated_at=MAY_1, is_active=True):
+    return {'hospital_id': hospital_id, 'hospital_name': name, 'hospital_type': 'Private',
+            'city': city, 'state': state, 'is_active': is_active, 'updated_at': updated_at}
+
+
+ROWS = {
+    'search_hospitals_all': [
+        hospital(1, 'Apollo Hospital', 'Chennai', 'Tamil Nadu'),
+        hospital(2, 'Apollo Spectra', 'Pune', 'Maharashtra'),
+        hospital(3, 'Ruby Hall Clinic', 'Pune', 'Maharashtra'),
+        hospital(4, 'Closed Care', 'Pune', 'Maharashtra', is_active=False)
+    ],
+    'search_hospitals_changed': []
+}
+
+
+@pytest.fixture
+def db(fake_db):
+    return fake_db(hospital_search, ROWS)
+
+
+def test_normalize_and_trigrams():
+    assert normalize('  St. John\'s  Medical-College ') == 'st john s medical college'
+    assert trigrams('pune') == {'pun', 'une'}
+    assert trigrams('ab') == set()
+
+
+def test_substring_match_across_fields(db):
+    index = HospitalSearchIndex()
+    assert sorted(ids(index.search('pune'))) == [2, 3]
+    assert ids(index.search('spect')) == [2]
+
+
+def test_every_term_must_match(db):
+    index = HospitalSearchIndex()
+    assert ids(index.search('apollo pune')) == [2]
+    assert index.search('apollo mumbai') == []
+
+
+def test_short_terms_use_word_prefixes(db):
+    index = HospitalSearchIndex()
+    assert sorted(ids(index.search('ap'))) == [1, 2]
+    assert ids(index.search('ru')) == [3]
+
+
+def test_name_matches_outrank_city_matches(db):
+    db.rows['search_hospitals_all'].append(hospital(5, 'City Clinic', 'Rubyville', 'Goa'))
+    index = HospitalSearchIndex()
+    assert ids(index.search('ruby')) == [3, 5]
+
+
+def test_inactive_hospitals_are_not_indexed(db):
+    index = HospitalSearchIndex()
+    assert index.search('closed') == []
+    assert index.stats()['hospitals'] == 3
+
+
+def test_limit_and_blank_query(db):
+    index = HospitalSearchIndex()
+    assert len(index.search('a', limit=1)) == 1
+    assert index.search('  --  ') == []
+    assert db.calls == [('search_hospitals_all', ())]
+
+
+def test_dirty_index_refreshes_changed_rows(db):
+    index = HospitalSearchIndex()
+    index.search('pune')
+    db.rows['search_hospitals_changed'] = [
+        hospital(3, 'Ruby Hall Clinic', 'Pune', 'Maharashtra', updated_at=MAY_2, is_active=False),
+        hospital(6, 'Sahyadri Hospital', 'Pune', 'Maharashtra', updated_at=MAY_2)
+    ]
+    index.mark_dirty()
+    assert sorted(ids(index.search('pune'))) == [2, 6]
+    assert db.calls[-1] == ('search_hospitals_changed', (MAY_1,))
+    index.mark_dirty()
+    index.search('pune')
+    assert db.calls[-1] == ('search_hospitals_changed', (MAY_2,))
+
+
+def test_mark_dirty_during_refresh_is_kept(db):
+    index = HospitalSearchIndex()
+    index.search('pune')
+    db.during_load = index.mark_dirty
+    index.mark_dirty()
+    index.search('pune')
+    db.during_load = None
+    index.search('pune')
+    assert db.count('search_hospitals_changed') == 2
+
+
+def test_failed_load_stays_dirty(db):
+    index = HospitalSearchIndex()
+    index.search('pune')
+    db.error = RuntimeError('connection lost')
+    index.mark_dirty()
+    with pytest.raises(RuntimeError):
+        index.search('pune')
+    db.error = None
+    index.search('pune')
+    assert db.calls[-1][0] == 'search_hospitals_changed'
+
+
+def test_changes_from_other_processes_are_picked_up_periodically(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+    index = HospitalSearchIndex(refresh_seconds=30)
+    index.search('pune')
+    db.rows['search_hospitals_changed'] = [
+        hospital(6, 'Sahyadri Hospital', 'Pune', 'Maharashtra', updated_at=MAY_2)]
+    clock[0] += 10
+    assert 6 not in ids(index.search('pune'))
+    clock[0] += 30
+    assert 6 in ids(index.search('pune'))
+    assert [name for name, _ in db.calls] == ['search_hospitals_all', 'search_hospitals_changed']
+
+
+def test_stale_index_is_rebuilt(db, monkeypatch):
+    index = HospitalSearchIndex(rebuild_seconds=0)
+    index.search('pune')
+    monkeypatch.setattr(time, 'monotonic', lambda: 1e12)
+    index.search('pune')
+    assert [name for name, _ in db.calls] == ['search_hospitals_all', 'search_hospitals_all']
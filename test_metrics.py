@@ -0,0 +1,118 @@
+"""
+ClaimEase Metrics Tests
+Prometheus rendering and cross-worker aggregation of metrics.MetricsRegistry
+"""
+
+import json
+
+from flask import Flask
+
+import metrics
+from metrics import LATENCY_BUCKETS, MetricsRegistry, record_db_time
+
+
+def write_worker(directory, pid, counters=(), histograms=()):
+    with open(directory / f'{pid}.json', 'w') as f:
+        json.dump({'pid': pid, 'counters': list(counters), 'histograms': list(histograms)}, f)
+
+
+def test_counters_render_with_sorted_labels():
+    registry = MetricsRegistry()
+    registry.inc('claimease_db_queries_total', query='claim_details')
+    registry.inc('claimease_db_queries_total', 2, query='claim_details')
+    registry.inc('claimease_db_query_seconds_total', 0.25, query='claim_details')
+    registry.inc('not_a_declared_metric')
+    text = registry.render()
+    assert '# TYPE claimease_db_queries_total counter' in text
+    assert 'claimease_db_queries_total{query="claim_details"} 3\n' in text
+    assert 'claimease_db_query_seconds_total{query="claim_details"} 0.25\n' in text
+    assert 'not_a_declared_metric' not in text
+
+
+def test_label_values_are_escaped():
+    registry = MetricsRegistry()
+    registry.inc('claimease_cache_hits_total', cache='a"b\\c\nd')
+    assert 'claimease_cache_hits_total{cache="a\\"b\\\\c\\nd"} 1' in registry.render()
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for value in (0.001, 0.02, 0.02, 30.0):
+        registry.observe('claimease_db_pool_wait_seconds', value)
+    lines = registry.render().splitlines()
+    assert 'claimease_db_pool_wait_seconds_bucket{le="0.001"} 1' in lines
+    assert 'claimease_db_pool_wait_seconds_bucket{le="0.01"} 1' in lines
+    assert 'claimease_db_pool_wait_seconds_bucket{le="0.025"} 3' in lines
+    assert 'claimease_db_pool_wait_seconds_bucket{le="10.0"} 3' in lines
+    assert 'claimease_db_pool_wait_seconds_bucket{le="+Inf"} 4' in lines
+    assert 'claimease_db_pool_wait_seconds_count 4' in lines
+    assert 'claimease_db_pool_wait_seconds_sum 30.041' in lines
+
+
+def test_collectors_are_read_at_scrape_time():
+    registry = MetricsRegistry()
+    entries = {'count': 3}
+
+    @registry.collector
+    def cache_entries():
+        yield 'claimease_cache_entries', {'cache': 'reference'}, entries['count']
+
+    @registry.collector
+    def broken():
+        raise RuntimeError('pool not ready')
+
+    assert 'claimease_cache_entries{cache="reference"} 3' in registry.render()
+    entries['count'] = 5
+    assert 'claimease_cache_entries{cache="reference"} 5' in registry.render()
+
+
+def test_workers_are_summed_and_dead_gauges_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, '_pid_alive', lambda pid: pid == 1001)
+    buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+    write_worker(tmp_path, 1001, counters=[
+        ['claimease_db_queries_total', [['query', 'claim_details']], 4],
+        ['claimease_db_pool_connections', [['state', 'idle']], 2]
+    ], histograms=[['claimease_db_pool_wait_seconds', [], buckets[:1] + [2] + buckets[2:] + [0.004]]])
+    write_worker(tmp_path, 1002, counters=[
+        ['claimease_db_queries_total', [['query', 'claim_details']], 6],
+        ['claimease_db_pool_connections', [['state', 'idle']], 7]
+    ], histograms=[['claimease_db_pool_wait_seconds', [], buckets[:1] + [1] + buckets[2:] + [0.002]]])
+    (tmp_path / '1003.json').write_text('{"pid": 10')  # being replaced mid-read
+
+    registry = MetricsRegistry(flush_seconds=3600)
+    registry.set_directory(str(tmp_path))
+    registry.inc('claimease_db_queries_total', query='claim_details')
+    lines = registry.render().splitlines()
+    # Counters of the exited worker 1002 still count; its gauge does not
+    assert 'claimease_db_queries_total{query="claim_details"} 11' in lines
+    assert 'claimease_db_pool_connections{state="idle"} 2' in lines
+    assert 'claimease_db_pool_wait_seconds_bucket{le="0.0025"} 3' in lines
+    assert 'claimease_db_pool_wait_seconds_sum 0.006' in lines
+
+
+def test_set_directory_can_clear_an_earlier_run(tmp_path):
+    write_worker(tmp_path, 1001, counters=[['claimease_db_queries_total', [], 9]])
+    registry = MetricsRegistry(flush_seconds=3600)
+    registry.set_directory(str(tmp_path), clear=True)
+    assert 'claimease_db_queries_total' not in registry.render()
+
+
+def test_requests_are_timed_by_route():
+    registry = MetricsRegistry()
+    app = Flask(__name__)
+    registry.init_app(app)
+
+    @app.route('/api/claims/<int:claim_id>')
+    def claim(claim_id):
+        record_db_time(0.002)
+        return {'claim_id': claim_id}
+
+    client = app.test_client()
+    client.get('/api/claims/7')
+    client.get('/missing')
+    text = registry.render()
+    assert ('claimease_http_request_duration_seconds_count'
+            '{method="GET",route="/api/claims/<int:claim_id>",status="200"} 1') in text
+    assert 'claimease_http_request_db_seconds_sum{route="/api/claims/<int:claim_id>"} 0.002' in text
+    assert ('claimease_http_request_duration_seconds_count'
+            '{method="GET",route="unmatched",status="404"} 1') in text
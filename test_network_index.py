@@ -0,0 +1,130 @@
+"""
+ClaimEase Cashless Network Tests
+Empanelment bitsets, filtered network lookups and reloads of network_index.NetworkIndex
+"""
+
+import time
+
+import pytest
+
+import network_index
+from conftest import ids
+from network_index import NetworkIndex, iter_bits
+
+
+def hospital(hospital_id, city, hospital_type='Private'):
+    return {'hospital_id': hospital_id, 'hospital_name': f'Hospital {hospital_id}',
+            'hospital_type': hospital_type, 'city': city, 'state': 'Maharashtra',
+            'contact_number': None}
+
+
+def empanelment(hospital_id, company_id, cashless=True, reimbursement=True):
+    return {'hospital_id': hospital_id, 'company_id': company_id,
+            'cashless_available': cashless, 'reimbursement_available': reimbursement}
+
+
+ROWS = {
+    'network_version': [{'hospitals': 4, 'empanelments': 6, 'empanelments_checksum': 1234}],
+    'network_hospitals': [hospital(1, 'Pune'), hospital(2, 'Mumbai'),
+                          hospital(3, 'Pune', 'Government'), hospital(70, 'Pune')],
+    'insurance_companies': [{'company_id': 10, 'company_name': 'Star Health', 'helpline': '1800'},
+                            {'company_id': 20, 'company_name': 'Acko', 'helpline': None}],
+    'active_empanelments': [
+        empanelment(1, 10),
+        empanelment(2, 10, cashless=False),
+        empanelment(3, 10, reimbursement=False),
+        empanelment(70, 10),
+        empanelment(1, 20, cashless=False),
+        empanelment(99, 10)  # inactive hospital, not in network_hospitals
+    ]
+}
+
+
+@pytest.fixture
+def db(fake_db):
+    return fake_db(network_index, ROWS)
+
+
+def empanelment_added(db, hospital_id, company_id):
+    db.rows['active_empanelments'].append(empanelment(hospital_id, company_id))
+    db.rows['network_version'][0]['empanelments'] += 1
+
+
+def test_iter_bits_yields_positions_in_order():
+    assert list(iter_bits(0b101001)) == [0, 3, 5]
+    assert list(iter_bits(1 << 200 | 1 << 2)) == [2, 200]
+    assert list(iter_bits(0)) == []
+
+
+def test_company_bits_per_mode(db):
+    index = NetworkIndex()
+    assert list(iter_bits(index.company_bits(10))) == [1, 2, 3, 70]
+    assert list(iter_bits(index.company_bits(10, 'cashless'))) == [1, 3, 70]
+    assert list(iter_bits(index.company_bits(10, 'reimbursement'))) == [1, 2, 70]
+    assert index.company_bits(30) == 0
+
+
+def test_inactive_hospitals_are_left_out(db):
+    index = NetworkIndex()
+    assert not index.is_empanelled(99, 10)
+    assert not index.has_hospital(99)
+
+
+def test_company_hospitals_filters(db):
+    index = NetworkIndex()
+    assert ids(index.company_hospitals(10, city=' PUNE ')) == [1, 3, 70]
+    assert ids(index.company_hospitals(10, 'cashless', city='pune',
+                                       hospital_type='government')) == [3]
+    results = index.company_hospitals(10, city='mumbai')
+    assert results[0]['cashless_available'] is False
+    assert results[0]['reimbursement_available'] is True
+
+
+def test_check_reports_modes(db):
+    index = NetworkIndex()
+    assert index.check(3, 10) == {'hospital_id': 3, 'company_id': 10, 'in_network': True,
+                                  'cashless_available': True, 'reimbursement_available': False}
+    assert index.check(2, 20)['in_network'] is False
+
+
+def test_hospital_insurers_sorted_by_name(db):
+    index = NetworkIndex()
+    assert [company['company_name'] for company in index.hospital_insurers(1)] == [
+        'Acko', 'Star Health']
+    assert [company['company_id'] for company in index.hospital_insurers(1, 'cashless')] == [10]
+
+
+def test_reload_only_when_dirty_and_changed(db):
+    index = NetworkIndex()
+    index.company_bits(10)
+    index.company_bits(10)
+    assert db.count('network_hospitals') == 1
+    index.mark_dirty()
+    index.company_bits(10)
+    assert db.count('network_hospitals') == 1
+    empanelment_added(db, 2, 20)
+    index.mark_dirty()
+    assert index.is_empanelled(2, 20)
+    assert db.count('network_hospitals') == 2
+
+
+def test_changes_from_other_processes_are_picked_up_periodically(db, monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+    index = NetworkIndex(refresh_seconds=30)
+    index.company_bits(10)
+    empanelment_added(db, 3, 20)
+    clock[0] += 10
+    assert not index.is_empanelled(3, 20)
+    clock[0] += 30
+    assert index.is_empanelled(3, 20)
+
+
+def test_mark_dirty_during_rebuild_is_kept(db):
+    index = NetworkIndex()
+    db.during_load = index.mark_dirty
+    index.company_bits(10)
+    db.during_load = None
+    index.company_bits(10)
+    index.company_bits(10)
+    assert db.count('network_version') == 2
@@ -0,0 +1,102 @@
+"""
+ClaimEase Keyset Pagination Tests
+Cursor round-trips, page splitting and page-size parsing
+"""
+
+import datetime
+from decimal import Decimal
+
+import pytest
+from flask import Flask, request
+
+import flask_api
+import pagination
+from pagination import (InvalidCursorError, add_next_cursor, decode_cursor, encode_cursor,
+                        get_cursor, get_page_size, split_page)
+
+
+def test_cursor_round_trip():
+    values = [datetime.date(2024, 5, 1), 42]
+    assert decode_cursor(encode_cursor(values), 2) == ['2024-05-01', 42]
+
+
+def test_cursor_serializes_datetimes_and_decimals():
+    values = [datetime.datetime(2024, 5, 1, 9, 30), Decimal('125000.50'), 'Apollo']
+    assert decode_cursor(encode_cursor(values), 3) == ['2024-05-01T09:30:00', '125000.50',
+                                                       'Apollo']
+
+
+def test_cursor_is_url_safe_without_padding():
+    token = encode_cursor(['??>>', 1])
+    assert '=' not in token and '+' not in token and '/' not in token
+
+
+# Not base64, not JSON, a JSON object rather than a list, and empty
+@pytest.mark.parametrize('token', ['not a cursor', '!!!', 'eyJhIjoxfQ', ''])
+def test_malformed_cursor_is_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 1)
+
+
+# [[], {}] and [null, 1]: keyset values must be strings or numbers
+@pytest.mark.parametrize('token', ['W1tdLHt9XQ', 'W251bGwsMV0'])
+def test_cursor_with_non_scalar_values_is_rejected(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 2)
+
+
+def test_crafted_cursor_is_a_bad_request():
+    response = flask_api.app.test_client().get('/api/hospitals?cursor=W1tdLHt9XQ')
+    assert response.status_code == 400
+
+
+def test_cursor_with_wrong_length_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(encode_cursor([1, 2]), 3)
+
+
+def test_split_page_round_trip():
+    rows = [{'claim_date': datetime.date(2024, 5, day), 'claim_id': day} for day in (9, 8, 7)]
+    page, cursor = split_page(rows, 2, ('claim_date', 'claim_id'))
+    assert page == rows[:2]
+    assert decode_cursor(cursor, 2) == ['2024-05-08', 8]
+
+
+def test_split_page_last_page_has_no_cursor():
+    rows = [{'claim_id': 1}, {'claim_id': 2}]
+    assert split_page(rows, 2, ('claim_id',)) == (rows, None)
+
+
+def test_page_size_defaults_and_caps(monkeypatch):
+    monkeypatch.setattr(pagination, 'DEFAULT_PAGE_SIZE', 50)
+    monkeypatch.setattr(pagination, 'MAX_PAGE_SIZE', 200)
+    assert get_page_size({}) == 50
+    assert get_page_size({'limit': '10'}) == 10
+    assert get_page_size({'limit': '5000'}) == 200
+
+
+@pytest.mark.parametrize('limit', ['0', '-3', 'ten'])
+def test_invalid_page_size_is_rejected(limit):
+    with pytest.raises(InvalidCursorError):
+        get_page_size({'limit': limit})
+
+
+def test_first_page_has_no_cursor():
+    assert get_cursor({}, 2) is None
+    assert get_cursor({'cursor': encode_cursor([1, 2])}, 2) == [1, 2]
+
+
+def test_next_cursor_headers_keep_other_arguments():
+    app = Flask(__name__)
+    with app.test_request_context('/api/hospitals?city=Pune&limit=2'):
+        response = add_next_cursor(app.response_class('[]'), 'abc', request)
+    assert response.headers['X-Next-Cursor'] == 'abc'
+    assert response.headers['Link'] == (
+        '<http://localhost/api/hospitals?city=Pune&limit=2&cursor=abc>; rel="next"')
+
+
+def test_last_page_has_no_link_header():
+    app = Flask(__name__)
+    with app.test_request_context('/api/hospitals'):
+        response = add_next_cursor(app.response_class('[]'), None, request)
+    assert 'Link' not in response.headers
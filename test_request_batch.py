@@ -0,0 +1,113 @@
+"""
+ClaimEase Request Batching Tests
+Batch body validation and concurrent sub-request dispatch of request_batch
+"""
+
+import pytest
+from flask import Flask, jsonify, request
+
+import data_access
+import request_batch
+from request_batch import InvalidBatchError, parse_batch, run_batch
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+
+    @property
+    def raw(self):
+        return self
+
+    def close(self):
+        self.closed = True
+
+
+@pytest.fixture
+def checkout(monkeypatch):
+    connections = []
+
+    def get_connection():
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    monkeypatch.setattr(data_access.db_pool, 'get_connection', get_connection)
+    return connections
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route('/api/stats')
+    def stats():
+        with data_access.db_session() as db:
+            connection = db.connection
+        response = jsonify({'connection': id(connection),
+                            'user': request.headers.get('Authorization')})
+        response.headers['X-Next-Cursor'] = 'next'
+        response.headers['X-Internal'] = 'hidden'
+        return response
+
+    @app.route('/api/echo')
+    def echo():
+        return request.args.get('q', ''), 200, {'Content-Type': 'text/plain'}
+
+    @app.route('/api/broken')
+    def broken():
+        raise RuntimeError('boom')
+
+    @app.route('/api/batch', methods=['POST'])
+    def batch():
+        return jsonify({'responses': run_batch(app, parse_batch(request.get_json()), request)})
+
+    return app
+
+
+def test_parse_batch_accepts_paths_and_objects():
+    assert parse_batch({'requests': ['/api/stats', {'id': 'x', 'path': '/api/echo?q=1'}]}) == [
+        (0, '/api/stats'), ('x', '/api/echo?q=1')]
+
+
+@pytest.mark.parametrize('body', [
+    None,
+    [],
+    {'requests': []},
+    {'requests': 'not a list'},
+    {'requests': [{'id': 1}]},
+    {'requests': [{'path': '/api/claims', 'method': 'POST'}]},
+    {'requests': ['/admin']},
+    {'requests': ['https://example.com/api/stats']},
+    {'requests': ['/api/batch']},
+    {'requests': ['/api/batch/?x=1']},
+])
+def test_parse_batch_rejects_malformed_bodies(body):
+    with pytest.raises(InvalidBatchError):
+        parse_batch(body)
+
+
+def test_parse_batch_limits_size(monkeypatch):
+    monkeypatch.setattr(request_batch, 'MAX_BATCH_REQUESTS', 2)
+    with pytest.raises(InvalidBatchError):
+        parse_batch({'requests': ['/api/stats'] * 3})
+
+
+def test_sub_requests_share_one_connection_and_keep_order(checkout):
+    app = make_app()
+    response = app.test_client().post('/api/batch', json={'requests': [
+        '/api/stats', {'id': 'echo', 'path': '/api/echo?q=hi'}, '/api/stats', '/api/missing',
+        '/api/broken'
+    ]}, headers={'Authorization': 'Bearer t', 'Cookie': 'session=secret'})
+    results = response.get_json()['responses']
+    assert [result['id'] for result in results] == [0, 'echo', 2, 3, 4]
+    assert [result['status'] for result in results] == [200, 200, 200, 404, 500]
+    assert results[1]['body'] == 'hi'
+    assert results[0]['body']['user'] == 'Bearer t'
+    assert results[0]['headers'] == {'X-Next-Cursor': 'next'}
+    assert results[0]['body']['connection'] == results[2]['body']['connection']
+    assert len(checkout) == 1 and checkout[0].closed
+
+
+def test_batch_without_database_work_checks_out_nothing(checkout):
+    app = make_app()
+    app.test_client().post('/api/batch', json={'requests': ['/api/echo?q=1']})
+    assert checkout == []
@@ -0,0 +1,114 @@
+"""
+ClaimEase Request Profiler Tests
+Trigger rules, stored profiles and pruning of request_profiler.RequestProfiler
+"""
+
+import json
+import os
+
+import pytest
+from flask import Flask
+
+from request_profiler import PROFILE_NAME_PATTERN, RequestProfiler, _route_slug
+
+
+def make_app(profiler, allowed=True):
+    app = Flask(__name__)
+    profiler.init_app(app, authorize=lambda: allowed)
+
+    @app.route('/api/claims/<int:claim_id>')
+    def claim(claim_id):
+        return {'claim_id': claim_id}
+
+    return app
+
+
+def stored(directory, suffix):
+    return sorted(name for name in os.listdir(directory) if name.endswith(suffix))
+
+
+@pytest.mark.parametrize('route, slug', [
+    ('/api/claims/<int:claim_id>', 'api-claims-int-claim-id'),
+    ('/api/stats', 'api-stats'),
+    ('/', 'root'),
+])
+def test_route_slug(route, slug):
+    assert _route_slug(route) == slug
+
+
+def test_disabled_profiler_installs_no_hooks(tmp_path):
+    profiler = RequestProfiler(enabled=False, directory=str(tmp_path / 'profiles'))
+    app = make_app(profiler)
+    assert not app.before_request_funcs and not app.teardown_request_funcs
+    response = app.test_client().get('/api/claims/1', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+    assert not os.path.exists(tmp_path / 'profiles')
+    assert profiler.recent() == []
+
+
+def test_header_profiles_an_authorized_request(tmp_path):
+    profiler = RequestProfiler(enabled=True, directory=str(tmp_path))
+    response = make_app(profiler).test_client().get('/api/claims/7?include=documents',
+                                                    headers={'X-Profile': '1'})
+    name = response.headers['X-Profile-Id']
+    assert PROFILE_NAME_PATTERN.match(name)
+    assert '_GET_api-claims-int-claim-id_' in name
+    assert stored(tmp_path, '.prof') == [name]
+
+    metadata = profiler.recent()[0]
+    assert metadata['name'] == name
+    assert metadata['route'] == '/api/claims/<int:claim_id>'
+    assert metadata['path'] == '/api/claims/7?include=documents'
+    assert (metadata['status'], metadata['trigger']) == (200, 'header')
+    assert metadata['top'] and {'function', 'calls', 'total_ms'} <= metadata['top'][0].keys()
+    assert profiler.profile_path(name) == os.path.abspath(tmp_path / name)
+
+
+def test_header_is_ignored_without_authorization(tmp_path):
+    profiler = RequestProfiler(enabled=True, directory=str(tmp_path))
+    client = make_app(profiler, allowed=False).test_client()
+    response = client.get('/api/claims/7', headers={'X-Profile': '1'})
+    assert 'X-Profile-Id' not in response.headers
+    assert stored(tmp_path, '.prof') == []
+
+
+def test_sampling_profiles_every_nth_request(tmp_path):
+    profiler = RequestProfiler(enabled=True, directory=str(tmp_path), sample_every=3)
+    client = make_app(profiler).test_client()
+    tagged = ['X-Profile-Id' in client.get('/api/claims/1').headers for _ in range(6)]
+    assert tagged == [False, False, True, False, False, True]
+    assert [entry['trigger'] for entry in profiler.recent()] == ['sample', 'sample']
+
+
+def test_oldest_profiles_are_pruned(tmp_path):
+    for stamp in ('20240101T000000-000', '20240101T000001-000'):
+        for suffix in ('.prof', '.json'):
+            (tmp_path / f'{stamp}_GET_api-stats_1{suffix}').write_text('{}')
+    profiler = RequestProfiler(enabled=True, directory=str(tmp_path), max_files=2)
+    name = make_app(profiler).test_client().get(
+        '/api/claims/1', headers={'X-Profile': '1'}).headers['X-Profile-Id']
+    assert stored(tmp_path, '.prof') == ['20240101T000001-000_GET_api-stats_1.prof', name]
+    assert stored(tmp_path, '.json') == ['20240101T000001-000_GET_api-stats_1.json',
+                                         name[:-len('.prof')] + '.json']
+
+
+def test_recent_is_newest_first_and_limited(tmp_path):
+    for second in range(3):
+        name = f'20240101T00000{second}-000_GET_api-stats_1'
+        (tmp_path / f'{name}.json').write_text(json.dumps({'name': name}))
+    (tmp_path / '20240101T000009-000_GET_api-stats_1.json').write_text('{"name": ')
+    profiler = RequestProfiler(enabled=True, directory=str(tmp_path))
+    assert [entry['name'][:19] for entry in profiler.recent(limit=3)] == [
+        '20240101T000002-000', '20240101T000001-000']
+
+
+@pytest.mark.parametrize('name', [
+    '../secrets.prof',
+    '20240101T000000-000_GET_api-stats_1.json',
+    '20240101T000000-000_get_api-stats_1.prof',
+    '20240101T000000-000_GET_api-stats_1.prof',  # well formed but not stored
+])
+def test_profile_path_rejects_unknown_names(tmp_path, name):
+    profiler = RequestProfiler(enabled=True, directory=str(tmp_path))
+    (tmp_path / '20240101T000000-000_GET_api-stats_1.json').write_text('{}')
+    assert profiler.profile_path(name) is None
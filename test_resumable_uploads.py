@@ -0,0 +1,132 @@
+"""
+ClaimEase Resumable Upload Tests
+Session lifecycle, offset checks, resumption and finalize of resumable_uploads.ResumableUploads
+"""
+
+import hashlib
+import io
+import os
+import uuid
+
+import pytest
+
+import resumable_uploads
+from document_store import DocumentStore
+from resumable_uploads import ResumableUploads, UploadError
+
+SCAN = bytes(range(256)) * 40
+
+
+@pytest.fixture
+def uploads(tmp_path):
+    store = DocumentStore(str(tmp_path / 'documents'))
+    return ResumableUploads(str(tmp_path / 'uploads'), store, chunk_size=1000)
+
+
+def start(uploads, user_id=7, total_size=len(SCAN)):
+    return uploads.initiate(user_id, 12, 'Discharge Summary', 'summary.pdf', total_size,
+                            'application/pdf')['upload_id']
+
+
+def test_chunks_resume_from_the_stored_offset(uploads):
+    upload_id = start(uploads)
+    assert uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN[:4000]))['offset'] == 4000
+    progress = uploads.progress(upload_id, 7)
+    assert progress == {'upload_id': upload_id, 'offset': 4000, 'total_size': len(SCAN),
+                        'complete': False}
+    assert uploads.write_chunk(upload_id, 7, 4000, io.BytesIO(SCAN[4000:]))['complete']
+
+
+def test_cut_off_chunk_keeps_the_bytes_that_arrived(uploads):
+    upload_id = start(uploads)
+    # Content-Length promised 5000 bytes but the connection dropped after 1500
+    uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN[:1500]), length=5000)
+    assert uploads.progress(upload_id, 7)['offset'] == 1500
+
+
+def test_wrong_offset_is_a_conflict(uploads):
+    upload_id = start(uploads)
+    uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN[:100]))
+    with pytest.raises(UploadError) as error:
+        uploads.write_chunk(upload_id, 7, 50, io.BytesIO(SCAN[50:100]))
+    assert error.value.status == 409
+    assert error.value.offset == 100
+
+
+def test_chunk_past_total_size_is_rejected(uploads):
+    upload_id = start(uploads, total_size=100)
+    with pytest.raises(UploadError) as error:
+        uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN[:200]), length=200)
+    assert error.value.status == 413
+
+
+def test_bytes_past_total_size_are_never_read(uploads):
+    upload_id = start(uploads, total_size=100)
+    stream = io.BytesIO(SCAN[:200])
+    assert uploads.write_chunk(upload_id, 7, 0, stream)['offset'] == 100
+    assert stream.tell() == 100
+
+
+@pytest.mark.parametrize('total_size', [0, -1, resumable_uploads.MAX_UPLOAD_SIZE + 1])
+def test_total_size_limits(uploads, total_size):
+    with pytest.raises(UploadError):
+        start(uploads, total_size=total_size)
+
+
+@pytest.mark.parametrize('upload_id', ['../../etc/passwd', 'abc', uuid.uuid4().hex])
+def test_unknown_or_malformed_ids_are_not_found(uploads, upload_id):
+    with pytest.raises(UploadError) as error:
+        uploads.progress(upload_id, 7)
+    assert error.value.status == 404
+
+
+def test_other_users_cannot_see_an_upload(uploads):
+    upload_id = start(uploads)
+    with pytest.raises(UploadError) as error:
+        uploads.progress(upload_id, 8)
+    assert error.value.status == 404
+
+
+def test_finalize_stores_the_file_and_removes_the_session(uploads):
+    upload_id = start(uploads)
+    uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN))
+    created = []
+
+    def create_document(session, stored):
+        created.append((session['claim_id'], stored.checksum, stored.size))
+        return {'document_id': 99}
+
+    assert uploads.finalize(upload_id, 7, create_document) == {'document_id': 99}
+    assert created == [(12, hashlib.sha256(SCAN).hexdigest(), len(SCAN))]
+    assert os.listdir(uploads.root) == []
+    with pytest.raises(UploadError):
+        uploads.progress(upload_id, 7)
+
+
+def test_incomplete_upload_cannot_be_finalized(uploads):
+    upload_id = start(uploads)
+    uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN[:10]))
+    with pytest.raises(UploadError) as error:
+        uploads.finalize(upload_id, 7, lambda session, stored: None)
+    assert (error.value.status, error.value.offset) == (409, 10)
+
+
+def test_failed_document_insert_leaves_the_session_for_a_retry(uploads):
+    upload_id = start(uploads)
+    uploads.write_chunk(upload_id, 7, 0, io.BytesIO(SCAN))
+
+    def failing(session, stored):
+        raise RuntimeError('database unavailable')
+
+    with pytest.raises(RuntimeError):
+        uploads.finalize(upload_id, 7, failing)
+    assert uploads.progress(upload_id, 7)['complete']
+    assert uploads.finalize(upload_id, 7, lambda session, stored: 'ok') == 'ok'
+
+
+def test_expired_sessions_are_cleaned_up(uploads, monkeypatch):
+    old = start(uploads)
+    monkeypatch.setattr(resumable_uploads, 'SESSION_TTL_SECONDS', -1)
+    uploads.cleanup_expired()
+    with pytest.raises(UploadError):
+        uploads.progress(old, 7)
@@ -0,0 +1,122 @@
+"""
+ClaimEase Production Server Tests
+Bounded accept of serve.PooledWSGIServer and worker warm-up
+"""
+
+import http.client
+import threading
+import time
+
+import pytest
+
+import dashboard_stats
+import hospital_geo
+import hospital_search
+import network_index
+from data_access import db_pool
+from serve import PooledWSGIServer, warm_worker
+
+
+class SlowApp:
+    """WSGI app that holds each request until released, tracking concurrency"""
+
+    def __init__(self):
+        self.release = threading.Event()
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+
+    def __call__(self, environ, start_response):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        self.release.wait(10)
+        with self.lock:
+            self.active -= 1
+        start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', '2')])
+        return [b'ok']
+
+
+@pytest.fixture
+def server():
+    app = SlowApp()
+    server = PooledWSGIServer('127.0.0.1', 0, app, threads=2)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server, app
+    app.release.set()
+    server.shutdown()
+    server.executor.shutdown(wait=True)
+    server.server_close()
+
+
+def get(port, results):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    connection.request('GET', '/')
+    results.append(connection.getresponse().read())
+    connection.close()
+
+
+def test_accepts_only_as_many_connections_as_threads(server):
+    server, app = server
+    results = []
+    clients = [threading.Thread(target=get, args=(server.server_port, results))
+               for _ in range(6)]
+    for client in clients:
+        client.start()
+    deadline = time.monotonic() + 5
+    while app.active < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.2)
+    # The rest wait in the listen backlog, not in the executor's queue
+    assert app.active == 2
+    assert server.executor._work_queue.qsize() == 0
+
+    app.release.set()
+    for client in clients:
+        client.join(10)
+    assert results == [b'ok'] * 6
+    assert app.max_active == 2
+
+
+def test_slot_is_released_when_the_handler_fails(server, monkeypatch):
+    server, app = server
+    app.release.set()
+
+    def broken(request, client_address):
+        raise RuntimeError('handler crashed')
+
+    monkeypatch.setattr(server, 'finish_request', broken)
+    monkeypatch.setattr(server, 'handle_error', lambda request, client_address: None)
+    for _ in range(3):
+        with pytest.raises((ConnectionError, http.client.HTTPException)):
+            get(server.server_port, [])
+    monkeypatch.undo()
+    results = []
+    get(server.server_port, results)
+    assert results == [b'ok']
+
+
+class FakeJobs:
+    def __init__(self):
+        self.started = False
+
+    def start(self):
+        self.started = True
+
+
+def test_warm_up_continues_past_failed_steps(monkeypatch, capsys):
+    def unavailable(count):
+        raise ConnectionRefusedError('MySQL is down')
+
+    monkeypatch.setattr(db_pool, 'warm', unavailable)
+    for index in (hospital_search.hospital_index, hospital_geo.hospital_geo_index,
+                  network_index.network_index):
+        monkeypatch.setattr(index, 'ensure_fresh', lambda: None)
+    monkeypatch.setattr(dashboard_stats.dashboard_summary, 'snapshot', lambda: None)
+    jobs = FakeJobs()
+    app = type('App', (), {'extensions': {'document_jobs': jobs}})()
+
+    warm_worker(app, 4)
+    assert jobs.started
+    assert 'warmup of db pool failed: MySQL is down' in capsys.readouterr().err
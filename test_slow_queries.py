@@ -0,0 +1,139 @@
+"""
+ClaimEase Slow Query Log Tests
+Parameter redaction, bounded buffers and EXPLAIN caching of slow_queries.SlowQueryLog
+"""
+
+import time
+
+import pytest
+from flask import Flask
+from mysql.connector import Error
+
+from slow_queries import ROWS_EXAMINED_SQL, SlowQueryLog, calling_route, redact
+
+CLAIM_SQL = 'SELECT * FROM Claims\n    WHERE claim_id = %s'
+
+
+class FakeCursor:
+    def __init__(self, connection):
+        self.connection = connection
+        self.rows = []
+
+    def execute(self, sql, params=()):
+        self.connection.statements.append((sql, params))
+        if sql == ROWS_EXAMINED_SQL:
+            if self.connection.performance_schema is False:
+                raise Error('SELECT command denied to user for table events_statements_history')
+            self.rows = [{'rows_examined': 1200}]
+        else:
+            self.rows = [{'table': b'Claims', 'type': 'ALL', 'rows': 1200}]
+
+    def fetchone(self):
+        return self.rows[0] if self.rows else None
+
+    def fetchall(self):
+        return self.rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, performance_schema=True):
+        self.performance_schema = performance_schema
+        self.statements = []
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self)
+
+    def explains(self):
+        return [sql for sql, _ in self.statements if sql.startswith('EXPLAIN')]
+
+
+def test_redact_keeps_types_and_lengths_only():
+    assert redact(('rahul@example.com', 42, None, b'\x00\x01', 1.5)) == [
+        '<str:17>', '<int>', None, '<bytes:2>', '<float>']
+
+
+def test_calling_route():
+    app = Flask(__name__)
+
+    @app.route('/api/claims/<int:claim_id>')
+    def claim(claim_id):
+        return calling_route()
+
+    assert app.test_client().get('/api/claims/7').data == b'GET /api/claims/<int:claim_id>'
+    with app.test_request_context('/unrouted', method='POST'):
+        assert calling_route() == 'POST /unrouted'
+    assert calling_route() == 'MainThread'
+
+
+def test_entry_has_plan_rows_examined_and_redacted_params():
+    log = SlowQueryLog()
+    connection = FakeConnection()
+    log.record(connection, 'claim_details', CLAIM_SQL, ('CLM-1',), 0.5, 1)
+    entry = log.snapshot()['recent'][0]
+    assert entry['sql'] == 'SELECT * FROM Claims WHERE claim_id = %s'
+    assert entry['params'] == ['<str:5>']
+    assert entry['elapsed_ms'] == 500.0
+    assert entry['rows_examined'] == 1200
+    assert entry['explain'] == [{'table': 'Claims', 'type': 'ALL', 'rows': 1200}]
+    # Rows examined must be read before EXPLAIN replaces the last statement
+    assert connection.statements[0][0] == ROWS_EXAMINED_SQL
+    assert connection.statements[1] == ('EXPLAIN ' + CLAIM_SQL, ('CLM-1',))
+
+
+def test_busy_connection_skips_plan_and_rows_examined():
+    log = SlowQueryLog()
+    log.record(None, 'claims_export', CLAIM_SQL, (), 0.5, None, error=Error('lost connection'))
+    entry = log.snapshot()['recent'][0]
+    assert entry['explain'] is None and entry['rows_examined'] is None
+    assert 'lost connection' in entry['error']
+
+
+def test_plans_are_cached_per_statement(monkeypatch):
+    clock = [100.0]
+    monkeypatch.setattr(time, 'monotonic', lambda: clock[0])
+    log = SlowQueryLog(explain_interval_seconds=60)
+    connection = FakeConnection()
+    for _ in range(3):
+        log.record(connection, 'claim_details', CLAIM_SQL, ('CLM-1',), 0.5, 1)
+    assert len(connection.explains()) == 1
+    clock[0] += 61
+    log.record(connection, 'claim_details', CLAIM_SQL, ('CLM-1',), 0.5, 1)
+    assert len(connection.explains()) == 2
+
+
+@pytest.mark.parametrize('sql', [
+    'INSERT INTO Claims (claim_number) VALUES (%s)',
+    'CALL refresh_claim_totals(%s)',
+])
+def test_statements_mysql_cannot_explain_are_skipped(sql):
+    log = SlowQueryLog()
+    connection = FakeConnection()
+    log.record(connection, 'write', sql, ('x',), 0.5, 1)
+    assert connection.explains() == []
+    assert log.snapshot()['recent'][0]['explain'] is None
+
+
+def test_rows_examined_is_disabled_after_an_error():
+    log = SlowQueryLog(explain=False)
+    connection = FakeConnection(performance_schema=False)
+    log.record(connection, 'claim_details', CLAIM_SQL, (), 0.5, 1)
+    log.record(connection, 'claim_details', CLAIM_SQL, (), 0.5, 1)
+    assert [sql for sql, _ in connection.statements] == [ROWS_EXAMINED_SQL]
+    assert log.snapshot()['recent'][0]['rows_examined'] is None
+
+
+def test_worst_and_recent_are_bounded():
+    log = SlowQueryLog(max_entries=3, explain=False)
+    for index, elapsed in enumerate((0.3, 0.9, 0.2, 0.5, 0.4, 0.7)):
+        log.record(None, f'query_{index}', 'SELECT 1', (), elapsed, 0)
+    snapshot = log.snapshot()
+    assert snapshot['logged'] == 6
+    assert [entry['elapsed_ms'] for entry in snapshot['worst']] == [900.0, 700.0, 500.0]
+    assert [entry['query'] for entry in snapshot['recent']] == ['query_5', 'query_4', 'query_3']
+
+    log.reset()
+    snapshot = log.snapshot()
+    assert (snapshot['logged'], snapshot['worst'], snapshot['recent']) == (0, [], [])